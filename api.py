@@ -1,15 +1,66 @@
-from fastapi import FastAPI, HTTPException, Depends, Cookie
+from fastapi import FastAPI, HTTPException, Depends, Cookie, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi.requests import Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from contextlib import asynccontextmanager
 import pymysql
 from datetime import date, datetime, time, timedelta
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
+import asyncio
+import base64
 import hashlib
+import json
 import secrets
 import os
 
-app = FastAPI()
+from async_db import AsyncDatabase
+from bulk_import import (MAX_CATEGORY_LENGTH, MAX_DURATION_MINUTES, MAX_PRIORITY, MIN_PRIORITY, MalformedBody, RowError,
+                         csv_records, detect_format, iter_lines, ndjson_records, task_row)
+from change_log import bump_version, compact as compact_change_log
+from db_pool import ConnectionPool, PoolTimeout
+import export_data
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Metrics, MetricsMiddleware, current_endpoint, instrument
+from notification_bus import NotificationBus, create_broker
+from notification_queue import NotificationQueue
+from planner import claim_night, finish_night, rebuild_plan, run_batch
+from planning_engine import DEFAULT_DAILY_MINUTES
+from read_cache import ReadCache
+from replanner import load_calendar, plan_task, plan_task_batch, retime_days, unplan_task, unplan_task_batch
+from repositories import (AvailabilityRepository, CALENDAR_SQL, CHANGES_SQL, GLOBAL_CATEGORIES_SQL, NOTIFICATIONS_SQL, PLAN_BY_DATE_SQL,
+                          UNREAD_COUNT_SQL, UNREAD_NOTIFICATIONS_SQL, USER_BY_NAME_SQL, USER_CATEGORIES_SQL,
+                          USER_VERSION_SQL, VERSION_AND_FLOOR_SQL, CategoryRepository, EventRepository,
+                          NotificationRepository,
+                          PlanRepository, TaskRepository, plans_by_dates_query, task_list_query, tasks_by_ids_query)
+from profiler import FOLDED_CONTENT_TYPE, ProfilerMiddleware, ProfileStore
+from session_store import create_session_store
+from slots import to_minutes, to_time
+from slow_queries import SlowQueryLog
+from storage import create_storage
+from streaming import (JSON_MEDIA_TYPE, NDJSON_MEDIA_TYPE, grouped_json_chunks, json_array_chunks,
+                       ndjson_chunks, open_row_stream)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the minimum pool size up front; the API still starts if the DB is down
+    pool.warm()
+    await adb.start()
+    await warm_read_cache()
+    broker_task = asyncio.create_task(bus.broker.run(bus))
+    compaction_task = asyncio.create_task(compact_change_log_periodically())
+    planning_task = asyncio.create_task(plan_nightly()) if PLAN_BATCH_AT else None
+    notification_queue.start()
+    yield
+    broker_task.cancel()
+    compaction_task.cancel()
+    if planning_task is not None:
+        planning_task.cancel()
+    # Flush queued notifications before the pool goes away
+    await asyncio.to_thread(notification_queue.stop)
+    await adb.close()
+    pool.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware to allow frontend requests
 app.add_middleware(
@@ -20,31 +71,195 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency, status and query counts, scraped from GET /metrics (METRICS_ENABLED=0 to turn off)
+metrics = Metrics(enabled=os.getenv("METRICS_ENABLED", "1") != "0")
+
+# Queries slower than SLOW_QUERY_MS are logged with their endpoint (0 to turn off; recent ones at /debug/slow-queries)
+slow_queries = SlowQueryLog(float(os.getenv("SLOW_QUERY_MS", "200")), endpoint=current_endpoint)
+
+# The middleware also tells the slow-query log which endpoint a query ran for, with or without metrics
+app.add_middleware(MetricsMiddleware, metrics=metrics, track_endpoint=slow_queries.enabled)
+
+def observe_query(sql, params, seconds):
+    if metrics.enabled:
+        metrics.observe_query(sql, params, seconds)
+    slow_queries.observe(sql, params, seconds)
+
+query_observer = observe_query if metrics.enabled or slow_queries.enabled else None
+
 # Database connection using environment variables
+def get_db_settings():
+    return {
+        "host": os.getenv("DB_HOST", "localhost"),
+        "port": int(os.getenv("DB_PORT", "3306")),
+        "database": os.getenv("DB_NAME", "smartplanner"),
+        "user": os.getenv("DB_USER", "root"),
+        "password": os.getenv("DB_PASSWORD", ""),
+        "connect_timeout": 10
+    }
+
+# DB_BACKEND=mysql (default) or sqlite for an embedded single-file database
+storage = create_storage(get_db_settings())
+
 def get_db_connection():
-    return pymysql.connect(
-        host=os.getenv("DB_HOST", "localhost"),
-        port=int(os.getenv("DB_PORT", "3306")),
-        database=os.getenv("DB_NAME", "smartplanner"),
-        user=os.getenv("DB_USER", "root"),
-        password=os.getenv("DB_PASSWORD", ""),
-        connect_timeout=10
-    )
+    # Every statement is timed and counted against the request that ran it
+    return instrument(storage.connect(), query_observer)
+
+# Connection pool sizing (watch /health/pool under load when tuning)
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_PING_INTERVAL = float(os.getenv("DB_POOL_PING_INTERVAL", "30"))
 
-# Initialize database connection (lazy connection)
-conn = None
+# Connections are opened lazily and reused across requests
+pool = ConnectionPool(
+    get_db_connection,
+    min_size=DB_POOL_MIN_SIZE,
+    max_size=DB_POOL_MAX_SIZE,
+    timeout=DB_POOL_TIMEOUT,
+    ping_interval=DB_POOL_PING_INTERVAL
+)
+
+# Async path for the hot read endpoints (aiomysql when installed, pooled threads otherwise)
+adb = AsyncDatabase(pool, get_db_settings(), min_size=DB_POOL_MIN_SIZE, max_size=DB_POOL_MAX_SIZE,
+                    driver=storage.async_driver, on_query=query_observer)
+
+@app.exception_handler(PoolTimeout)
+async def pool_timeout_handler(request: Request, exc: PoolTimeout):
+    return JSONResponse(status_code=503, content={"detail": f"Database busy: {str(exc)}"})
+
+@app.exception_handler(pymysql.OperationalError)
+async def db_unavailable_handler(request: Request, exc: pymysql.OperationalError):
+    return JSONResponse(status_code=503, content={"detail": f"Database unavailable: {str(exc)}"})
 
 def get_conn():
-    global conn
-    if conn is None:
+    """Check a pooled connection out for the duration of one request"""
+    try:
+        conn = pool.acquire()
+    except PoolTimeout as e:
+        raise HTTPException(status_code=503, detail=f"Database busy: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Database connection failed: {str(e)}")
+    try:
+        yield conn
+    except BaseException:
+        # Never hand a half-finished transaction to the next request
+        pool.release(conn, rollback=True)
+        raise
+    pool.release(conn)
+
+# Planning defaults (overridable per request on /generate-plan)
+PLAN_DAILY_MINUTES = int(os.getenv("PLAN_DAILY_MINUTES", str(DEFAULT_DAILY_MINUTES)))
+PLAN_DAY_START = os.getenv("PLAN_DAY_START", "09:00")
+PLAN_OPTIMAL_TIME_LIMIT_MS = int(os.getenv("PLAN_OPTIMAL_TIME_LIMIT_MS", "200"))
+# Longest horizon one /generate-plan request may ask for
+PLAN_MAX_DAYS = int(os.getenv("PLAN_MAX_DAYS", "366"))
+# Where tasks go in a day's free time: earliest (first gap long enough) or best (shortest gap long enough)
+PLAN_PLACEMENT = os.getenv("PLAN_PLACEMENT", "earliest")
+
+def user_calendar(cur, user_id: int, first_day: date, last_day: date):
+    """
+    Working hours and fixed events the incremental re-planning times days
+    around. Without working hours a day keeps the start it was planned with;
+    PLAN_DAY_START only applies to days with nothing planned yet.
+    """
+    return load_calendar(cur, user_id, first_day, last_day, parse_day_start(PLAN_DAY_START), PLAN_DAILY_MINUTES,
+                         PLAN_PLACEMENT)
+
+# GET /tasks page size (clients may ask for less, never more than the cap)
+TASKS_PAGE_SIZE = int(os.getenv("TASKS_PAGE_SIZE", "100"))
+TASKS_MAX_PAGE_SIZE = int(os.getenv("TASKS_MAX_PAGE_SIZE", "500"))
+
+# POST /tasks/bulk: rows per multi-row INSERT, rows per import, per-row errors reported back
+BULK_INSERT_CHUNK = int(os.getenv("BULK_INSERT_CHUNK", "1000"))
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "100000"))
+BULK_MAX_ERRORS = int(os.getenv("BULK_MAX_ERRORS", "1000"))
+# Ids per bulk complete/uncomplete/delete request
+BULK_MAX_IDS = int(os.getenv("BULK_MAX_IDS", "500"))
+
+# GET /tasks/changes: a client further behind than this many entries is told to resync
+CHANGES_MAX_ENTRIES = int(os.getenv("CHANGES_MAX_ENTRIES", "1000"))
+CHANGE_LOG_RETENTION_DAYS = int(os.getenv("CHANGE_LOG_RETENTION_DAYS", "30"))
+CHANGE_LOG_COMPACT_SECONDS = float(os.getenv("CHANGE_LOG_COMPACT_SECONDS", "3600"))
+
+async def compact_change_log_periodically():
+    while True:
+        await asyncio.sleep(CHANGE_LOG_COMPACT_SECONDS)
         try:
-            conn = get_db_connection()
-        except Exception as e:
-            raise HTTPException(status_code=503, detail=f"Database connection failed: {str(e)}")
-    return conn
+            await asyncio.to_thread(compact_change_log, pool, CHANGE_LOG_RETENTION_DAYS)
+        except Exception:
+            # Database hiccup: the next pass catches up
+            continue
 
-# In-memory session storage (use Redis in production)
-sessions = {}
+# Nightly batch planning (see planner.py): PLAN_BATCH_TIME=HH:MM local time, empty to leave it to cron
+PLAN_BATCH_TIME = os.getenv("PLAN_BATCH_TIME", "")
+PLAN_BATCH_AT = datetime.strptime(PLAN_BATCH_TIME, "%H:%M").time() if PLAN_BATCH_TIME else None
+PLAN_BATCH_DAYS = int(os.getenv("PLAN_BATCH_DAYS", "7"))
+PLAN_BATCH_WORKERS = int(os.getenv("PLAN_BATCH_WORKERS", "2"))
+
+def run_nightly_plan():
+    """One worker claims the night; the batch gets connections of its own so requests are not starved"""
+    today = date.today()
+    if not claim_night(pool, today):
+        return None
+    batch_pool = ConnectionPool(get_db_connection, min_size=0, max_size=PLAN_BATCH_WORKERS, timeout=DB_POOL_TIMEOUT)
+    try:
+        summary = run_batch(batch_pool, start=today, days=PLAN_BATCH_DAYS, workers=PLAN_BATCH_WORKERS,
+                            daily_minutes=PLAN_DAILY_MINUTES, day_start=parse_day_start(PLAN_DAY_START),
+                            time_limit=PLAN_OPTIMAL_TIME_LIMIT_MS / 1000, placement=PLAN_PLACEMENT)
+    finally:
+        batch_pool.close()
+    finish_night(pool, today, summary)
+    return summary
+
+async def plan_nightly():
+    while True:
+        now = datetime.now()
+        next_run = datetime.combine(now.date(), PLAN_BATCH_AT)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        await asyncio.sleep((next_run - now).total_seconds())
+        try:
+            await asyncio.to_thread(run_nightly_plan)
+        except Exception:
+            # Users the run did not reach are picked up by the next one (or `python planner.py`)
+            continue
+
+def parse_day_start(value: str) -> time:
+    try:
+        return datetime.strptime(value, "%H:%M").time()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start_time must be in HH:MM format")
+
+# Push channel for /notifications/stream (NOTIFICATION_BROKER=table to fan out across workers)
+bus = NotificationBus(create_broker(adb.fetchall))
+SSE_KEEPALIVE_SECONDS = 15
+
+def publish_notifications(batch):
+    created_at = str(datetime.now().replace(microsecond=0))
+    for user_id, message, notif_type in batch:
+        bus.publish(user_id, {
+            "message": message,
+            "type": notif_type,
+            "read_status": False,
+            "created_at": created_at
+        })
+
+# Notifications are written behind the request in multi-row batches
+notification_queue = NotificationQueue(
+    pool,
+    max_size=int(os.getenv("NOTIFICATION_QUEUE_SIZE", "10000")),
+    batch_size=int(os.getenv("NOTIFICATION_BATCH_SIZE", "200")),
+    flush_interval=int(os.getenv("NOTIFICATION_FLUSH_MS", "500")) / 1000,
+    on_flushed=publish_notifications
+)
+
+# In-process cache for categories (stats at GET /health/cache); credentials and roles are never cached
+CATEGORY_CACHE_SECONDS = float(os.getenv("CATEGORY_CACHE_SECONDS", "300"))
+read_cache = ReadCache(ttl=CATEGORY_CACHE_SECONDS, max_entries=int(os.getenv("READ_CACHE_MAX_ENTRIES", "10000")))
+
+# Session storage: in-process LRU+TTL by default, SESSION_BACKEND=mysql to share across workers
+sessions = create_session_store(pool)
 
 # Request/Response models
 class LoginRequest(BaseModel):
@@ -52,11 +267,28 @@ class LoginRequest(BaseModel):
     password: str
 
 class TaskCreate(BaseModel):
+    # Same ranges as rows of POST /tasks/bulk (bulk_import.task_row)
     title: str
     deadline: str
-    duration: int
-    priority: int
-    category: Optional[str] = "General"
+    duration: int = Field(gt=0, le=MAX_DURATION_MINUTES)
+    priority: int = Field(ge=MIN_PRIORITY, le=MAX_PRIORITY)
+    category: Optional[str] = Field("General", max_length=MAX_CATEGORY_LENGTH)
+
+class AvailabilityWindow(BaseModel):
+    weekday: int  # 0 = Monday
+    start: str    # HH:MM
+    end: str
+
+class AvailabilityUpdate(BaseModel):
+    windows: List[AvailabilityWindow]
+
+class EventCreate(BaseModel):
+    title: str
+    start: str  # YYYY-MM-DDTHH:MM
+    end: str
+
+class TaskIds(BaseModel):
+    task_ids: List[int]
 
 class TaskResponse(BaseModel):
     id: int
@@ -68,6 +300,10 @@ class TaskResponse(BaseModel):
     category: Optional[str] = None
     completed_at: Optional[str] = None
 
+class TaskPage(BaseModel):
+    tasks: List[TaskResponse]
+    next_cursor: Optional[str] = None
+
 class CategoryResponse(BaseModel):
     id: int
     name: str
@@ -93,11 +329,128 @@ class PlanItem(BaseModel):
     scheduled_time: Optional[str] = None
     task_id: Optional[int] = None
 
+class TaskChanges(BaseModel):
+    version: int
+    reset: bool = False
+    tasks: List[TaskResponse] = []
+    deleted: List[int] = []
+    plans: Dict[str, List[PlanItem]] = {}
+
 class UserResponse(BaseModel):
     id: int
     username: str
     role: str
 
+def format_scheduled_time(value) -> Optional[str]:
+    if not value:
+        return None
+    if isinstance(value, time):
+        return value.strftime("%H:%M")
+    return str(value)
+
+def encode_cursor(deadline, task_id: int) -> str:
+    """Opaque keyset cursor for the (deadline, id) ordering"""
+    raw = f"{deadline or ''}|{task_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        deadline, task_id = raw.split("|")
+        return (date.fromisoformat(deadline) if deadline else None), int(task_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def task_dict(t) -> dict:
+    return {
+        "id": t[0],
+        "title": t[1],
+        "deadline": str(t[2]),
+        "duration_minutes": t[3],
+        "priority": t[4],
+        "status": t[5],
+        "category": t[6] if len(t) > 6 else None,
+        "completed_at": str(t[7]) if len(t) > 7 and t[7] else None
+    }
+
+def task_response(t) -> TaskResponse:
+    return TaskResponse(**task_dict(t))
+
+def calendar_event(event) -> dict:
+    return {
+        "task_id": event[1],
+        "title": event[2],
+        "duration_minutes": event[3],
+        "priority": event[4],
+        "deadline": str(event[5]),
+        "scheduled_time": format_scheduled_time(event[6]),
+        "category": event[7],
+        "status": event[8]
+    }
+
+# format=json buffers the response; ndjson and json-stream stream it from a server-side cursor
+ResponseFormat = Literal["json", "ndjson", "json-stream"]
+
+async def stream_response(sql, params, response_format: str, encode) -> StreamingResponse:
+    batches = await asyncio.to_thread(open_row_stream, pool, sql, params)
+    if response_format == "ndjson":
+        return StreamingResponse(encode["ndjson"](batches), media_type=NDJSON_MEDIA_TYPE)
+    return StreamingResponse(encode["json"](batches), media_type=JSON_MEDIA_TYPE)
+
+def plan_item(item) -> dict:
+    return {
+        "title": item[0],
+        "task_order": item[1],
+        "duration_minutes": item[2],
+        "priority": item[3],
+        "deadline": str(item[4]),
+        "scheduled_time": format_scheduled_time(item[5]),
+        "task_id": item[6]
+    }
+
+# Conditional GET: every write to a user's tasks, plan or categories bumps user_versions
+# in the same transaction (change_log.bump_version), so reads can answer If-None-Match
+# from one primary-key lookup
+async def user_version(user_id: int) -> int:
+    row = await adb.fetchone(USER_VERSION_SQL, (user_id,))
+    return row[0] if row else 0
+
+def user_etag(request: Request, user_id: int, version: int, *scope) -> str:
+    """Weak ETag from the user's version, the request URL and anything else the response depends on"""
+    key = "|".join(str(part) for part in (user_id, request.url.path, request.url.query, *scope))
+    return f'W/"{version}-{hashlib.sha1(key.encode()).hexdigest()[:16]}"'
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """304 response if the client already holds this version, else None"""
+    header = request.headers.get("if-none-match")
+    if header and (header.strip() == "*" or etag in (tag.strip() for tag in header.split(","))):
+        return Response(status_code=304, headers=etag_headers(etag))
+    return None
+
+def etag_headers(etag: str) -> dict:
+    # private, no-cache: browsers keep the body but revalidate on every fetch
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+# Cached reads: the global categories are shared by every user, a user's own are
+# tagged with their version so a write on another worker is never served stale
+async def global_categories() -> list:
+    return await read_cache.get_or_load("categories", lambda: adb.fetchall(GLOBAL_CATEGORIES_SQL))
+
+async def user_categories(user_id: int, version: int) -> list:
+    key = ("categories", user_id)
+    entry = read_cache.get(key)
+    if entry is None or entry[0] != version:
+        entry = (version, await adb.fetchall(USER_CATEGORIES_SQL, (user_id,)))
+        read_cache.set(key, entry)
+    return entry[1]
+
+async def warm_read_cache():
+    """Load the global categories at startup; if the DB is down they load on first use"""
+    try:
+        await global_categories()
+    except Exception:
+        pass
+
 # Authentication helpers
 def hash_password(password: str) -> str:
     return hashlib.sha256(password.encode()).hexdigest()
@@ -107,41 +460,40 @@ def verify_password(password: str, password_hash: str) -> bool:
 
 def create_session(user_id: int, username: str, role: str) -> str:
     session_token = secrets.token_urlsafe(32)
-    sessions[session_token] = {
+    sessions.set(session_token, {
         "user_id": user_id,
         "username": username,
         "role": role
-    }
+    })
     return session_token
 
 def get_current_user(session_token: Optional[str] = Cookie(None)) -> dict:
-    if not session_token or session_token not in sessions:
+    session = sessions.get(session_token) if session_token else None
+    if session is None:
         raise HTTPException(status_code=401, detail="Not authenticated")
-    return sessions[session_token]
+    return session
+
+def is_admin_request(scope) -> bool:
+    token = Request(scope).cookies.get("session_token")
+    session = sessions.get(token) if token else None
+    return session is not None and session["role"] == "admin"
+
+# Admins add ?profile=1 or X-Profile: 1 to sample a single request (PROFILING_ENABLED=0 to turn off)
+profiles = ProfileStore(keep=int(os.getenv("PROFILE_KEEP", "20")), directory=os.getenv("PROFILE_DIR") or None)
+if os.getenv("PROFILING_ENABLED", "1") != "0":
+    app.add_middleware(ProfilerMiddleware, store=profiles, authorize=is_admin_request,
+                       interval_ms=float(os.getenv("PROFILE_INTERVAL_MS", "5")))
 
 def create_notification(user_id: int, message: str, notif_type: str = "info"):
-    """Helper function to create notifications"""
-    db_conn = get_conn()
-    cur = db_conn.cursor()
-    cur.execute(
-        "INSERT INTO notifications (user_id, message, type) VALUES (%s, %s, %s)",
-        (user_id, message, notif_type)
-    )
-    db_conn.commit()
+    """Helper function to create notifications (stored and pushed by the write-behind queue)"""
+    notification_queue.enqueue(user_id, message, notif_type)
 
 # Authentication endpoints
 @app.post("/login")
-def login(credentials: LoginRequest, response: JSONResponse):
+async def login(credentials: LoginRequest, response: JSONResponse):
     """Login endpoint"""
-    conn = get_conn()
-    cur = conn.cursor()
-    
-    cur.execute(
-        "SELECT id, username, password_hash, role FROM users WHERE username = %s",
-        (credentials.username,)
-    )
-    user = cur.fetchone()
-    
+    # Always from the database: a cached row would keep an old password, a deleted user or a lost role working
+    user = await adb.fetchone(USER_BY_NAME_SQL, (credentials.username,))
     if not user or not verify_password(credentials.password, user[2]):
         raise HTTPException(status_code=401, detail="Invalid username or password")
     
@@ -161,8 +513,8 @@ def login(credentials: LoginRequest, response: JSONResponse):
 @app.post("/logout")
 def logout(session_token: Optional[str] = Cookie(None)):
     """Logout endpoint"""
-    if session_token and session_token in sessions:
-        del sessions[session_token]
+    if session_token:
+        sessions.delete(session_token)
     return {"message": "Logged out successfully"}
 
 @app.get("/me", response_model=UserResponse)
@@ -176,13 +528,16 @@ def get_current_user_info(current_user: dict = Depends(get_current_user)):
 
 # Task endpoints (require authentication)
 @app.post("/tasks")
-def add_task(task: TaskCreate, current_user: dict = Depends(get_current_user)):
+def add_task(task: TaskCreate, current_user: dict = Depends(get_current_user), conn=Depends(get_conn)):
     """Add a new task to the database"""
     cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO tasks (title, deadline, duration_minutes, priority, user_id, category) VALUES (%s, %s, %s, %s, %s, %s)",
-        (task.title, task.deadline, task.duration, task.priority, current_user["user_id"], task.category)
+    task_id = TaskRepository(cur).create(
+        task.title, task.deadline, task.duration, task.priority, current_user["user_id"], task.category
     )
+    
+    # Slot it into an existing plan day with room, if any
+    planned_for = plan_task(cur, current_user["user_id"], task_id, PLAN_DAILY_MINUTES, calendar_for=user_calendar)
+    bump_version(cur, current_user["user_id"], tasks=[task_id], plan_dates=[planned_for] if planned_for else [])
     conn.commit()
     
     # Create notification for new task
@@ -192,45 +547,260 @@ def add_task(task: TaskCreate, current_user: dict = Depends(get_current_user)):
         "info"
     )
     
-    return {"message": "Task added", "id": cur.lastrowid}
+    return {"message": "Task added", "id": task_id, "planned_for": str(planned_for) if planned_for else None}
 
-@app.get("/tasks", response_model=List[TaskResponse])
-def get_tasks(current_user: dict = Depends(get_current_user)):
-    """Get all tasks for current user"""
-    cur = conn.cursor()
+@app.post("/tasks/bulk")
+async def bulk_add_tasks(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Import tasks from a streamed CSV (with a header row) or NDJSON body"""
+    body_format = format or detect_format(request.headers.get("content-type"))
+    if body_format is None:
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson")
+    records = (csv_records if body_format == "csv" else ndjson_records)(iter_lines(request.stream()))
+    user_id = current_user["user_id"]
     
-    # Admin can see all tasks, users see only their own
-    if current_user["role"] == "admin":
-        cur.execute("SELECT id, title, deadline, duration_minutes, priority, status, category, completed_at FROM tasks")
-    else:
-        cur.execute(
-            "SELECT id, title, deadline, duration_minutes, priority, status, category, completed_at FROM tasks WHERE user_id = %s",
-            (current_user["user_id"],)
-        )
+    imported = 0
+    failed = 0
+    errors = []
+    batch = []
     
-    tasks = cur.fetchall()
-    return [
-        TaskResponse(
-            id=t[0],
-            title=t[1],
-            deadline=str(t[2]),
-            duration_minutes=t[3],
-            priority=t[4],
-            status=t[5],
-            category=t[6] if len(t) > 6 else None,
-            completed_at=str(t[7]) if len(t) > 7 and t[7] else None
+    # One connection and one transaction for the whole import; rows are inserted as they arrive
+    conn = await asyncio.to_thread(pool.acquire)
+    try:
+        cur = conn.cursor()
+        await asyncio.to_thread(conn.begin)
+        async for row_number, record in records:
+            try:
+                if isinstance(record, RowError):
+                    raise record
+                batch.append(task_row(record, user_id))
+            except RowError as e:
+                failed += 1
+                if len(errors) < BULK_MAX_ERRORS:
+                    errors.append({"row": row_number, "error": str(e)})
+                continue
+            if imported + len(batch) > BULK_MAX_ROWS:
+                raise HTTPException(status_code=413, detail=f"Imports are limited to {BULK_MAX_ROWS} tasks")
+            if len(batch) >= BULK_INSERT_CHUNK:
+                await asyncio.to_thread(TaskRepository(cur).create_many, batch)
+                imported += len(batch)
+                batch = []
+        if batch:
+            await asyncio.to_thread(TaskRepository(cur).create_many, batch)
+            imported += len(batch)
+        if imported:
+            # Too many inserts to log one by one: clients of /tasks/changes resync instead
+            await asyncio.to_thread(bump_version, cur, user_id, reset=True)
+        await asyncio.to_thread(conn.commit)
+    except MalformedBody as e:
+        await asyncio.to_thread(pool.release, conn, True)
+        raise HTTPException(status_code=400, detail=f"Unreadable {body_format} body: {str(e)}")
+    except BaseException:
+        await asyncio.to_thread(pool.release, conn, True)
+        raise
+    pool.release(conn)
+    
+    # One summary instead of a notification per task
+    if imported:
+        create_notification(
+            user_id,
+            f"Imported {imported} task(s)" + (f", {failed} row(s) skipped" if failed else ""),
+            "info"
         )
-        for t in tasks
-    ]
+    
+    return {
+        "message": f"Imported {imported} task(s)",
+        "imported": imported,
+        "failed": failed,
+        "errors": errors,
+        "errors_truncated": failed > len(errors)
+    }
+
+def owned_tasks(cur, task_ids: List[int], current_user: dict) -> dict:
+    """One ownership check for a batch of ids; returns {owner user_id: [task ids]}"""
+    task_ids = sorted(set(task_ids))
+    if not task_ids:
+        raise HTTPException(status_code=400, detail="task_ids is empty")
+    if len(task_ids) > BULK_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_IDS} task ids per request")
+    
+    owners = TaskRepository(cur).owners(task_ids)
+    missing = set(task_ids) - {task_id for ids in owners.values() for task_id in ids}
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Tasks not found: {sorted(missing)}")
+    if current_user["role"] != "admin" and set(owners) != {current_user["user_id"]}:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return owners
+
+# Bulk variants of complete/uncomplete/delete: one check, one statement, one commit
+@app.patch("/tasks/bulk/complete")
+def bulk_complete_tasks(body: TaskIds, current_user: dict = Depends(get_current_user), conn=Depends(get_conn)):
+    """Mark several tasks as completed"""
+    cur = conn.cursor()
+    owners = owned_tasks(cur, body.task_ids, current_user)
+    task_ids = sorted(task_id for ids in owners.values() for task_id in ids)
+    
+    TaskRepository(cur).complete(task_ids)
+    replanned = set()
+    for owner, ids in owners.items():
+        dates = unplan_task_batch(cur, owner, ids, PLAN_DAILY_MINUTES, calendar_for=user_calendar)
+        bump_version(cur, owner, tasks=ids, plan_dates=dates)
+        replanned.update(dates)
+    conn.commit()
+    
+    create_notification(
+        current_user["user_id"],
+        f"{len(task_ids)} task(s) marked as completed! 🎉",
+        "success"
+    )
+    
+    return {"message": "Tasks completed", "task_ids": task_ids, "replanned_dates": [str(d) for d in sorted(replanned)]}
+
+@app.patch("/tasks/bulk/uncomplete")
+def bulk_uncomplete_tasks(body: TaskIds, current_user: dict = Depends(get_current_user), conn=Depends(get_conn)):
+    """Mark several tasks as pending again"""
+    cur = conn.cursor()
+    owners = owned_tasks(cur, body.task_ids, current_user)
+    task_ids = sorted(task_id for ids in owners.values() for task_id in ids)
+    
+    TaskRepository(cur).reopen(task_ids)
+    planned_for = {}
+    for owner, ids in owners.items():
+        placed = plan_task_batch(cur, owner, ids, PLAN_DAILY_MINUTES, calendar_for=user_calendar)
+        bump_version(cur, owner, tasks=ids, plan_dates=placed.values())
+        planned_for.update(placed)
+    conn.commit()
+    
+    return {
+        "message": "Tasks set to pending",
+        "task_ids": task_ids,
+        "planned_for": {str(task_id): str(plan_date) for task_id, plan_date in sorted(planned_for.items())}
+    }
+
+@app.post("/tasks/bulk/delete")
+def bulk_delete_tasks(body: TaskIds, current_user: dict = Depends(get_current_user), conn=Depends(get_conn)):
+    """Delete several tasks"""
+    cur = conn.cursor()
+    owners = owned_tasks(cur, body.task_ids, current_user)
+    task_ids = sorted(task_id for ids in owners.values() for task_id in ids)
+    
+    # Close the gaps before the FK cascade drops their plan rows
+    replanned = set()
+    for owner, ids in owners.items():
+        dates = unplan_task_batch(cur, owner, ids, PLAN_DAILY_MINUTES, calendar_for=user_calendar)
+        bump_version(cur, owner, deleted=ids, plan_dates=dates)
+        replanned.update(dates)
+    TaskRepository(cur).delete(task_ids)
+    conn.commit()
+    
+    return {"message": "Tasks deleted", "task_ids": task_ids, "replanned_dates": [str(d) for d in sorted(replanned)]}
+
+@app.get("/tasks", response_model=TaskPage)
+async def get_tasks(
+    request: Request,
+    response: Response,
+    status: Optional[Literal["pending", "completed"]] = None,
+    category: Optional[str] = None,
+    deadline_from: Optional[date] = None,
+    deadline_to: Optional[date] = None,
+    user_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    format: ResponseFormat = "json",
+    current_user: dict = Depends(get_current_user)
+):
+    """Get tasks one page at a time, ordered by deadline then id (or streamed in full)"""
+    # Admin can see all tasks (or one user's), users see only their own
+    etag = None
+    if current_user["role"] != "admin":
+        if user_id is not None and user_id != current_user["user_id"]:
+            raise HTTPException(status_code=403, detail="Not authorized")
+        user_id = current_user["user_id"]
+    if user_id is not None:
+        # Only a single user's tasks have a version to validate against
+        etag = user_etag(request, user_id, await user_version(user_id))
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        response.headers.update(etag_headers(etag))
+    
+    filters = dict(user_id=user_id, status=status, category=category, deadline_from=deadline_from,
+                   deadline_to=deadline_to, after=decode_cursor(cursor) if cursor else None)
+    
+    # Streamed reads are not paged: memory stays flat however many rows match
+    if format != "json":
+        sql, params = task_list_query(**filters, limit=limit)
+        streamed = await stream_response(sql, params, format, {
+            "ndjson": lambda batches: ndjson_chunks(batches, task_dict),
+            "json": lambda batches: json_array_chunks(batches, task_dict)
+        })
+        if etag:
+            streamed.headers.update(etag_headers(etag))
+        return streamed
+    
+    page_size = min(limit or TASKS_PAGE_SIZE, TASKS_MAX_PAGE_SIZE)
+    rows = await adb.fetchall(*task_list_query(**filters, limit=page_size + 1))
+    
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1][2], rows[-1][0])
+    return TaskPage(tasks=[task_response(t) for t in rows], next_cursor=next_cursor)
+
+@app.get("/tasks/changes", response_model=TaskChanges)
+async def get_task_changes(since: Optional[int] = Query(None, ge=0), current_user: dict = Depends(get_current_user)):
+    """Tasks and plan days changed after version `since`; reset=true means reload everything"""
+    user_id = current_user["user_id"]
+    row = await adb.fetchone(VERSION_AND_FLOOR_SQL, (user_id,))
+    version, floor = row if row else (0, 0)
+    
+    # No version yet, one that was compacted away, or one this server never issued
+    if since is None or since < floor or since > version:
+        return TaskChanges(version=version, reset=True)
+    if since == version:
+        return TaskChanges(version=version)
+    
+    changes = await adb.fetchall(CHANGES_SQL, (user_id, since, CHANGES_MAX_ENTRIES + 1))
+    if len(changes) > CHANGES_MAX_ENTRIES:
+        return TaskChanges(version=version, reset=True)
+    
+    # Entries hold keys only; read the current state of what changed
+    task_ids = [int(c[1]) for c in changes if c[0] == "task" and not c[2]]
+    deleted = [int(c[1]) for c in changes if c[0] == "task" and c[2]]
+    plan_dates = [c[1] for c in changes if c[0] == "plan"]
+    
+    tasks = []
+    if task_ids:
+        tasks = await adb.fetchall(*tasks_by_ids_query(user_id, task_ids))
+        # Deleted after the version was read: report it as gone
+        found = {t[0] for t in tasks}
+        deleted += [task_id for task_id in task_ids if task_id not in found]
+    
+    plans = {plan_date: [] for plan_date in plan_dates}
+    if plan_dates:
+        items = await adb.fetchall(*plans_by_dates_query(user_id, plan_dates))
+        for item in items:
+            plans[str(item[0])].append(PlanItem(**plan_item(item[1:])))
+    
+    return TaskChanges(
+        version=version,
+        tasks=[task_response(t) for t in tasks],
+        deleted=deleted,
+        plans=plans
+    )
 
 @app.patch("/tasks/{task_id}/complete")
-def complete_task(task_id: int, current_user: dict = Depends(get_current_user)):
+def complete_task(task_id: int, current_user: dict = Depends(get_current_user), conn=Depends(get_conn)):
     """Mark a task as completed"""
     cur = conn.cursor()
     
+    tasks = TaskRepository(cur)
+    
     # Check if task belongs to user
-    cur.execute("SELECT id, title, user_id FROM tasks WHERE id = %s", (task_id,))
-    task = cur.fetchone()
+    task = tasks.get(task_id)
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
@@ -239,10 +809,10 @@ def complete_task(task_id: int, current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Not authorized")
     
     # Update task status
-    cur.execute(
-        "UPDATE tasks SET status = 'completed', completed_at = NOW() WHERE id = %s",
-        (task_id,)
-    )
+    tasks.complete([task_id])
+    # Free its slot and shift the rest of the day up
+    replanned = unplan_task(cur, task[2], task_id, PLAN_DAILY_MINUTES, calendar_for=user_calendar)
+    bump_version(cur, task[2], tasks=[task_id], plan_dates=replanned)
     conn.commit()
     
     # Create notification
@@ -252,132 +822,109 @@ def complete_task(task_id: int, current_user: dict = Depends(get_current_user)):
         "success"
     )
     
-    return {"message": "Task completed", "task_id": task_id}
+    return {"message": "Task completed", "task_id": task_id, "replanned_dates": [str(d) for d in replanned]}
 
 @app.patch("/tasks/{task_id}/uncomplete")
-def uncomplete_task(task_id: int, current_user: dict = Depends(get_current_user)):
+def uncomplete_task(task_id: int, current_user: dict = Depends(get_current_user), conn=Depends(get_conn)):
     """Mark a task as pending again"""
     cur = conn.cursor()
     
-    cur.execute("SELECT user_id FROM tasks WHERE id = %s", (task_id,))
-    task = cur.fetchone()
+    tasks = TaskRepository(cur)
+    task = tasks.get(task_id)
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    if task[0] != current_user["user_id"] and current_user["role"] != "admin":
+    if task[2] != current_user["user_id"] and current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    cur.execute(
-        "UPDATE tasks SET status = 'pending', completed_at = NULL WHERE id = %s",
-        (task_id,)
-    )
+    tasks.reopen([task_id])
+    planned_for = plan_task(cur, task[2], task_id, PLAN_DAILY_MINUTES, calendar_for=user_calendar)
+    bump_version(cur, task[2], tasks=[task_id], plan_dates=[planned_for] if planned_for else [])
     conn.commit()
     
-    return {"message": "Task set to pending", "task_id": task_id}
+    return {"message": "Task set to pending", "task_id": task_id, "planned_for": str(planned_for) if planned_for else None}
 
 @app.delete("/tasks/{task_id}")
-def delete_task(task_id: int, current_user: dict = Depends(get_current_user)):
+def delete_task(task_id: int, current_user: dict = Depends(get_current_user), conn=Depends(get_conn)):
     """Delete a task"""
     cur = conn.cursor()
     
-    cur.execute("SELECT user_id FROM tasks WHERE id = %s", (task_id,))
-    task = cur.fetchone()
+    tasks = TaskRepository(cur)
+    task = tasks.get(task_id)
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    if task[0] != current_user["user_id"] and current_user["role"] != "admin":
+    if task[2] != current_user["user_id"] and current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    cur.execute("DELETE FROM tasks WHERE id = %s", (task_id,))
+    # Close the gap before the FK cascade drops its plan rows
+    replanned = unplan_task(cur, task[2], task_id, PLAN_DAILY_MINUTES, calendar_for=user_calendar)
+    tasks.delete([task_id])
+    bump_version(cur, task[2], deleted=[task_id], plan_dates=replanned)
     conn.commit()
     
-    return {"message": "Task deleted", "task_id": task_id}
+    return {"message": "Task deleted", "task_id": task_id, "replanned_dates": [str(d) for d in replanned]}
 
 @app.post("/generate-plan")
-def generate_plan(days: int = 1, current_user: dict = Depends(get_current_user)):
-    """Generate smart daily plan from pending tasks with timely scheduling"""
+def generate_plan(
+    days: int = 1,
+    mode: Literal["greedy", "optimal"] = "greedy",
+    daily_minutes: Optional[int] = None,
+    start_time: Optional[str] = None,
+    placement: Optional[Literal["earliest", "best"]] = None,
+    current_user: dict = Depends(get_current_user),
+    conn=Depends(get_conn)
+):
+    """Generate smart daily plan from pending tasks, timed around working hours and fixed events"""
+    if not 1 <= days <= PLAN_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {PLAN_MAX_DAYS}")
+    daily_minutes = PLAN_DAILY_MINUTES if daily_minutes is None else daily_minutes
+    if not 0 < daily_minutes <= 24 * 60:
+        raise HTTPException(status_code=400, detail="daily_minutes must be between 1 and 1440")
+    day_start = parse_day_start(start_time or PLAN_DAY_START)
+    
     cur = conn.cursor()
     
     today = date.today()
     results = []
     
-    for day_offset in range(days):
-        plan_date = today + timedelta(days=day_offset)
-        
-        # Clear existing plan for this date
-        cur.execute(
-            "DELETE FROM daily_plan WHERE plan_date = %s AND user_id = %s",
-            (plan_date, current_user["user_id"])
-        )
+    # Rebuild the whole range in one transaction: one range delete, one read, one batched insert
+    conn.begin()
+    day_plans, pending, _ = rebuild_plan(cur, current_user["user_id"], today, days, daily_minutes=daily_minutes,
+                                         day_start=day_start, mode=mode, time_limit=PLAN_OPTIMAL_TIME_LIMIT_MS / 1000,
+                                         placement=placement or PLAN_PLACEMENT)
+    conn.commit()
     
-        # Fetch pending tasks for this user that haven't been planned yet
-        cur.execute("""
-            SELECT t.id, t.deadline, t.duration_minutes, t.priority, t.title
-            FROM tasks t
-            LEFT JOIN daily_plan dp ON t.id = dp.task_id AND dp.plan_date = %s
-            WHERE t.status='pending' AND t.user_id = %s AND dp.id IS NULL
-        """, (plan_date, current_user["user_id"]))
-        tasks = list(cur.fetchall())
-        
-        if not tasks:
+    for day in day_plans:
+        if not pending:
             results.append({
-                "date": str(plan_date),
+                "date": str(day.date),
                 "tasks_planned": 0,
                 "message": "No pending tasks to plan"
             })
             continue
         
-        # Calculate urgency score: days until deadline
-        def calculate_urgency(deadline_str):
-            deadline = datetime.strptime(str(deadline_str), "%Y-%m-%d").date()
-            days_until = (deadline - plan_date).days
-            return days_until  # Negative means overdue (high urgency)
-        
-        # Sort tasks: most urgent first, then highest priority, then shortest duration
-        tasks_with_urgency = [(t, calculate_urgency(t[1])) for t in tasks]
-        tasks_with_urgency.sort(key=lambda x: (x[1], -x[0][3], x[0][2]))
-        
-        # Schedule tasks in timely order
-        available_minutes = 300  # 5 hours
-        start_time = datetime.combine(plan_date, time(9, 0))
-        current_time = start_time
-        order = 1
         planned_tasks = []
-        
-        for task, urgency in tasks_with_urgency:
-            duration = task[2]
-            
-            if duration <= available_minutes:
-                scheduled_time = current_time.time()
-                
-                cur.execute(
-                    "INSERT INTO daily_plan (task_id, plan_date, task_order, user_id, scheduled_time) VALUES (%s, %s, %s, %s, %s)",
-                    (task[0], plan_date, order, current_user["user_id"], scheduled_time)
-                )
-                
-                current_time += timedelta(minutes=duration)
-                available_minutes -= duration
-                planned_tasks.append({
-                    "task_id": task[0],
-                    "title": task[4],
-                    "order": order,
-                    "duration": duration,
-                    "scheduled_time": scheduled_time.strftime("%H:%M")
-                })
-                order += 1
+        for item in day.tasks:
+            planned_tasks.append({
+                "task_id": item.task_id,
+                "title": item.title,
+                "order": item.order,
+                "duration": item.duration,
+                "scheduled_time": item.scheduled_time.strftime("%H:%M")
+            })
         
         results.append({
-            "date": str(plan_date),
+            "date": str(day.date),
             "tasks_planned": len(planned_tasks),
-            "remaining_minutes": available_minutes,
-            "start_time": start_time.strftime("%H:%M"),
+            "remaining_minutes": day.remaining_minutes,
+            "start_time": day.start_time.strftime("%H:%M"),
+            "mode": day.mode,
             "tasks": planned_tasks
         })
     
-    conn.commit()
-    
     # Create notification
     total_planned = sum(r["tasks_planned"] for r in results)
     create_notification(
@@ -393,171 +940,221 @@ def generate_plan(days: int = 1, current_user: dict = Depends(get_current_user))
     }
 
 @app.get("/plan/today", response_model=List[PlanItem])
-def get_today(current_user: dict = Depends(get_current_user)):
+async def get_today(request: Request, response: Response, current_user: dict = Depends(get_current_user)):
     """Get today's plan for current user"""
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT t.title, d.task_order, t.duration_minutes, t.priority, t.deadline, d.scheduled_time, t.id
-        FROM daily_plan d
-        JOIN tasks t ON t.id = d.task_id
-        WHERE d.plan_date = CURDATE() AND d.user_id = %s
-        ORDER BY d.task_order
-    """, (current_user["user_id"],))
-    plan = cur.fetchall()
-    result = []
-    for item in plan:
-        scheduled_time_str = None
-        if item[5]:
-            if isinstance(item[5], time):
-                scheduled_time_str = item[5].strftime("%H:%M")
-            else:
-                scheduled_time_str = str(item[5])
-        result.append(PlanItem(
-            title=item[0],
-            task_order=item[1],
-            duration_minutes=item[2],
-            priority=item[3],
-            deadline=str(item[4]),
-            scheduled_time=scheduled_time_str,
-            task_id=item[6] if len(item) > 6 else None
-        ))
-    return result
+    today = date.today()
+    # The date is part of the tag: the same version means a different plan after midnight
+    etag = user_etag(request, current_user["user_id"], await user_version(current_user["user_id"]), today)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    response.headers.update(etag_headers(etag))
+    plan = await adb.fetchall(PLAN_BY_DATE_SQL, (today, current_user["user_id"]))
+    return [PlanItem(**plan_item(item)) for item in plan]
 
 @app.get("/plan/{plan_date}")
-def get_plan_by_date(plan_date: str, current_user: dict = Depends(get_current_user)):
+def get_plan_by_date(plan_date: str, current_user: dict = Depends(get_current_user), conn=Depends(get_conn)):
     """Get plan for a specific date"""
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT t.title, d.task_order, t.duration_minutes, t.priority, t.deadline, d.scheduled_time, t.id
-        FROM daily_plan d
-        JOIN tasks t ON t.id = d.task_id
-        WHERE d.plan_date = %s AND d.user_id = %s
-        ORDER BY d.task_order
-    """, (plan_date, current_user["user_id"]))
-    plan = cur.fetchall()
-    result = []
-    for item in plan:
-        scheduled_time_str = None
-        if item[5]:
-            if isinstance(item[5], time):
-                scheduled_time_str = item[5].strftime("%H:%M")
-            else:
-                scheduled_time_str = str(item[5])
-        result.append({
-            "title": item[0],
-            "task_order": item[1],
-            "duration_minutes": item[2],
-            "priority": item[3],
-            "deadline": str(item[4]),
-            "scheduled_time": scheduled_time_str,
-            "task_id": item[6]
-        })
-    return result
+    plan = PlanRepository(conn.cursor()).for_date(current_user["user_id"], plan_date)
+    return [plan_item(item) for item in plan]
 
 # Categories endpoints
 @app.get("/categories", response_model=List[CategoryResponse])
-def get_categories(current_user: dict = Depends(get_current_user)):
+async def get_categories(request: Request, response: Response, current_user: dict = Depends(get_current_user)):
     """Get all categories"""
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT id, name, color FROM categories 
-        WHERE user_id IS NULL OR user_id = %s
-        ORDER BY name
-    """, (current_user["user_id"],))
-    categories = cur.fetchall()
+    version = await user_version(current_user["user_id"])
+    etag = user_etag(request, current_user["user_id"], version)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    response.headers.update(etag_headers(etag))
+    categories = sorted(
+        await global_categories() + await user_categories(current_user["user_id"], version),
+        key=lambda c: c[1].casefold()
+    )
     return [
         CategoryResponse(id=c[0], name=c[1], color=c[2])
         for c in categories
     ]
 
 @app.post("/categories")
-def create_category(name: str, color: str = "#667eea", current_user: dict = Depends(get_current_user)):
+def create_category(name: str, color: str = "#667eea", current_user: dict = Depends(get_current_user), conn=Depends(get_conn)):
     """Create a new category"""
     cur = conn.cursor()
     try:
-        cur.execute(
-            "INSERT INTO categories (name, color, user_id) VALUES (%s, %s, %s)",
-            (name, color, current_user["user_id"])
-        )
+        category_id = CategoryRepository(cur).create(name, color, current_user["user_id"])
+        bump_version(cur, current_user["user_id"])
         conn.commit()
-        return {"message": "Category created", "id": cur.lastrowid}
+        read_cache.invalidate(("categories", current_user["user_id"]))
+        return {"message": "Category created", "id": category_id}
     except pymysql.IntegrityError:
         raise HTTPException(status_code=400, detail="Category already exists")
 
+# Working hours and fixed events (tasks are scheduled into the free time they leave)
+def parse_clock(value: str) -> time:
+    try:
+        return datetime.strptime(value, "%H:%M").time()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Times must be in HH:MM format")
+
+def parse_moment(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value).replace(second=0, microsecond=0, tzinfo=None)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Event times must be ISO dates with a time (YYYY-MM-DDTHH:MM)")
+
+def parse_day(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+
+def format_clock(value) -> str:
+    return to_time(to_minutes(value)).strftime("%H:%M")
+
+@app.get("/availability")
+def get_availability(current_user: dict = Depends(get_current_user), conn=Depends(get_conn)):
+    """Weekly working hours; none means one block a day from PLAN_DAY_START"""
+    windows = AvailabilityRepository(conn.cursor()).for_user(current_user["user_id"])
+    return [
+        {"weekday": w[0], "start": format_clock(w[1]), "end": format_clock(w[2])}
+        for w in windows
+    ]
+
+@app.put("/availability")
+def set_availability(update: AvailabilityUpdate, current_user: dict = Depends(get_current_user), conn=Depends(get_conn)):
+    """Replace weekly working hours and re-time upcoming planned days to fit them"""
+    windows = []
+    for window in update.windows:
+        if not 0 <= window.weekday <= 6:
+            raise HTTPException(status_code=400, detail="weekday must be 0 (Monday) to 6 (Sunday)")
+        start, end = parse_clock(window.start), parse_clock(window.end)
+        if start >= end:
+            raise HTTPException(status_code=400, detail="Each window must end after it starts")
+        windows.append((window.weekday, start, end))
+    
+    cur = conn.cursor()
+    conn.begin()
+    AvailabilityRepository(cur).replace(current_user["user_id"], windows)
+    replanned = retime_days(cur, current_user["user_id"], PLAN_DAILY_MINUTES, date.today(),
+                            calendar_for=user_calendar)
+    bump_version(cur, current_user["user_id"], plan_dates=replanned)
+    conn.commit()
+    return {"message": "Availability updated", "windows": len(windows),
+            "replanned_dates": [str(d) for d in replanned]}
+
+@app.get("/events")
+def get_events(start_date: str, end_date: str, current_user: dict = Depends(get_current_user), conn=Depends(get_conn)):
+    """Fixed events overlapping a date range"""
+    first, last = parse_day(start_date), parse_day(end_date)
+    events = EventRepository(conn.cursor()).between(current_user["user_id"], datetime.combine(first, time()),
+                                                    datetime.combine(last + timedelta(days=1), time()))
+    return [
+        {"id": e[0], "title": e[1], "start": e[2].isoformat(timespec="minutes"), "end": e[3].isoformat(timespec="minutes")}
+        for e in events
+    ]
+
+@app.post("/events")
+def create_event(event: EventCreate, current_user: dict = Depends(get_current_user), conn=Depends(get_conn)):
+    """Block time for a meeting or appointment and re-time the planned days it overlaps"""
+    start, end = parse_moment(event.start), parse_moment(event.end)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="An event must end after it starts")
+    
+    cur = conn.cursor()
+    conn.begin()
+    event_id = EventRepository(cur).create(current_user["user_id"], event.title, start, end)
+    replanned = retime_days(cur, current_user["user_id"], PLAN_DAILY_MINUTES, start.date(), end.date(),
+                            calendar_for=user_calendar)
+    bump_version(cur, current_user["user_id"], plan_dates=replanned)
+    conn.commit()
+    return {"message": "Event created", "id": event_id, "replanned_dates": [str(d) for d in replanned]}
+
+@app.delete("/events/{event_id}")
+def delete_event(event_id: int, current_user: dict = Depends(get_current_user), conn=Depends(get_conn)):
+    """Remove a fixed event; the freed time is used the next time the plan is generated"""
+    cur = conn.cursor()
+    if not EventRepository(cur).delete(event_id, current_user["user_id"]):
+        raise HTTPException(status_code=404, detail="Event not found")
+    bump_version(cur, current_user["user_id"])
+    conn.commit()
+    return {"message": "Event deleted"}
+
 # Calendar endpoints
 @app.get("/calendar")
-def get_calendar(start_date: str, end_date: str, current_user: dict = Depends(get_current_user)):
+async def get_calendar(
+    request: Request,
+    start_date: str,
+    end_date: str,
+    format: ResponseFormat = "json",
+    current_user: dict = Depends(get_current_user)
+):
     """Get calendar view with tasks for date range"""
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT 
-            d.plan_date,
-            t.id,
-            t.title,
-            t.duration_minutes,
-            t.priority,
-            t.deadline,
-            d.scheduled_time,
-            t.category,
-            t.status
-        FROM daily_plan d
-        JOIN tasks t ON t.id = d.task_id
-        WHERE d.plan_date BETWEEN %s AND %s AND d.user_id = %s
-        ORDER BY d.plan_date, d.task_order
-    """, (start_date, end_date, current_user["user_id"]))
-    
-    events = cur.fetchall()
+    params = (start_date, end_date, current_user["user_id"])
+    
+    etag = user_etag(request, current_user["user_id"], await user_version(current_user["user_id"]))
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    if format != "json":
+        # Same shape as the buffered response, or one {"date": ..., ...event} line per row
+        streamed = await stream_response(CALENDAR_SQL, params, format, {
+            "ndjson": lambda batches: ndjson_chunks(batches, lambda e: {"date": str(e[0]), **calendar_event(e)}),
+            "json": lambda batches: grouped_json_chunks(batches, lambda e: str(e[0]), calendar_event)
+        })
+        streamed.headers.update(etag_headers(etag))
+        return streamed
+    
+    events = await adb.fetchall(CALENDAR_SQL, params)
     calendar = {}
     
     for event in events:
         date_str = str(event[0])
         if date_str not in calendar:
             calendar[date_str] = []
-        
-        scheduled_time_str = None
-        if event[6]:
-            if isinstance(event[6], time):
-                scheduled_time_str = event[6].strftime("%H:%M")
-            else:
-                scheduled_time_str = str(event[6])
-        
-        calendar[date_str].append({
-            "task_id": event[1],
-            "title": event[2],
-            "duration_minutes": event[3],
-            "priority": event[4],
-            "deadline": str(event[5]),
-            "scheduled_time": scheduled_time_str,
-            "category": event[7],
-            "status": event[8]
-        })
+        calendar[date_str].append(calendar_event(event))
     
-    return calendar
+    return JSONResponse(calendar, headers=etag_headers(etag))
+
+# Export endpoint
+@app.get("/export")
+async def export(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    tables: Optional[str] = None,
+    scope: Literal["user", "all"] = "user",
+    user_id: Optional[int] = None,
+    compress: Optional[Literal["gzip"]] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Download your data (or, for admins, any user's or the whole database) as NDJSON or CSV"""
+    if current_user["role"] != "admin" and (scope == "all" or user_id not in (None, current_user["user_id"])):
+        raise HTTPException(status_code=403, detail="Not authorized")
+    try:
+        selected = export_data.parse_tables(tables)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if format == "csv" and len(selected) != 1:
+        raise HTTPException(status_code=400, detail="CSV exports one table at a time; pass tables=<name>")
+    
+    owner = None if scope == "all" else (user_id or current_user["user_id"])
+    batches = await asyncio.to_thread(export_data.open_export, pool, selected, owner)
+    name = export_data.filename("all" if owner is None else f"user{owner}", format, compress == "gzip")
+    return StreamingResponse(
+        export_data.encode(batches, format, compress == "gzip"),
+        media_type=export_data.MEDIA_TYPES["gzip" if compress else format],
+        headers={"Content-Disposition": f'attachment; filename="{name}"'}
+    )
 
 # Notifications endpoints
 @app.get("/notifications", response_model=List[NotificationResponse])
-def get_notifications(unread_only: bool = False, current_user: dict = Depends(get_current_user)):
+async def get_notifications(unread_only: bool = False, current_user: dict = Depends(get_current_user)):
     """Get notifications for current user"""
-    cur = conn.cursor()
+    notifications = await adb.fetchall(
+        UNREAD_NOTIFICATIONS_SQL if unread_only else NOTIFICATIONS_SQL,
+        (current_user["user_id"],)
+    )
     
-    if unread_only:
-        cur.execute("""
-            SELECT id, message, type, read_status, created_at
-            FROM notifications
-            WHERE user_id = %s AND read_status = FALSE
-            ORDER BY created_at DESC
-            LIMIT 50
-        """, (current_user["user_id"],))
-    else:
-        cur.execute("""
-            SELECT id, message, type, read_status, created_at
-            FROM notifications
-            WHERE user_id = %s
-            ORDER BY created_at DESC
-            LIMIT 50
-        """, (current_user["user_id"],))
-    
-    notifications = cur.fetchall()
     return [
         NotificationResponse(
             id=n[0],
@@ -569,29 +1166,109 @@ def get_notifications(unread_only: bool = False, current_user: dict = Depends(ge
         for n in notifications
     ]
 
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.get("/notifications/stream")
+async def stream_notifications(current_user: dict = Depends(get_current_user)):
+    """Server-Sent Events stream of new notifications for the current user"""
+    user_id = current_user["user_id"]
+    
+    async def events():
+        # Subscribe before counting so nothing created in between is missed
+        subscription = bus.subscribe(user_id)
+        try:
+            row = await adb.fetchone(UNREAD_COUNT_SQL, (user_id,))
+            yield sse_event("unread", {"count": row[0]})
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription[1].get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield sse_event("notification", message)
+        finally:
+            bus.unsubscribe(user_id, subscription)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.patch("/notifications/{notification_id}/read")
-def mark_notification_read(notification_id: int, current_user: dict = Depends(get_current_user)):
+def mark_notification_read(notification_id: int, current_user: dict = Depends(get_current_user), conn=Depends(get_conn)):
     """Mark a notification as read"""
-    cur = conn.cursor()
-    cur.execute("""
-        UPDATE notifications 
-        SET read_status = TRUE 
-        WHERE id = %s AND user_id = %s
-    """, (notification_id, current_user["user_id"]))
+    NotificationRepository(conn.cursor()).mark_read(notification_id, current_user["user_id"])
     conn.commit()
     return {"message": "Notification marked as read"}
 
 @app.delete("/notifications/{notification_id}")
-def delete_notification(notification_id: int, current_user: dict = Depends(get_current_user)):
+def delete_notification(notification_id: int, current_user: dict = Depends(get_current_user), conn=Depends(get_conn)):
     """Delete a notification"""
-    cur = conn.cursor()
-    cur.execute("""
-        DELETE FROM notifications 
-        WHERE id = %s AND user_id = %s
-    """, (notification_id, current_user["user_id"]))
+    NotificationRepository(conn.cursor()).delete(notification_id, current_user["user_id"])
     conn.commit()
     return {"message": "Notification deleted"}
 
+@app.get("/health/pool")
+def pool_stats():
+    """Connection pool usage (in use, idle, wait time) for sizing under load"""
+    stats = pool.stats()
+    stats["async_driver"] = "aiomysql" if adb.native else "thread"
+    stats["storage"] = storage.describe()
+    return stats
+
+@app.get("/health/notifications")
+def notification_stats():
+    """Write-behind queue depth and drop counters, plus open notification streams"""
+    stats = notification_queue.stats()
+    stats["streams"] = bus.subscriber_count()
+    return stats
+
+@app.get("/health/cache")
+def cache_stats():
+    """Read cache size and hit/miss counters"""
+    return read_cache.stats()
+
+metrics.add_stats("db_pool", pool.stats, counters=("checkouts", "waits", "timeouts", "reconnects", "discarded"),
+                  gauges=("size", "in_use", "idle", "max_size"))
+metrics.add_stats("notification_queue", notification_queue.stats,
+                  counters=("enqueued", "written", "dropped", "flushes", "failures"), gauges=("depth",))
+metrics.add_stats("read_cache", read_cache.stats, counters=("hits", "misses", "evictions", "invalidations"),
+                  gauges=("entries",))
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus metrics: per-route latency and queries per request, plus pool, queue and cache stats"""
+    # async so rendering happens on the event loop, the only writer of the request stats
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/debug/slow-queries")
+def recent_slow_queries(current_user: dict = Depends(get_current_user)):
+    """Recent queries over SLOW_QUERY_MS, newest first, with parameters redacted (admin only)"""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    stats = slow_queries.stats()
+    stats["queries"] = slow_queries.recent()
+    return stats
+
+@app.get("/debug/profiles")
+def list_profiles(current_user: dict = Depends(get_current_user)):
+    """Request profiles taken with ?profile=1, newest first (admin only)"""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return profiles.list()
+
+@app.get("/debug/profiles/{profile_id}")
+def get_profile(profile_id: str, current_user: dict = Depends(get_current_user)):
+    """One request's profile as collapsed stacks, ready for flamegraph.pl or speedscope (admin only)"""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    folded = profiles.get(profile_id)
+    if folded is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return Response(folded, media_type=FOLDED_CONTENT_TYPE)
+
 @app.get("/")
 def root():
     """API root endpoint"""
@@ -602,9 +1279,25 @@ def root():
             "POST /logout": "Logout",
             "GET /me": "Get current user",
             "POST /tasks": "Add a new task",
-            "GET /tasks": "Get all tasks",
+            "POST /tasks/bulk": "Import tasks from CSV or NDJSON",
+            "PATCH /tasks/bulk/complete": "Complete several tasks",
+            "PATCH /tasks/bulk/uncomplete": "Reopen several tasks",
+            "POST /tasks/bulk/delete": "Delete several tasks",
+            "GET /tasks": "Get tasks (filterable, cursor-paginated)",
+            "GET /tasks/changes": "Task and plan changes since a version",
             "POST /generate-plan": "Generate today's smart plan",
-            "GET /plan/today": "Get today's plan"
+            "GET /plan/today": "Get today's plan",
+            "GET /availability": "Get weekly working hours",
+            "PUT /availability": "Set weekly working hours",
+            "GET /events": "Get fixed events in a date range",
+            "POST /events": "Add a fixed event",
+            "GET /export": "Export your data as NDJSON or CSV",
+            "GET /health/pool": "Connection pool stats",
+            "GET /health/notifications": "Notification queue stats",
+            "GET /health/cache": "Read cache stats",
+            "GET /metrics": "Prometheus metrics",
+            "GET /debug/slow-queries": "Recent slow queries (admin)",
+            "GET /debug/profiles": "Request profiles taken with ?profile=1 (admin)"
         },
         "docs": "/docs"
     }
@@ -0,0 +1,94 @@
+"""
+Async data access for the hot read endpoints.
+
+With aiomysql installed, queries run on an asyncio connection pool so a
+single worker can keep hundreds of requests in flight without tying up
+Starlette's threadpool. Without it (or with DB_ASYNC_DRIVER=thread) the
+same calls are offloaded to the sync ConnectionPool on a dedicated
+thread limiter, so handlers can stay `async def` either way.
+"""
+
+import os
+import time
+
+import anyio
+
+try:
+    import aiomysql
+except ImportError:  # optional dependency
+    aiomysql = None
+
+
+class AsyncDatabase:
+    def __init__(self, sync_pool, settings, min_size=1, max_size=10, driver=None, on_query=None):
+        self.sync_pool = sync_pool
+        self.settings = settings
+        self.min_size = min_size
+        self.max_size = max_size
+        self.driver = driver or os.getenv("DB_ASYNC_DRIVER", "auto")
+        self._pool = None
+        # on_query(sql, params, seconds) for aiomysql queries; the threaded path goes through sync_pool
+        self.on_query = on_query
+        # Never run more offloaded queries than the sync pool can serve
+        self._limiter = anyio.CapacityLimiter(sync_pool.max_size)
+
+    @property
+    def native(self) -> bool:
+        """True when queries go through aiomysql rather than worker threads"""
+        return self._pool is not None
+
+    async def start(self):
+        if self.driver == "thread" or aiomysql is None:
+            return
+        try:
+            self._pool = await aiomysql.create_pool(
+                host=self.settings["host"],
+                port=self.settings["port"],
+                db=self.settings["database"],
+                user=self.settings["user"],
+                password=self.settings["password"],
+                connect_timeout=self.settings.get("connect_timeout", 10),
+                minsize=self.min_size,
+                maxsize=self.max_size,
+                # Reads only: autocommit keeps pooled connections from pinning an old snapshot
+                autocommit=True,
+                pool_recycle=300
+            )
+        except Exception:
+            # Fall back to the threaded path; errors surface per request instead
+            self._pool = None
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+    async def fetchall(self, sql, params=None):
+        if self._pool is None:
+            return await anyio.to_thread.run_sync(self._fetch_sync, sql, params, limiter=self._limiter)
+        async with self._pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                started = time.perf_counter()
+                try:
+                    await cur.execute(sql, params)
+                    return await cur.fetchall()
+                finally:
+                    if self.on_query is not None:
+                        self.on_query(sql, params, time.perf_counter() - started)
+
+    async def fetchone(self, sql, params=None):
+        rows = await self.fetchall(sql, params)
+        return rows[0] if rows else None
+
+    def _fetch_sync(self, sql, params):
+        conn = self.sync_pool.acquire()
+        try:
+            cur = conn.cursor()
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+        except BaseException:
+            self.sync_pool.release(conn, rollback=True)
+            raise
+        self.sync_pool.release(conn)
+        return rows
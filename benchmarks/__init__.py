@@ -0,0 +1 @@
+"""Benchmarks for the Smart Planner API (run with `python -m benchmarks.<name>`)."""
@@ -0,0 +1,116 @@
+"""
+Compare the sync (threadpool) and async read paths under concurrency.
+
+The sync path mirrors how Starlette runs `def` endpoints: a fixed pool of
+worker threads, each checking a connection out of the ConnectionPool.
+The async path runs the same query through AsyncDatabase from a single
+event loop. Both talk to the database configured via DB_* env vars.
+
+    python -m benchmarks.async_vs_sync --requests 2000 --concurrency 400
+    python -m benchmarks.async_vs_sync --query sleep --sleep-ms 20
+
+`--query sleep` issues `SELECT SLEEP(x)` to emulate a remote database's
+round-trip time without needing seeded data.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from api import get_db_connection, get_db_settings
+from async_db import AsyncDatabase
+from db_pool import ConnectionPool
+from repositories import TASK_COLUMNS
+
+# Starlette's default threadpool size (anyio's default CapacityLimiter)
+STARLETTE_THREADS = 40
+
+
+def build_query(args):
+    if args.query == "sleep":
+        return "SELECT SLEEP(%s)", (args.sleep_ms / 1000.0,)
+    return f"SELECT {TASK_COLUMNS} FROM tasks WHERE user_id = %s", (args.user_id,)
+
+
+def summarize(name, latencies, elapsed):
+    latencies = sorted(latencies)
+    q = statistics.quantiles(latencies, n=100)
+    return {
+        "path": name,
+        "requests": len(latencies),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(q[49] * 1000, 2),
+        "p95_ms": round(q[94] * 1000, 2),
+        "p99_ms": round(q[98] * 1000, 2),
+    }
+
+
+def run_sync(args, sql, params):
+    pool = ConnectionPool(get_db_connection, min_size=1, max_size=args.pool_size, timeout=60)
+    pool.warm()
+
+    def one_request(_):
+        start = time.perf_counter()
+        conn = pool.acquire()
+        try:
+            cur = conn.cursor()
+            cur.execute(sql, params)
+            cur.fetchall()
+        finally:
+            pool.release(conn)
+        return time.perf_counter() - start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=STARLETTE_THREADS) as executor:
+        latencies = list(executor.map(one_request, range(args.requests)))
+    elapsed = time.perf_counter() - started
+    pool.close()
+    return summarize("sync", latencies, elapsed)
+
+
+async def run_async(args, sql, params):
+    pool = ConnectionPool(get_db_connection, min_size=1, max_size=args.pool_size, timeout=60)
+    adb = AsyncDatabase(pool, get_db_settings(), min_size=1, max_size=args.pool_size)
+    await adb.start()
+    driver = "aiomysql" if adb.native else "thread"
+    gate = asyncio.Semaphore(args.concurrency)
+
+    async def one_request():
+        async with gate:
+            start = time.perf_counter()
+            await adb.fetchall(sql, params)
+            return time.perf_counter() - start
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(one_request() for _ in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    await adb.close()
+    pool.close()
+    result = summarize("async", latencies, elapsed)
+    result["driver"] = driver
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200, help="in-flight requests on the async path")
+    parser.add_argument("--pool-size", type=int, default=100,
+                        help="database connections per path (above 40 the sync path is thread-bound)")
+    parser.add_argument("--query", choices=["tasks", "sleep"], default="tasks")
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--sleep-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    sql, params = build_query(args)
+    results = [run_sync(args, sql, params), asyncio.run(run_async(args, sql, params))]
+    results.append({"speedup": round(results[1]["throughput_rps"] / results[0]["throughput_rps"], 2)})
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Solve time of the optimal day packer at 100, 1k and 10k candidate tasks.
+
+"quarter-hours" uses 15-minute multiples (what the UI produces in
+practice); "any-minute" uses arbitrary 1-300 minute durations, the worst
+case for the DP since no common divisor shrinks the budget.
+
+    python -m benchmarks.knapsack
+    python -m benchmarks.knapsack --candidates 100 1000 10000 --budget 480
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from planning_engine import Task, plan_tasks, solve_knapsack, task_value
+
+DURATIONS = {
+    "quarter-hours": lambda rng: rng.choice(range(15, 181, 15)),
+    "any-minute": lambda rng: rng.randint(1, 300),
+}
+
+
+def candidates(count, kind, seed=7):
+    rng = random.Random(seed)
+    today = date.today()
+    return [
+        Task(i, today + timedelta(days=rng.randint(-3, 60)), DURATIONS[kind](rng), rng.randint(1, 5), f"Task {i}")
+        for i in range(count)
+    ]
+
+
+def bench(count, kind, budget, repeat):
+    today = date.today()
+    tasks = candidates(count, kind)
+    items = [(t.duration, task_value(t, today)) for t in tasks]
+    solve, greedy = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        picked = solve_knapsack(items, budget)
+        solve.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        plan_tasks(tasks, today, 1, daily_minutes=budget)
+        greedy.append(time.perf_counter() - started)
+
+    greedy_day = plan_tasks(tasks, today, 1, daily_minutes=budget)[0]
+    by_id = {t.id: t for t in tasks}
+    greedy_value = sum(task_value(by_id[p.task_id], today) for p in greedy_day.tasks)
+    return {
+        "candidates": count,
+        "durations": kind,
+        "budget_minutes": budget,
+        "optimal_median_ms": round(statistics.median(solve) * 1000, 2),
+        "greedy_median_ms": round(statistics.median(greedy) * 1000, 2),
+        "optimal_value": round(sum(items[i][1] for i in picked), 1),
+        "greedy_value": round(greedy_value, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--budget", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = [bench(n, kind, args.budget, args.repeat) for kind in DURATIONS for n in args.candidates]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
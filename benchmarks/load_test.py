@@ -0,0 +1,413 @@
+"""
+Drive the API with concurrent simulated users and report latency per endpoint.
+
+Each simulated client logs in as one seeded user and replays what the
+frontend does: index.html's page load (/me, then categories, today's plan
+and notifications together), its 30-second unread poll, adding and
+completing tasks, generating a plan and reading notifications, plus
+calendar.html's month view. Scenarios are picked at random by weight.
+
+Requests go straight into `api:app` over ASGI, with the app's own
+lifespan (pool, caches, notification queue) running, so no server or
+HTTP client is involved. By default the database is a throwaway file on
+the embedded SQLite backend (DB_BACKEND=sqlite, counted through
+benchmarks.standin), seeded fresh for every run, so the suite runs
+offline; `--database mysql` uses the DB_* database instead (seed it
+first with benchmarks.seed).
+
+    python -m benchmarks.load_test                                  # 30s, 20 clients, offline
+    python -m benchmarks.load_test --clients 50 --users 50 --tasks-per-user 500
+    python -m benchmarks.load_test --save benchmarks/baseline.json
+    python -m benchmarks.load_test --compare benchmarks/baseline.json --threshold 20
+
+Per endpoint it reports requests, errors, throughput, p50/p95/p99 latency
+and, on the stand-in, database queries and database time per request.
+`--compare` exits with status 1 when an endpoint's p95 or throughput is
+worse than the baseline by more than the threshold, or it runs more
+queries per request than before.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode
+
+from benchmarks import seed as seeding
+from benchmarks import standin
+
+# Weighted scenarios: (name, weight)
+SCENARIOS = [
+    ("index_load", 40),
+    ("poll_unread", 15),
+    ("add_task", 10),
+    ("complete_task", 10),
+    ("generate_plan", 5),
+    ("mark_read", 5),
+    ("calendar", 10),
+    ("list_tasks", 5),
+]
+
+
+class ASGIClient:
+    """Just enough of an HTTP client to call an ASGI app in-process"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method, path, params=None, json_body=None, cookies=None):
+        body = json.dumps(json_body).encode() if json_body is not None else b""
+        headers = [(b"host", b"loadtest")]
+        if json_body is not None:
+            headers.append((b"content-type", b"application/json"))
+        headers.append((b"content-length", str(len(body)).encode()))
+        if cookies:
+            headers.append((b"cookie", "; ".join(f"{k}={v}" for k, v in cookies.items()).encode()))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": urlencode(params or {}).encode(),
+            "root_path": "",
+            "headers": headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("loadtest", 80),
+        }
+        sent = False
+        status = None
+        chunks = []
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await asyncio.Event().wait()  # the client never disconnects
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return status, b"".join(chunks)
+
+
+class Recorder:
+    """Latency, errors and query counts per endpoint label"""
+
+    def __init__(self):
+        self.samples = {}
+        self.recording = False
+
+    def add(self, label, seconds, ok, queries, db_seconds):
+        if not self.recording:
+            return
+        entry = self.samples.setdefault(label, {"latencies": [], "errors": 0, "queries": 0, "db_seconds": 0.0})
+        entry["latencies"].append(seconds)
+        entry["errors"] += 0 if ok else 1
+        entry["queries"] += queries
+        entry["db_seconds"] += db_seconds
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class SimulatedUser:
+    def __init__(self, client, recorder, username, password, rng, count_queries):
+        self.client = client
+        self.recorder = recorder
+        self.username = username
+        self.password = password
+        self.rng = rng
+        self.count_queries = count_queries
+        self.cookies = {}
+
+    async def call(self, label, method, path, params=None, json_body=None, expect=(200,)):
+        tally = standin.track_queries() if self.count_queries else None
+        started = time.perf_counter()
+        try:
+            status, body = await self.client.request(method, path, params, json_body, self.cookies)
+        except Exception:
+            status, body = None, b""
+        elapsed = time.perf_counter() - started
+        ok = status in expect
+        self.recorder.add(label, elapsed, ok, tally.queries if tally else 0, tally.seconds if tally else 0.0)
+        if not ok:
+            return None
+        return json.loads(body) if body else None
+
+    async def login(self):
+        result = await self.call("POST /login", "POST", "/login",
+                                 json_body={"username": self.username, "password": self.password})
+        if not result:
+            raise RuntimeError(f"Login failed for {self.username}")
+        self.cookies["session_token"] = result["session_token"]
+
+    # Scenarios
+
+    async def index_load(self):
+        if await self.call("GET /me", "GET", "/me") is None:
+            return
+        await asyncio.gather(
+            self.call("GET /categories", "GET", "/categories"),
+            self.call("GET /plan/today", "GET", "/plan/today"),
+            self.call("GET /notifications", "GET", "/notifications"),
+        )
+
+    async def poll_unread(self):
+        await self.call("GET /notifications?unread_only", "GET", "/notifications", {"unread_only": "true"})
+
+    async def add_task(self):
+        rng = self.rng
+        await self.call("POST /tasks", "POST", "/tasks", json_body={
+            "title": f"Load test task {rng.randrange(1_000_000)}",
+            "deadline": (date.today() + timedelta(days=rng.randint(1, 30))).isoformat(),
+            "duration": rng.choice(range(15, 121, 15)),
+            "priority": rng.randint(1, 5),
+            "category": rng.choice(seeding.CATEGORIES),
+        })
+        await self.call("GET /notifications?unread_only", "GET", "/notifications", {"unread_only": "true"})
+
+    async def complete_task(self):
+        plan = await self.call("GET /plan/today", "GET", "/plan/today")
+        pending = [item["task_id"] for item in plan or [] if item.get("status") != "completed"]
+        if not pending:
+            return
+        await self.call("PATCH /tasks/{id}/complete", "PATCH", f"/tasks/{self.rng.choice(pending)}/complete")
+        await self.call("GET /plan/today", "GET", "/plan/today")
+
+    async def generate_plan(self):
+        await self.call("POST /generate-plan", "POST", "/generate-plan",
+                        {"days": 7, "mode": self.rng.choice(["greedy", "optimal"])})
+        await self.call("GET /plan/today", "GET", "/plan/today")
+
+    async def mark_read(self):
+        unread = await self.call("GET /notifications?unread_only", "GET", "/notifications", {"unread_only": "true"})
+        if not unread:
+            return
+        await self.call("PATCH /notifications/{id}/read", "PATCH", f"/notifications/{unread[0]['id']}/read")
+
+    async def calendar(self):
+        if await self.call("GET /me", "GET", "/me") is None:
+            return
+        today = date.today()
+        start = today.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        await self.call("GET /calendar", "GET", "/calendar",
+                        {"start_date": start.isoformat(), "end_date": end.isoformat()})
+
+    async def list_tasks(self):
+        await self.call("GET /tasks", "GET", "/tasks")
+
+    async def run(self, stop_at, think_ms):
+        names = [name for name, _ in SCENARIOS]
+        weights = [weight for _, weight in SCENARIOS]
+        while time.monotonic() < stop_at:
+            await getattr(self, self.rng.choices(names, weights)[0])()
+            if think_ms:
+                await asyncio.sleep(self.rng.uniform(0, 2 * think_ms) / 1000)
+
+
+def summarize(recorder, elapsed, background_queries):
+    endpoints = {}
+    for label in sorted(recorder.samples):
+        entry = recorder.samples[label]
+        latencies = sorted(entry["latencies"])
+        count = len(latencies)
+        endpoints[label] = {
+            "requests": count,
+            "errors": entry["errors"],
+            "throughput_rps": round(count / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "queries_per_request": round(entry["queries"] / count, 2),
+            "db_ms_per_request": round(entry["db_seconds"] * 1000 / count, 3),
+        }
+    total = sum(e["requests"] for e in endpoints.values())
+    return {
+        "total": {
+            "requests": total,
+            "errors": sum(e["errors"] for e in endpoints.values()),
+            "throughput_rps": round(total / elapsed, 1),
+            "background_queries": background_queries,
+        },
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report):
+    header = f"{'endpoint':34} {'reqs':>7} {'err':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'q/req':>6} {'db ms':>7}"
+    print(header)
+    print("-" * len(header))
+    for label, e in report["endpoints"].items():
+        print(f"{label:34} {e['requests']:>7} {e['errors']:>5} {e['throughput_rps']:>8} {e['p50_ms']:>8} "
+              f"{e['p95_ms']:>8} {e['p99_ms']:>8} {e['queries_per_request']:>6} {e['db_ms_per_request']:>7}")
+    t = report["total"]
+    print("-" * len(header))
+    print(f"{'total':34} {t['requests']:>7} {t['errors']:>5} {t['throughput_rps']:>8}"
+          f"   (background queries: {t['background_queries']})")
+
+
+def compare(report, baseline, threshold_pct):
+    """Regressions of report against a saved baseline, as printable lines"""
+    regressions = []
+    for label, old in baseline["endpoints"].items():
+        new = report["endpoints"].get(label)
+        if new is None:
+            continue
+        if old["p95_ms"] and new["p95_ms"] > old["p95_ms"] * (1 + threshold_pct / 100):
+            regressions.append(f"{label}: p95 {old['p95_ms']} ms -> {new['p95_ms']} ms")
+        if old["throughput_rps"] and new["throughput_rps"] < old["throughput_rps"] * (1 - threshold_pct / 100):
+            regressions.append(f"{label}: throughput {old['throughput_rps']} -> {new['throughput_rps']} req/s")
+        # Query counts are deterministic, so any increase is a real change
+        if new["queries_per_request"] > old["queries_per_request"] + 0.5:
+            regressions.append(f"{label}: queries/request {old['queries_per_request']} -> {new['queries_per_request']}")
+    return regressions
+
+
+def metadata(args):
+    return {
+        "created_at": datetime.now().replace(microsecond=0).isoformat(),
+        "database": args.database,
+        "clients": args.clients,
+        "duration_s": args.duration,
+        "warmup_s": args.warmup,
+        "think_ms": args.think_ms,
+        "users": args.users,
+        "tasks_per_user": args.tasks_per_user,
+        "notifications_per_user": args.notifications_per_user,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+async def run(args, usernames, password):
+    import api
+
+    recorder = Recorder()
+    client = ASGIClient(api.app)
+    rng = random.Random(args.seed)
+    count_queries = args.database == "standin"
+
+    async with api.app.router.lifespan_context(api.app):
+        users = [
+            SimulatedUser(client, recorder, usernames[i % len(usernames)], password, random.Random(rng.random()),
+                          count_queries)
+            for i in range(args.clients)
+        ]
+        await asyncio.gather(*(user.login() for user in users))
+
+        warmup_until = time.monotonic() + args.warmup
+        stop_at = warmup_until + args.duration
+
+        async def start_recording():
+            await asyncio.sleep(args.warmup)
+            recorder.recording = True
+            return standin.totals.background
+
+        runs = asyncio.gather(*(user.run(stop_at, args.think_ms) for user in users))
+        background_before = await start_recording()
+        started = time.perf_counter()
+        await runs
+        elapsed = time.perf_counter() - started
+        background_after = standin.totals.background
+
+    background = background_after - background_before if count_queries else None
+    return summarize(recorder, elapsed, background)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", choices=["standin", "mysql"], default="standin")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds measured")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds run before measuring")
+    parser.add_argument("--clients", type=int, default=20, help="concurrent simulated users")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause between a client's scenarios")
+    seeding.add_arguments(parser)
+    parser.add_argument("--save", metavar="FILE", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="diff against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=20.0,
+                        help="percent change in p95 or throughput counted as a regression")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON instead of a table")
+    args = parser.parse_args()
+
+    workdir = None
+    if args.database == "standin":
+        # The embedded SQLite backend, on a throwaway file, with every query counted
+        workdir = tempfile.mkdtemp(prefix="smartplanner-load-")
+        path = os.path.join(workdir, "bench.sqlite")
+        os.environ["DB_BACKEND"] = "sqlite"
+        os.environ["SQLITE_PATH"] = path
+        connect = lambda: standin.connect(path)  # noqa: E731
+    else:
+        from api import get_db_connection
+        connect = get_db_connection
+
+    try:
+        import api
+        if args.database == "standin":
+            api.storage.connect = connect
+
+        conn = connect()
+        try:
+            started = time.perf_counter()
+            seeded = seeding.seed(conn, args.users, args.tasks_per_user, args.plan_days, args.notifications_per_user,
+                                  seed_value=args.seed)
+            print(f"Seeded {seeded['users']} users, {seeded['tasks']} tasks, {seeded['plan_rows']} plan rows and "
+                  f"{seeded['notifications']} notifications in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        finally:
+            conn.close()
+
+        print(f"Running {args.clients} clients for {args.duration:g}s (+{args.warmup:g}s warm-up) "
+              f"against {args.database}...", file=sys.stderr)
+        report = asyncio.run(run(args, seeded["usernames"], seeded["password"]))
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {"meta": metadata(args), **report}
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Baseline saved to {args.save}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) against {args.compare}:", file=sys.stderr)
+            for line in regressions:
+                print(f"   {line}", file=sys.stderr)
+            return 1
+        print(f"✅ No regressions against {args.compare} (threshold {args.threshold:g}%)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
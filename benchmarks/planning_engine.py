@@ -0,0 +1,62 @@
+"""
+Time the planning engine on synthetic backlogs (no database needed).
+
+    python -m benchmarks.planning_engine
+    python -m benchmarks.planning_engine --tasks 10000 --days 90 --repeat 5
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from planning_engine import Task, plan_tasks
+
+
+def synthetic_tasks(count, start_date, seed=42):
+    rng = random.Random(seed)
+    return [
+        Task(
+            id=i + 1,
+            deadline=start_date + timedelta(days=rng.randint(-5, 120)),
+            duration=rng.choice([15, 30, 45, 60, 90, 120, 180]),
+            priority=rng.randint(1, 5),
+            title=f"Task {i + 1}"
+        )
+        for i in range(count)
+    ]
+
+
+def bench(task_count, days, repeat):
+    start_date = date.today()
+    tasks = synthetic_tasks(task_count, start_date)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        plans = plan_tasks(tasks, start_date, days)
+        timings.append(time.perf_counter() - started)
+    placed = sum(len(day.tasks) for day in plans)
+    return {
+        "tasks": task_count,
+        "days": days,
+        "placed": placed,
+        "best_ms": round(min(timings) * 1000, 2),
+        "median_ms": round(statistics.median(timings) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--days", type=int, nargs="+", default=[1, 30, 90])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = [bench(n, d, args.repeat) for n in args.tasks for d in args.days]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Time ranking and scoring a backlog: per-task tuples vs columns (no database needed).
+
+    python -m benchmarks.scoring
+    python -m benchmarks.scoring --tasks 10000 1000000 --repeat 3
+
+"tuples" is the per-task path (sorted() on rank_key, task_value per task),
+"python" the columnar fallback, "numpy" the vectorized columns (skipped
+when NumPy is not installed). Each stage is timed separately; "total"
+includes building the columns, and speedup is against tuples.
+"""
+
+import argparse
+import json
+import statistics
+import time
+from datetime import date
+
+import scoring
+from benchmarks.planning_engine import synthetic_tasks
+from planning_engine import rank_key, task_value
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return result, statistics.median(timings) * 1000
+
+
+def bench_tuples(tasks, today, repeat):
+    ranked, rank_ms = timed(lambda: sorted(tasks, key=lambda t: rank_key(t, today)), repeat)
+    _, score_ms = timed(lambda: [task_value(t, today) for t in tasks], repeat)
+    return [t.id for t in ranked], {"rank_ms": rank_ms, "score_ms": score_ms, "total_ms": rank_ms + score_ms}
+
+
+def bench_columns(tasks, today, repeat, vectorized):
+    columns, build_ms = timed(lambda: scoring.TaskColumns.from_tasks(tasks, vectorized=vectorized), repeat)
+    order, rank_ms = timed(lambda: scoring.rank(columns, today), repeat)
+    _, score_ms = timed(lambda: scoring.scores(columns, today), repeat)
+    return [tasks[i].id for i in order], {"build_ms": build_ms, "rank_ms": rank_ms, "score_ms": score_ms,
+                                          "total_ms": build_ms + rank_ms + score_ms}
+
+
+def bench(task_count, repeat):
+    today = date.today()
+    tasks = synthetic_tasks(task_count, today)
+    expected, baseline = bench_tuples(tasks, today, repeat)
+    results = {"tuples": baseline}
+    paths = [("python", False)] + ([("numpy", True)] if scoring.numpy is not None else [])
+    for name, vectorized in paths:
+        ranked, stats = bench_columns(tasks, today, repeat, vectorized)
+        if ranked != expected:
+            raise AssertionError(f"{name} ranking differs from rank_key at {task_count} tasks")
+        stats["speedup"] = baseline["total_ms"] / stats["total_ms"]
+        results[name] = stats
+    return {
+        "tasks": task_count,
+        "numpy_version": scoring.numpy.__version__ if scoring.numpy is not None else None,
+        **{path: {k: round(v, 2) for k, v in stats.items()} for path, stats in results.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, nargs="+", default=[10000, 1000000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = [bench(n, args.repeat) for n in args.tasks]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Seed synthetic users, tasks, plans and notifications for load testing.
+
+Users are named bench_0, bench_1, ... and share one password. Re-seeding
+deletes the previous bench_* users first (their data cascades), so real
+accounts are never touched. Plans for the next few days are laid out
+with the planning engine, exactly as /generate-plan would.
+
+    python -m benchmarks.seed --users 50 --tasks-per-user 500     # the DB_* database
+    python -m benchmarks.load_test                                # seeds its own stand-in
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+
+from planning_engine import plan_tasks
+
+DEFAULT_PASSWORD = "bench"
+USERNAME_PREFIX = "bench_"
+
+CATEGORIES = ["General", "School", "Work", "Personal", "Health", "Shopping"]
+MESSAGES = [
+    ("New task '{}' added", "info"),
+    ("Task '{}' marked as completed! 🎉", "success"),
+    ("Generated plan with {} tasks scheduled!", "success"),
+]
+
+
+def _hash(password):
+    from api import hash_password
+    return hash_password(password)
+
+
+def seed(conn, users: int = 20, tasks_per_user: int = 200, plan_days: int = 7, notifications_per_user: int = 50,
+         password: str = DEFAULT_PASSWORD, seed_value: int = 7, chunk: int = 1000):
+    """Insert the synthetic data set on a DB-API connection (%s placeholders); returns what was created"""
+    rng = random.Random(seed_value)
+    today = date.today()
+    cur = conn.cursor()
+    usernames = [f"{USERNAME_PREFIX}{i}" for i in range(users)]
+
+    # Drop the previous run's users; tasks, plans and notifications cascade
+    for start in range(0, len(usernames), chunk):
+        names = usernames[start:start + chunk]
+        cur.execute(f"DELETE FROM users WHERE username IN ({', '.join(['%s'] * len(names))})", names)
+
+    password_hash = _hash(password)
+    user_ids = []
+    for username in usernames:
+        cur.execute("INSERT INTO users (username, password_hash, role) VALUES (%s, %s, %s)",
+                    (username, password_hash, "user"))
+        user_ids.append(cur.lastrowid)
+
+    tasks_created = plan_rows_created = 0
+    for user_id in user_ids:
+        rows = []
+        for n in range(tasks_per_user):
+            completed = rng.random() < 0.1
+            rows.append((
+                f"Task {n} for user {user_id}",
+                today + timedelta(days=rng.randint(-3, 60)),
+                rng.choice(range(15, 181, 15)),
+                rng.randint(1, 5),
+                user_id,
+                rng.choice(CATEGORIES),
+                "completed" if completed else "pending",
+            ))
+        for start in range(0, len(rows), chunk):
+            cur.executemany(
+                "INSERT INTO tasks (title, deadline, duration_minutes, priority, user_id, category, status) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                rows[start:start + chunk]
+            )
+        tasks_created += len(rows)
+
+        cur.execute(
+            "SELECT id, deadline, duration_minutes, priority, title FROM tasks WHERE status = 'pending' AND user_id = %s",
+            (user_id,)
+        )
+        plan_rows = [
+            (item.task_id, day.date, item.order, user_id, item.scheduled_time)
+            for day in plan_tasks(cur.fetchall(), today, plan_days)
+            for item in day.tasks
+        ]
+        if plan_rows:
+            cur.executemany(
+                "INSERT INTO daily_plan (task_id, plan_date, task_order, user_id, scheduled_time) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                plan_rows
+            )
+        plan_rows_created += len(plan_rows)
+
+        notifications = []
+        for n in range(notifications_per_user):
+            template, kind = rng.choice(MESSAGES)
+            notifications.append((user_id, template.format(n), kind, rng.random() < 0.7))
+        if notifications:
+            cur.executemany(
+                "INSERT INTO notifications (user_id, message, type, read_status) VALUES (%s, %s, %s, %s)",
+                notifications
+            )
+        conn.commit()
+
+    return {
+        "users": len(user_ids),
+        "user_ids": user_ids,
+        "usernames": usernames,
+        "password": password,
+        "tasks": tasks_created,
+        "plan_rows": plan_rows_created,
+        "notifications": notifications_per_user * len(user_ids),
+    }
+
+
+def add_arguments(parser):
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--tasks-per-user", type=int, default=200)
+    parser.add_argument("--plan-days", type=int, default=7)
+    parser.add_argument("--notifications-per-user", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7, help="random seed, for repeatable data sets")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    from api import get_db_connection
+    conn = get_db_connection()
+    started = time.perf_counter()
+    try:
+        result = seed(conn, args.users, args.tasks_per_user, args.plan_days, args.notifications_per_user,
+                      seed_value=args.seed)
+    finally:
+        conn.close()
+    result.pop("user_ids")
+    result.pop("usernames")
+    result["elapsed_s"] = round(time.perf_counter() - started, 3)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Time the slot allocator over long horizons with many fixed events (no database needed).
+
+    python -m benchmarks.slots
+    python -m benchmarks.slots --days 365 --events 0 1000 10000 --tasks 5000
+
+Each run plans a synthetic backlog across the horizon with plan_tasks,
+inside weekday working hours (09:00-12:00, 13:00-17:30) and around
+randomly placed events, and reports the time per placed task next to the
+default single-block day as a baseline.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.planning_engine import synthetic_tasks
+from planning_engine import plan_tasks
+from slots import WorkCalendar
+
+WINDOWS = [(9 * 60, 12 * 60), (13 * 60, 17 * 60 + 30)]
+
+
+def synthetic_events(count, start_date, days, seed=7):
+    rng = random.Random(seed)
+    events = []
+    for _ in range(count):
+        start = datetime.combine(start_date + timedelta(days=rng.randrange(days)), datetime.min.time()) \
+            + timedelta(minutes=rng.randrange(8 * 60, 18 * 60, 15))
+        events.append((start, start + timedelta(minutes=rng.choice([15, 30, 60, 90]))))
+    return events
+
+
+def bench(task_count, days, event_count, placement, repeat):
+    start_date = date.today()
+    tasks = synthetic_tasks(task_count, start_date)
+    if event_count is None:
+        calendar = None
+    else:
+        calendar = WorkCalendar({weekday: WINDOWS for weekday in range(5)},
+                                synthetic_events(event_count, start_date, days), placement=placement)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        plans = plan_tasks(tasks, start_date, days, daily_minutes=390, calendar=calendar)
+        timings.append(time.perf_counter() - started)
+    placed = sum(len(day.tasks) for day in plans)
+    best = min(timings)
+    return {
+        "tasks": task_count,
+        "days": days,
+        "events": event_count if event_count is not None else "default day",
+        "placement": placement if calendar is not None else None,
+        "placed": placed,
+        "best_ms": round(best * 1000, 2),
+        "median_ms": round(statistics.median(timings) * 1000, 2),
+        "us_per_placed_task": round(best * 1e6 / max(placed, 1), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--days", type=int, nargs="+", default=[30, 365])
+    parser.add_argument("--events", type=int, nargs="+", default=[0, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = []
+    for days in args.days:
+        results.append(bench(args.tasks, days, None, None, args.repeat))
+        for events in args.events:
+            for placement in ("earliest", "best"):
+                results.append(bench(args.tasks, days, events, placement, args.repeat))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
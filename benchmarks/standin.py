@@ -0,0 +1,87 @@
+"""
+Local database stand-in for running the API without a MySQL server.
+
+`connect(path)` opens the embedded SQLite backend (sqlite_db, the same
+one DB_BACKEND=sqlite uses) with every statement counted and timed.
+`track_queries()` starts a per-request tally that follows the request
+into threadpool workers (contextvars are copied across), so a load test
+can report queries per endpoint.
+
+This is a benchmarking aid: timings are those of an in-process database
+with no network hop, so compare runs against each other rather than
+against production.
+"""
+
+import contextvars
+import threading
+import time
+
+import sqlite_db
+
+_request_tally = contextvars.ContextVar("standin_request_tally", default=None)
+
+
+class QueryTally:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+class _Totals:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.seconds = 0.0
+        self.background = 0  # outside any tracked request
+
+
+totals = _Totals()
+
+
+def track_queries() -> QueryTally:
+    """Start counting the statements run on behalf of the current request (context)"""
+    tally = QueryTally()
+    _request_tally.set(tally)
+    return tally
+
+
+def _record(elapsed: float):
+    tally = _request_tally.get()
+    if tally is not None:
+        tally.queries += 1
+        tally.seconds += elapsed
+    with totals.lock:
+        totals.queries += 1
+        totals.seconds += elapsed
+        if tally is None:
+            totals.background += 1
+
+
+class CountingCursor(sqlite_db.Cursor):
+    def execute(self, sql, params=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            _record(time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_params):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_params)
+        finally:
+            _record(time.perf_counter() - started)
+
+
+class CountingConnection(sqlite_db.Connection):
+    cursor_class = CountingCursor
+
+
+def create_database(path: str):
+    sqlite_db.create_database(path)
+
+
+def connect(path: str) -> CountingConnection:
+    return sqlite_db.connect(path, connection_class=CountingConnection)
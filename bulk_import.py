@@ -0,0 +1,142 @@
+"""
+Incremental parsing and validation for POST /tasks/bulk.
+
+The request body is consumed chunk by chunk: bytes are decoded into
+lines, lines into records (CSV with a header row, or one JSON object per
+line), and each record is validated into an insert row on its own. Only
+the current line is ever held, so a 100k-row upload costs the same memory
+as a ten-row one.
+
+Records are numbered from 1 in the order they appear (the CSV header is
+not counted), which is how per-row errors refer to them.
+"""
+
+import codecs
+import csv
+import json
+from datetime import date
+
+FORMATS = ("csv", "ndjson")
+
+MAX_RECORD_LENGTH = 1024 * 1024  # a longer line means the body is not what it claims to be
+MAX_CATEGORY_LENGTH = 50
+DEFAULT_CATEGORY = "General"
+
+# Task field ranges, shared with POST /tasks (api.TaskCreate)
+MAX_DURATION_MINUTES = 24 * 60
+MIN_PRIORITY = 1
+MAX_PRIORITY = 5
+
+
+class RowError(ValueError):
+    """A record that cannot become a task; the import carries on without it"""
+
+
+class MalformedBody(ValueError):
+    """The body cannot be read as records at all; the import is abandoned"""
+
+
+def detect_format(content_type: str):
+    """csv or ndjson from a Content-Type header, or None if it says neither"""
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+async def iter_lines(chunks):
+    """Lines (with their newline) from an async iterator of UTF-8 byte chunks"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    async for chunk in chunks:
+        lines = (tail + decoder.decode(chunk)).split("\n")
+        tail = lines.pop()
+        if len(tail) > MAX_RECORD_LENGTH:
+            raise MalformedBody(f"line longer than {MAX_RECORD_LENGTH} characters")
+        for line in lines:
+            yield line + "\n"
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def csv_records(lines):
+    """(row number, dict or RowError) per CSV record; quoted fields may span lines"""
+    header = None
+    pending = ""
+    row_number = 0
+    async for line in lines:
+        pending += line
+        if pending.count('"') % 2:
+            if len(pending) > MAX_RECORD_LENGTH:
+                raise MalformedBody(f"unterminated quoted field starting at row {row_number + 1}")
+            continue  # the newline sits inside a quoted field
+        record, pending = pending, ""
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip().lower() for name in values]
+            continue
+        row_number += 1
+        if len(values) != len(header):
+            yield row_number, RowError(f"expected {len(header)} fields, got {len(values)}")
+            continue
+        yield row_number, dict(zip(header, values))
+    if pending.strip():
+        yield row_number + 1, RowError("unterminated quoted field")
+
+
+async def ndjson_records(lines):
+    """(row number, dict or RowError) per non-blank line of JSON"""
+    row_number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row_number, RowError(f"invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield row_number, RowError("expected a JSON object")
+            continue
+        yield row_number, record
+
+
+def task_row(record: dict, user_id: int):
+    """Validate one record into (title, deadline, duration_minutes, priority, user_id, category)"""
+    title = str(record.get("title") or "").strip()
+    if not title:
+        raise RowError("title is required")
+
+    try:
+        deadline = date.fromisoformat(str(record.get("deadline") or "").strip())
+    except ValueError:
+        raise RowError("deadline must be a YYYY-MM-DD date")
+
+    # Same field names as POST /tasks, plus the column name used by exports
+    duration = _int_field(record, "duration", record.get("duration_minutes"))
+    if not 0 < duration <= MAX_DURATION_MINUTES:
+        raise RowError(f"duration must be between 1 and {MAX_DURATION_MINUTES} minutes")
+    priority = _int_field(record, "priority")
+    if not MIN_PRIORITY <= priority <= MAX_PRIORITY:
+        raise RowError(f"priority must be between {MIN_PRIORITY} and {MAX_PRIORITY}")
+
+    category = str(record.get("category") or DEFAULT_CATEGORY).strip()
+    if len(category) > MAX_CATEGORY_LENGTH:
+        raise RowError(f"category is longer than {MAX_CATEGORY_LENGTH} characters")
+    return title, deadline, duration, priority, user_id, category
+
+
+def _int_field(record, name, fallback=None):
+    value = record.get(name, fallback)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        raise RowError(f"{name} must be a whole number")
@@ -0,0 +1,80 @@
+"""
+Per-user change feed behind GET /tasks/changes.
+
+Every mutation bumps the user's version in user_versions and records
+what it touched in task_changes under that version: task upserts, task
+tombstones, and plan dates whose schedule changed. A client that has
+seen version N asks for everything after N and gets back the current
+state of just those tasks and days.
+
+The log is compacted in two ways:
+
+- on write, an entity keeps one row (unique on user, entity, key), so a
+  task edited a hundred times costs one entry at its latest version
+- `compact` drops entries older than the retention window and raises the
+  user's changes_floor past them; a client whose version is below the
+  floor has missed something and is told to resync from scratch
+
+Like replanner, the write path runs on the caller's cursor inside its
+transaction.
+"""
+
+from datetime import datetime, timedelta
+
+DEFAULT_RETENTION_DAYS = 30
+
+RECORD_SQL = """
+    INSERT INTO task_changes (user_id, entity, entity_key, deleted, version)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE deleted = VALUES(deleted), version = VALUES(version), changed_at = CURRENT_TIMESTAMP
+"""
+
+
+def bump_version(cur, user_id: int, tasks=(), deleted=(), plan_dates=(), reset: bool = False) -> int:
+    """
+    Advance a user's version and log what changed under it; call before
+    the mutation commits. reset=True is for changes too large to log
+    entry by entry: it moves the floor up so every client resyncs.
+    """
+    # LAST_INSERT_ID(expr) hands the new counter back in the OK packet, saving a SELECT
+    cur.execute(
+        "INSERT INTO user_versions (user_id, version) VALUES (%s, LAST_INSERT_ID(1)) "
+        "ON DUPLICATE KEY UPDATE version = LAST_INSERT_ID(version + 1)",
+        (user_id,)
+    )
+    version = cur.lastrowid
+    if reset:
+        cur.execute("UPDATE user_versions SET changes_floor = %s WHERE user_id = %s", (version, user_id))
+        return version
+    rows = [(user_id, "task", str(task_id), False, version) for task_id in tasks]
+    rows += [(user_id, "task", str(task_id), True, version) for task_id in deleted]
+    rows += [(user_id, "plan", str(plan_date), False, version) for plan_date in sorted(set(plan_dates))]
+    if rows:
+        cur.executemany(RECORD_SQL, rows)
+    return version
+
+
+def compact(pool, retention_days: int = DEFAULT_RETENTION_DAYS) -> int:
+    """Drop log entries older than the retention window; returns how many were removed"""
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    conn = pool.acquire()
+    try:
+        cur = conn.cursor()
+        # Correlated rather than UPDATE ... JOIN so the statement also runs on SQLite
+        cur.execute("""
+            UPDATE user_versions
+            SET changes_floor = GREATEST(changes_floor, (
+                SELECT MAX(c.version)
+                FROM task_changes c
+                WHERE c.user_id = user_versions.user_id AND c.changed_at < %s
+            ))
+            WHERE user_id IN (SELECT user_id FROM task_changes WHERE changed_at < %s)
+        """, (cutoff, cutoff))
+        cur.execute("DELETE FROM task_changes WHERE changed_at < %s", (cutoff,))
+        removed = cur.rowcount
+        conn.commit()
+    except BaseException:
+        pool.release(conn, rollback=True)
+        raise
+    pool.release(conn)
+    return removed
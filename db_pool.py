@@ -0,0 +1,194 @@
+"""
+Bounded, thread-safe connection pool for the Smart Planner API.
+
+FastAPI runs sync endpoints in a threadpool, so every request checks a
+connection out of the pool, uses it exclusively and hands it back when
+the response is done. Stale connections are pinged (and reconnected)
+on checkout instead of taking the whole API down.
+"""
+
+import threading
+import time
+from collections import deque
+
+
+# pymysql.constants.SERVER_STATUS.SERVER_STATUS_IN_TRANS
+SERVER_STATUS_IN_TRANS = 1
+
+
+def _in_transaction(conn):
+    return bool(getattr(conn, "server_status", 0) & SERVER_STATUS_IN_TRANS)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the checkout timeout"""
+
+
+class ConnectionPool:
+    def __init__(self, connect, min_size=1, max_size=10, timeout=10.0,
+                 ping_interval=30.0, idle_timeout=300.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self.idle_timeout = idle_timeout
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (connection, last_used) - most recently used on the right
+        self._size = 0        # open connections, idle + in use
+        self._in_use = 0
+        self._closed = False
+
+        # Counters exposed through stats()
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+        self._reconnects = 0
+        self._discarded = 0
+
+    def warm(self):
+        """Open min_size connections up front; failures are left for checkout to report"""
+        opened = []
+        try:
+            for _ in range(self.min_size - len(self._idle)):
+                opened.append(self.acquire())
+        except Exception:
+            pass
+        for conn in opened:
+            self.release(conn)
+
+    def acquire(self):
+        """Check a connection out, waiting up to `timeout` seconds for a free one"""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    conn, last_used = None, None
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(f"No database connection available after {self.timeout:.1f}s "
+                                      f"({self.max_size} in use)")
+                waited = True
+                self._cond.wait(remaining)
+
+            self._in_use += 1
+            self._checkouts += 1
+            if waited:
+                wait = time.monotonic() - start
+                self._waits += 1
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+
+        # Network I/O happens outside the lock so other threads are not blocked
+        try:
+            if conn is None:
+                conn = self._connect()
+            elif time.monotonic() - last_used > self.ping_interval:
+                conn = self._revive(conn)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def release(self, conn, rollback=False, discard=False):
+        """Return a connection to the pool, discarding it if it is broken (or asked to)"""
+        if discard:
+            self._close_quietly(conn)
+        discard = discard or not getattr(conn, "open", True)
+        # Reset on return: a read-only request still leaves an implicit transaction
+        # open, which would pin the next request to a stale REPEATABLE READ snapshot
+        if not discard and _in_transaction(conn):
+            rollback = True
+        if rollback and not discard:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        to_close = []
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._size -= 1
+                self._discarded += 1
+                to_close.append(conn)
+            else:
+                now = time.monotonic()
+                self._idle.append((conn, now))
+                # Trim connections beyond min_size that have sat idle for too long
+                while len(self._idle) > 1 and self._size > self.min_size \
+                        and now - self._idle[0][1] > self.idle_timeout:
+                    to_close.append(self._idle.popleft()[0])
+                    self._size -= 1
+            self._cond.notify()
+
+        for stale in to_close:
+            self._close_quietly(stale)
+
+    def close(self):
+        """Close every idle connection; in-use connections are closed when released"""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._size -= len(idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        """Snapshot of pool usage for sizing under load"""
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_time_total_ms": round(self._wait_total * 1000, 3),
+                "wait_time_avg_ms": round(self._wait_total * 1000 / self._waits, 3) if self._waits else 0.0,
+                "wait_time_max_ms": round(self._wait_max * 1000, 3),
+                "timeouts": self._timeouts,
+                "reconnects": self._reconnects,
+                "discarded": self._discarded,
+            }
+
+    def _revive(self, conn):
+        # Idle connections may have been dropped by the server (wait_timeout) or a proxy
+        try:
+            conn.ping(reconnect=True)
+            return conn
+        except Exception:
+            self._close_quietly(conn)
+            new_conn = self._connect()
+            with self._cond:
+                self._reconnects += 1
+            return new_conn
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
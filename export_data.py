@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Stream Smart Planner data out as NDJSON or CSV.
+
+Every table is read from one consistent snapshot (START TRANSACTION WITH
+CONSISTENT SNAPSHOT, like mysqldump --single-transaction) through an
+unbuffered server-side cursor, so an export takes no table locks and
+holds one batch of rows in memory however large it is. Output can be
+gzipped on the fly. GET /export in the API uses the same functions.
+
+    python export_data.py                                # whole database, NDJSON to stdout
+    python export_data.py --user alice -o alice.ndjson.gz --gzip
+    python export_data.py --format csv -o export/        # one CSV file per table
+    python export_data.py --tables tasks,daily_plan --user-id 3
+
+NDJSON lines carry a "table" field so several tables share one stream.
+CSV holds one table per file. Password hashes and sessions are never
+exported; use mysqldump for a restorable backup.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import zlib
+from datetime import date, datetime, timedelta
+
+import pymysql
+
+from replanner import as_time
+
+DEFAULT_BATCH_ROWS = 500
+
+FORMATS = ("ndjson", "csv")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv", "gzip": "application/gzip"}
+
+# table -> (columns, column that ties a row to a user)
+TABLES = {
+    "users": ("id, username, role, created_at", "id"),
+    "categories": ("id, name, color, user_id", "user_id"),
+    "tasks": ("id, title, deadline, duration_minutes, priority, status, category, completed_at, user_id", "user_id"),
+    "daily_plan": ("id, task_id, plan_date, task_order, scheduled_time, user_id", "user_id"),
+    "notifications": ("id, message, type, read_status, created_at, user_id", "user_id"),
+}
+
+
+def parse_tables(value: str = None):
+    """Table names from a comma-separated list (all tables if empty); raises ValueError on unknown names"""
+    if not value:
+        return list(TABLES)
+    tables = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in tables if name not in TABLES]
+    if unknown:
+        raise ValueError(f"Unknown table(s): {', '.join(unknown)}; choose from {', '.join(TABLES)}")
+    return tables
+
+
+def table_query(table: str, user_id: int = None):
+    columns, owner = TABLES[table]
+    if user_id is None:
+        return f"SELECT {columns} FROM {table} ORDER BY id", ()
+    return f"SELECT {columns} FROM {table} WHERE {owner} = %s ORDER BY id", (user_id,)
+
+
+def begin_snapshot(conn):
+    conn.cursor().execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+
+
+def export_batches(conn, tables, user_id: int = None, batch_rows: int = DEFAULT_BATCH_ROWS):
+    """(table, column names, rows) per batch for each table in turn; call begin_snapshot first"""
+    cur = conn.cursor(pymysql.cursors.SSCursor)
+    for table in tables:
+        cur.execute(*table_query(table, user_id))
+        columns = [d[0] for d in cur.description]
+        while True:
+            rows = cur.fetchmany(batch_rows)
+            if not rows:
+                break
+            yield table, columns, rows
+    cur.close()
+    conn.commit()
+
+
+def open_export(pool, tables, user_id: int = None, batch_rows: int = DEFAULT_BATCH_ROWS):
+    """export_batches on a pooled connection, opened eagerly so connection errors surface up front"""
+    conn = pool.acquire()
+    try:
+        begin_snapshot(conn)
+    except BaseException:
+        pool.release(conn, rollback=True)
+        raise
+
+    def batches():
+        finished = False
+        try:
+            yield from export_batches(conn, tables, user_id, batch_rows)
+            finished = True
+        finally:
+            if finished:
+                pool.release(conn)
+            else:
+                # Abandoned mid-table: draining the rest would cost more than reconnecting
+                pool.release(conn, discard=True)
+
+    return batches()
+
+
+def plain(value):
+    """JSON/CSV-friendly form of a column value"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return as_time(value).isoformat()  # TIME columns come back as timedelta
+    return value
+
+
+def ndjson_chunks(batches):
+    """One {"table": ..., column: value, ...} object per line"""
+    try:
+        for table, columns, rows in batches:
+            yield "".join(
+                json.dumps({"table": table, **{c: plain(v) for c, v in zip(columns, row)}}, default=str) + "\n"
+                for row in rows
+            )
+    finally:
+        batches.close()
+
+
+def csv_chunks(batches):
+    """A header row, then the rows; for a single table"""
+    header_written = False
+    try:
+        for _, columns, rows in batches:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if not header_written:
+                writer.writerow(columns)
+                header_written = True
+            writer.writerows([plain(v) for v in row] for row in rows)
+            yield buffer.getvalue()
+    finally:
+        batches.close()
+
+
+def gzip_chunks(chunks):
+    """Compress text chunks into a gzip stream as they are produced"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip header and trailer
+    try:
+        for chunk in chunks:
+            data = compressor.compress(chunk.encode())
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        chunks.close()
+
+
+def encode(batches, export_format: str, compress: bool = False):
+    chunks = ndjson_chunks(batches) if export_format == "ndjson" else csv_chunks(batches)
+    return gzip_chunks(chunks) if compress else _utf8_chunks(chunks)
+
+
+def _utf8_chunks(chunks):
+    try:
+        for chunk in chunks:
+            yield chunk.encode()
+    finally:
+        chunks.close()
+
+
+def filename(scope: str, export_format: str, compress: bool = False) -> str:
+    return f"smartplanner-{scope}-{date.today().isoformat()}.{export_format}" + (".gz" if compress else "")
+
+
+# CLI
+
+def get_connection():
+    # Same DB_* environment variables as the API
+    from api import get_db_connection
+    return get_db_connection()
+
+
+def resolve_user(conn, username: str) -> int:
+    cur = conn.cursor()
+    cur.execute("SELECT id FROM users WHERE username = %s", (username,))
+    row = cur.fetchone()
+    conn.rollback()
+    if not row:
+        raise SystemExit(f"❌ No user named {username!r}")
+    return row[0]
+
+
+def write_stream(conn, tables, user_id, export_format, compress, output):
+    begin_snapshot(conn)
+    chunks = encode(export_batches(conn, tables, user_id), export_format, compress)
+    if output in (None, "-"):
+        for chunk in chunks:
+            sys.stdout.buffer.write(chunk)
+        sys.stdout.buffer.flush()
+        return
+    with open(output, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    print(f"✅ Wrote {output}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--tables", help=f"comma-separated subset of {', '.join(TABLES)}")
+    who = parser.add_mutually_exclusive_group()
+    who.add_argument("--user", help="export only this user's data (by username)")
+    who.add_argument("--user-id", type=int, help="export only this user's data (by id)")
+    parser.add_argument("--gzip", action="store_true", help="gzip the output")
+    parser.add_argument("-o", "--output", help="file to write ('-' for stdout); a directory for CSV of several tables")
+    args = parser.parse_args()
+
+    try:
+        tables = parse_tables(args.tables)
+    except ValueError as e:
+        parser.error(str(e))
+
+    conn = get_connection()
+    try:
+        user_id = resolve_user(conn, args.user) if args.user else args.user_id
+        if args.format == "csv" and len(tables) > 1:
+            # One file per table, each from its own snapshot
+            if not args.output or args.output == "-":
+                parser.error("CSV of several tables needs --output DIRECTORY")
+            os.makedirs(args.output, exist_ok=True)
+            for table in tables:
+                path = os.path.join(args.output, f"{table}.csv" + (".gz" if args.gzip else ""))
+                write_stream(conn, [table], user_id, "csv", args.gzip, path)
+        else:
+            write_stream(conn, tables, user_id, args.format, args.gzip, args.output)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""
+Request, query and pool metrics in the Prometheus text format.
+
+`MetricsMiddleware` times every request and files it under its route
+template (/tasks/{task_id}/complete, not /tasks/42/complete), method and
+status. Database connections are wrapped so each execute() is timed and
+counted against the request that ran it: a contextvar carries the
+request's tally into threadpool workers, so queries per request show up
+as a histogram per route and an N+1 pattern stands out as a route whose
+count grows with the data. Queries outside any request (the notification
+queue, change log compaction) are counted as background.
+
+Stats that other components already keep (pool, cache, notification
+queue) are added as collectors and read when /metrics is scraped.
+
+The cost is two clock reads and a few integer updates per request and
+per query. Request stats are only touched from the event loop and take
+no lock; each query also takes one short lock around the shared query
+histogram, since queries finish on threadpool workers too. It is meant
+to stay on in production (METRICS_ENABLED=0 turns the recording off).
+"""
+
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds in seconds (or queries); +Inf is implied
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+UNMATCHED_ROUTE = "<unmatched>"  # 404s and the like, kept out of the per-path labels
+
+_request_tally = contextvars.ContextVar("request_query_tally", default=None)
+
+
+class QueryTally:
+    """Queries run on behalf of one request"""
+    __slots__ = ("queries", "seconds", "scope")
+
+    def __init__(self, scope=None):
+        self.queries = 0
+        self.seconds = 0.0
+        self.scope = scope
+
+
+def current_tally():
+    return _request_tally.get()
+
+
+def current_endpoint():
+    """Method and route template of the request running on this context ("GET /tasks/{task_id}"), or None"""
+    tally = _request_tally.get()
+    if tally is None or tally.scope is None:
+        return None
+    return f'{tally.scope["method"]} {getattr(tally.scope.get("route"), "path", UNMATCHED_ROUTE)}'
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels=""):
+        sep = "," if labels else ""
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels}{sep}le="{bound:g}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}'
+        suffix = f"{{{labels}}}" if labels else ""
+        yield f"{name}_sum{suffix} {self.sum:.6f}"
+        yield f"{name}_count{suffix} {self.count}"
+
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _RouteStats:
+    __slots__ = ("latency", "queries", "query_seconds", "statuses")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.query_seconds = Histogram(LATENCY_BUCKETS)
+        self.statuses = {}
+
+
+class Metrics:
+    def __init__(self, namespace: str = "smartplanner", enabled: bool = True):
+        self.namespace = namespace
+        self.enabled = enabled
+        self.in_progress = 0
+        # Request-side stats are only touched from the event loop; query-side ones from any thread
+        self._routes = {}  # (method, route) -> _RouteStats
+        self._query_lock = threading.Lock()
+        self._query_latency = Histogram(QUERY_LATENCY_BUCKETS)
+        self._queries = {"request": 0, "background": 0}
+        self._collectors = []
+
+    # Recording
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, tally: QueryTally):
+        stats = self._routes.get((method, route))
+        if stats is None:
+            stats = self._routes[(method, route)] = _RouteStats()
+        stats.latency.observe(seconds)
+        stats.queries.observe(tally.queries)
+        stats.query_seconds.observe(tally.seconds)
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+
+    def observe_query(self, sql, params, seconds: float):
+        tally = _request_tally.get()
+        if tally is not None:
+            tally.queries += 1
+            tally.seconds += seconds
+        with self._query_lock:
+            self._query_latency.observe(seconds)
+            self._queries["request" if tally is not None else "background"] += 1
+
+    def add_collector(self, collect):
+        """collect() -> iterable of exposition lines, called on every scrape"""
+        self._collectors.append(collect)
+
+    def add_stats(self, name: str, stats, counters=(), gauges=()):
+        """Expose numeric fields of a stats() dict: counters get a _total suffix, gauges are as-is"""
+        prefix = f"{self.namespace}_{name}"
+
+        def collect():
+            values = stats()
+            for key in counters:
+                yield f"# TYPE {prefix}_{key}_total counter"
+                yield f"{prefix}_{key}_total {values[key]}"
+            for key in gauges:
+                yield f"# TYPE {prefix}_{key} gauge"
+                yield f"{prefix}_{key} {values[key]}"
+
+        self.add_collector(collect)
+
+    # Exposition
+
+    def render(self) -> str:
+        ns = self.namespace
+        lines = [
+            f"# HELP {ns}_http_requests_total Requests by route, method and status",
+            f"# TYPE {ns}_http_requests_total counter",
+        ]
+        routes = sorted(self._routes.items())
+        for (method, route), stats in routes:
+            for status, count in sorted(stats.statuses.items()):
+                lines.append(f'{ns}_http_requests_total{{method="{method}",route="{_label(route)}",'
+                             f'status="{status}"}} {count}')
+
+        for metric, attr, help_text in (
+            ("http_request_duration_seconds", "latency", "Request latency"),
+            ("db_queries_per_request", "queries", "Database queries run by one request"),
+            ("db_time_per_request_seconds", "query_seconds", "Database time spent by one request"),
+        ):
+            lines.append(f"# HELP {ns}_{metric} {help_text}")
+            lines.append(f"# TYPE {ns}_{metric} histogram")
+            for (method, route), stats in routes:
+                lines.extend(getattr(stats, attr).lines(f"{ns}_{metric}", f'method="{method}",route="{_label(route)}"'))
+
+        lines.append(f"# HELP {ns}_http_requests_in_progress Requests being handled")
+        lines.append(f"# TYPE {ns}_http_requests_in_progress gauge")
+        lines.append(f"{ns}_http_requests_in_progress {self.in_progress}")
+
+        with self._query_lock:
+            lines.append(f"# HELP {ns}_db_query_duration_seconds Latency of single queries")
+            lines.append(f"# TYPE {ns}_db_query_duration_seconds histogram")
+            lines.extend(self._query_latency.lines(f"{ns}_db_query_duration_seconds"))
+            lines.append(f"# HELP {ns}_db_queries_total Queries run inside or outside a request")
+            lines.append(f"# TYPE {ns}_db_queries_total counter")
+            for context, count in self._queries.items():
+                lines.append(f'{ns}_db_queries_total{{context="{context}"}} {count}')
+
+        for collect in self._collectors:
+            lines.extend(collect())
+        return "\n".join(lines) + "\n"
+
+
+# Database instrumentation
+
+class InstrumentedCursor:
+    __slots__ = ("_cursor", "_observe")
+
+    def __init__(self, cursor, observe):
+        self._cursor = cursor
+        self._observe = observe
+
+    def execute(self, sql, params=None):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, params)
+        finally:
+            self._observe(sql, params, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_params):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, seq_of_params)
+        finally:
+            self._observe(sql, seq_of_params, time.perf_counter() - started)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """Delegates to a DB-API connection; its cursors time and count every statement"""
+    __slots__ = ("_conn", "_observe")
+
+    def __init__(self, conn, observe):
+        self._conn = conn
+        self._observe = observe
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs), self._observe)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def instrument(conn, observe):
+    """observe(sql, params, seconds) after every statement; None leaves the connection as it is"""
+    return InstrumentedConnection(conn, observe) if observe is not None else conn
+
+
+# Request instrumentation
+
+class MetricsMiddleware:
+    """
+    Pure ASGI, so streamed responses pass through untouched. With
+    track_endpoint, current_endpoint() works even while metrics are off.
+    """
+
+    def __init__(self, app, metrics: Metrics, track_endpoint: bool = False):
+        self.app = app
+        self.metrics = metrics
+        self.track_endpoint = track_endpoint
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (self.metrics.enabled or self.track_endpoint):
+            await self.app(scope, receive, send)
+            return
+
+        tally = QueryTally(scope)
+        token = _request_tally.set(tally)
+        if not self.metrics.enabled:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _request_tally.reset(token)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.metrics.in_progress += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.metrics.in_progress -= 1
+            _request_tally.reset(token)
+            # The router records the matched route in the scope on its way down
+            route = scope.get("route")
+            self.metrics.observe_request(scope["method"], getattr(route, "path", UNMATCHED_ROUTE), status,
+                                         elapsed, tally)
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for Smart Planner.
+
+Migrations live in migrations/NNNN_description.sql and are applied in
+order. Applied versions are recorded in schema_migrations, so running
+this again only applies what is new. Errors that just mean "already
+there" (existing column, index or table) are skipped, which makes each
+migration safe to re-run after a partial failure and lets the baseline
+adopt databases created by the old setup_*.py scripts.
+
+    python migrate.py            # apply pending migrations
+    python migrate.py --status   # list applied and pending versions
+    python migrate.py --check    # EXPLAIN the API's queries, fail on full scans
+
+--check finds the SQL passed to execute/fetch calls in CHECKED_MODULES,
+plus sample calls of the repositories.py query builders, and lists the
+calls whose SQL it could not work out instead of passing them silently.
+"""
+
+import argparse
+import ast
+import os
+import re
+import sys
+from datetime import date, timedelta
+
+import pymysql
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# Modules whose SQL is checked by --check
+CHECKED_MODULES = ["api.py", "repositories.py", "replanner.py", "session_store.py", "notification_bus.py",
+                   "change_log.py", "planner.py"]
+
+# Put this comment on the line of an execute() call to exempt a deliberate scan
+ALLOW_SCAN_MARKER = "explain-check: allow-scan"
+
+# Functions in repositories.py that build SQL at run time; --check EXPLAINs sample_queries() for them
+QUERY_BUILDERS = {"task_list_query", "tasks_by_ids_query", "plans_by_dates_query"}
+
+# Stands in for an IN list built at run time (placeholders(values))
+SAMPLE_IN_LIST = "%s, %s, %s"
+
+# MySQL errors that mean the change is already in place
+ALREADY_APPLIED = {
+    1050,  # table already exists
+    1060,  # duplicate column name
+    1061,  # duplicate key name
+    1091,  # can't drop; check that column/key exists
+}
+
+MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+
+def get_connection():
+    # Same DB_* environment variables as the API
+    from api import get_db_connection
+    return get_db_connection()
+
+
+def load_migrations():
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return migrations
+
+
+def split_statements(sql):
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [stmt.strip() for stmt in "\n".join(lines).split(";") if stmt.strip()]
+
+
+def applied_versions(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cur.fetchall()}
+
+
+def migrate(conn):
+    cur = conn.cursor()
+    done = applied_versions(cur)
+    pending = [m for m in load_migrations() if m[0] not in done]
+    if not pending:
+        print("✅ Schema is up to date")
+        return 0
+
+    for version, name, path in pending:
+        with open(path) as f:
+            statements = split_statements(f.read())
+        for statement in statements:
+            try:
+                cur.execute(statement)
+            except pymysql.err.MySQLError as e:
+                if e.args and e.args[0] in ALREADY_APPLIED:
+                    print(f"   skipped (already applied): {e.args[1]}")
+                    continue
+                conn.rollback()
+                print(f"❌ Migration {version:04d}_{name} failed: {e}")
+                return 1
+        cur.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+        conn.commit()
+        print(f"✅ Applied {version:04d}_{name}")
+    return 0
+
+
+def status(conn):
+    done = applied_versions(conn.cursor())
+    for version, name, _ in load_migrations():
+        print(f"{'applied' if version in done else 'pending'}  {version:04d}_{name}")
+    return 0
+
+
+# --check: pull the SQL out of the API source and EXPLAIN it
+
+def module_constants(tree):
+    """Module-level NAME = "string" assignments, used to resolve f-strings and SQL constants"""
+    constants = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    constants[target.id] = node.value.value
+    return constants
+
+
+def imported_constants(tree, base):
+    """String constants pulled in with `from <module in this repo> import NAME`, under the name they are bound to"""
+    constants = {}
+    for node in tree.body:
+        if not isinstance(node, ast.ImportFrom) or node.level or not node.module:
+            continue
+        path = os.path.join(base, *node.module.split(".")) + ".py"
+        if not os.path.exists(path):
+            continue
+        with open(path) as f:
+            source_constants = module_constants(ast.parse(f.read()))
+        for alias in node.names:
+            if alias.name in source_constants:
+                constants[alias.asname or alias.name] = source_constants[alias.name]
+    return constants
+
+
+def resolve_sql(node, constants):
+    """Every SQL text the argument can be: both branches of `A if flag else B`, else one (or none)"""
+    if isinstance(node, ast.IfExp):
+        branches = [resolve_sql(node.body, constants), resolve_sql(node.orelse, constants)]
+        return branches[0] + branches[1] if all(branches) else []
+    sql = _resolve_text(node, constants)
+    return [sql] if sql else []
+
+
+def _is_placeholder_list(node):
+    """placeholders(values) or ", ".join(["%s"] * n): an IN list whose length is only known at run time"""
+    if not isinstance(node, ast.Call):
+        return False
+    if isinstance(node.func, ast.Name):
+        return node.func.id == "placeholders"
+    return isinstance(node.func, ast.Attribute) and node.func.attr == "join" and len(node.args) == 1 \
+        and isinstance(node.args[0], ast.BinOp) and isinstance(node.args[0].left, ast.List) \
+        and [getattr(e, "value", None) for e in node.args[0].left.elts] == ["%s"]
+
+
+def _resolve_text(node, constants):
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.Name):
+        return constants.get(node.id)
+    if _is_placeholder_list(node):
+        return SAMPLE_IN_LIST
+    if isinstance(node, ast.JoinedStr):
+        parts = []
+        for value in node.values:
+            if isinstance(value, ast.Constant):
+                parts.append(value.value)
+                continue
+            text = _resolve_text(value.value, constants) if isinstance(value, ast.FormattedValue) else None
+            if text is None:
+                return None
+            parts.append(text)
+        return "".join(parts)
+    return None
+
+
+def local_constants(function, constants):
+    """Strings bound once inside a function (marks = ", ".join(...)), on top of the module's"""
+    assigned = [node for node in ast.walk(function) if isinstance(node, (ast.Assign, ast.AugAssign))]
+    names = [target.id for node in assigned
+             for target in (node.targets if isinstance(node, ast.Assign) else [node.target])
+             if isinstance(target, ast.Name)]
+    local = dict(constants)
+    for node in sorted(assigned, key=lambda n: n.lineno):
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name) \
+                and names.count(node.targets[0].id) == 1:
+            text = _resolve_text(node.value, local)
+            if text is not None:
+                local[node.targets[0].id] = text
+    return local
+
+
+def sql_calls(path):
+    """(call, SQL texts it can run, source lines, enclosing function's parameters) for every execute/fetch call"""
+    with open(path) as f:
+        source = f.read()
+    tree = ast.parse(source)
+    lines = source.splitlines()
+    # api.py runs the SQL constants of repositories.py, so those count as its own
+    constants = {**imported_constants(tree, os.path.dirname(os.path.abspath(path))), **module_constants(tree)}
+
+    # ast.walk is breadth-first, so a nested function's scope replaces its parent's
+    scopes = {}
+    for function in ast.walk(tree):
+        if isinstance(function, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            scope = (local_constants(function, constants), {arg.arg for arg in function.args.args})
+            for node in ast.walk(function):
+                scopes[id(node)] = scope
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) \
+                and node.func.attr in ("execute", "executemany", "fetchall", "fetchone", "_run") and node.args:
+            local, params = scopes.get(id(node), (constants, set()))
+            yield node, resolve_sql(node.args[0], local), lines, params
+
+
+def extract_queries(path):
+    """(line, sql, allow_scan) for every execute/fetch call with resolvable SQL text"""
+    queries = []
+    for node, sqls, lines, _ in sql_calls(path):
+        for sql in sqls:
+            if re.match(r"\s*(SELECT|UPDATE|DELETE)\b", sql, re.IGNORECASE):
+                allow_scan = ALLOW_SCAN_MARKER in lines[node.lineno - 1]
+                queries.append((node.lineno, " ".join(sql.split()), allow_scan))
+    return queries
+
+
+def unchecked_calls(path):
+    """
+    Lines of execute/fetch calls whose SQL could not be worked out. Calls
+    that run a QUERY_BUILDERS result are covered by sample_queries(), and
+    wrappers passing their own `sql` argument through by their callers.
+    """
+    unchecked = []
+    for node, sqls, _, params in sql_calls(path):
+        arg = node.args[0]
+        if sqls or (isinstance(arg, ast.Name) and arg.id in params):
+            continue
+        built = arg.value if isinstance(arg, ast.Starred) else arg
+        if isinstance(built, ast.Call) and isinstance(built.func, ast.Name) and built.func.id in QUERY_BUILDERS:
+            continue
+        unchecked.append(node.lineno)
+    return sorted(unchecked)
+
+
+def sample_queries():
+    """(label, sql, params, allow_scan) for representative calls of every QUERY_BUILDERS function"""
+    from repositories import plans_by_dates_query, task_list_query, tasks_by_ids_query
+    day = date(2000, 1, 1)
+    samples = [
+        ("task_list_query (first page)", task_list_query(user_id=1, limit=51)),
+        ("task_list_query (filtered, next page)",
+         task_list_query(user_id=1, status="pending", category="x", deadline_from=day, deadline_to=day,
+                         after=(day, 1), limit=51)),
+        ("task_list_query (next page after undated tasks)", task_list_query(user_id=1, after=(None, 1), limit=51)),
+        ("task_list_query (admin, every user)", task_list_query(limit=51)),
+        ("tasks_by_ids_query", tasks_by_ids_query(1, [1, 2, 3])),
+        ("plans_by_dates_query", plans_by_dates_query(1, [day, day + timedelta(days=1)])),
+    ]
+    return [(label, " ".join(sql.split()), list(params), False) for label, (sql, params) in samples]
+
+
+def sample_params(sql):
+    """Typed stand-ins for %s placeholders, guessed from the column they are compared to"""
+    params = []
+    for match in re.finditer(r"%s", sql):
+        before = sql[max(0, match.start() - 40):match.start()].lower()
+        if re.search(r"limit\s*$", before):
+            params.append(50)
+        elif re.search(r"(date|deadline|_at)\w*\s*(=|<=|>=|<|>|between)\s*$", before) \
+                or re.search(r"(date|deadline|_at)\w*\s+between\s+%s\s+and\s*$", before) \
+                or re.search(r"(date|deadline|_at)\w*\s+in\s*\((%s,\s*)*$", before):
+            params.append("2000-01-01")
+        elif re.search(r"(token|status|name|username)\s*=\s*$", before):
+            params.append("x")
+        else:
+            params.append(1)
+    return params
+
+
+def explain_scans(cur, sql, params):
+    cur.execute("EXPLAIN " + sql, params)
+    return [row["table"] for row in cur.fetchall() if row.get("type") == "ALL"]
+
+
+def report(where, sql, scans, allow_scan):
+    """Print one query's result; returns 1 if it is a failing full scan"""
+    if not scans:
+        print(f"✅ {where}")
+    elif allow_scan:
+        print(f"⚠️  {where} full scan on {', '.join(scans)} (allowed)")
+    else:
+        print(f"❌ {where} full scan on {', '.join(scans)}\n   {sql}")
+        return 1
+    return 0
+
+
+def check(conn):
+    cur = conn.cursor(pymysql.cursors.DictCursor)
+    base = os.path.dirname(os.path.abspath(__file__))
+    failures = 0
+    unchecked = []
+    for module in CHECKED_MODULES:
+        path = os.path.join(base, module)
+        queries = extract_queries(path)
+        if not queries:
+            # Every checked module runs SQL; finding none means the extraction broke, not that all is well
+            failures += 1
+            print(f"❌ {module}: no queries found to check")
+        for line, sql, allow_scan in queries:
+            failures += report(f"{module}:{line}", sql, explain_scans(cur, sql, sample_params(sql)), allow_scan)
+        unchecked += [f"{module}:{line}" for line in unchecked_calls(path)]
+
+    for label, sql, params, allow_scan in sample_queries():
+        failures += report(label, sql, explain_scans(cur, sql, params), allow_scan)
+    conn.rollback()
+
+    for where in unchecked:
+        print(f"⏭️  {where} not checked: SQL built at run time")
+    print(f"\n{failures} quer{'y' if failures == 1 else 'ies'} doing full table scans" if failures
+          else "\nNo full table scans")
+    if unchecked:
+        print(f"{len(unchecked)} quer{'y' if len(unchecked) == 1 else 'ies'} not checked")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--status", action="store_true", help="list applied and pending migrations")
+    group.add_argument("--check", action="store_true", help="EXPLAIN API queries and fail on full scans")
+    args = parser.parse_args()
+
+    if os.getenv("DB_BACKEND", "mysql") == "sqlite":
+        # The embedded backend creates its schema (sqlite_db.SCHEMA) when the file is first opened
+        if args.check:
+            print("❌ --check EXPLAINs against MySQL and was not run: DB_BACKEND=sqlite")
+            return 1
+        if args.status:
+            print("DB_BACKEND=sqlite: migrations are not tracked, the schema is created on first use")
+            return 0
+        print("✅ DB_BACKEND=sqlite: the schema is created on first use, nothing to migrate")
+        return 0
+
+    conn = get_connection()
+    try:
+        if args.status:
+            return status(conn)
+        if args.check:
+            return check(conn)
+        return migrate(conn)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+-- Baseline schema: everything setup_database.py, setup_users.py and
+-- setup_extended_features.py used to create, in one place.
+-- Safe on databases built by those scripts: existing tables are kept and
+-- "column already exists" errors are skipped by the runner.
+
+CREATE TABLE IF NOT EXISTS users (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    username VARCHAR(50) UNIQUE NOT NULL,
+    password_hash VARCHAR(255) NOT NULL,
+    role VARCHAR(20) DEFAULT 'user',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    title TEXT,
+    deadline DATE,
+    duration_minutes INT,
+    priority INT,
+    status TEXT DEFAULT 'pending',
+    user_id INT,
+    category VARCHAR(50) DEFAULT 'General',
+    completed_at TIMESTAMP NULL,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS daily_plan (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    task_id INT,
+    plan_date DATE,
+    task_order INT,
+    user_id INT,
+    scheduled_time TIME,
+    FOREIGN KEY (task_id) REFERENCES tasks(id) ON DELETE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Columns added over time by the old setup scripts
+ALTER TABLE tasks ADD COLUMN user_id INT;
+ALTER TABLE tasks ADD COLUMN category VARCHAR(50) DEFAULT 'General';
+ALTER TABLE tasks ADD COLUMN completed_at TIMESTAMP NULL;
+ALTER TABLE daily_plan ADD COLUMN user_id INT;
+ALTER TABLE daily_plan ADD COLUMN scheduled_time TIME;
+
+CREATE TABLE IF NOT EXISTS categories (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(50) UNIQUE NOT NULL,
+    color VARCHAR(7) DEFAULT '#667eea',
+    user_id INT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS notifications (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    message TEXT NOT NULL,
+    type VARCHAR(20) DEFAULT 'info',
+    read_status BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    token VARCHAR(64) PRIMARY KEY,
+    user_id INT NOT NULL,
+    username VARCHAR(50) NOT NULL,
+    role VARCHAR(20) NOT NULL,
+    expires_at DATETIME NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_sessions_expires (expires_at),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+INSERT IGNORE INTO categories (name, color, user_id) VALUES
+('General', '#667eea', NULL),
+('School', '#4CAF50', NULL),
+('Work', '#2196F3', NULL),
+('Personal', '#FF9800', NULL),
+('Health', '#E91E63', NULL),
+('Shopping', '#9C27B0', NULL);
@@ -0,0 +1,16 @@
+-- Composite indexes for the queries api.py runs on every page load.
+-- status was TEXT, which MySQL cannot index without a prefix length.
+
+ALTER TABLE tasks MODIFY status VARCHAR(20) DEFAULT 'pending';
+
+-- GET /tasks, /generate-plan pending-task reads
+CREATE INDEX idx_tasks_user_status ON tasks (user_id, status);
+
+-- /plan/today, /plan/{date}, /calendar and the generate-plan range delete
+CREATE INDEX idx_daily_plan_user_date_order ON daily_plan (user_id, plan_date, task_order);
+
+-- Incremental re-planning looks up a task's upcoming slots
+CREATE INDEX idx_daily_plan_task_date ON daily_plan (task_id, plan_date);
+
+-- /notifications?unread_only=true ORDER BY created_at DESC LIMIT 50
+CREATE INDEX idx_notifications_user_read_created ON notifications (user_id, read_status, created_at);
@@ -0,0 +1,8 @@
+-- Keyset pagination on GET /tasks orders by (deadline, id).
+-- InnoDB secondary indexes carry the primary key, so id is implicit.
+
+-- A user's own tasks
+CREATE INDEX idx_tasks_user_deadline ON tasks (user_id, deadline);
+
+-- Admin view across all users
+CREATE INDEX idx_tasks_deadline ON tasks (deadline);
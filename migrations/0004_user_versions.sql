@@ -0,0 +1,10 @@
+-- Per-user change counter behind the ETags on GET /tasks, /plan/today,
+-- /calendar and /categories. Every write to a user's tasks, plan or
+-- categories bumps it in the same transaction, so a conditional GET
+-- only needs this primary-key lookup to answer 304.
+CREATE TABLE IF NOT EXISTS user_versions (
+    user_id INT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
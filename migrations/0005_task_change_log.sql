@@ -0,0 +1,22 @@
+-- Change feed for GET /tasks/changes. Each user's entries carry the
+-- user_versions counter they were written under; an entity keeps only
+-- its latest entry. changes_floor is the highest version compacted out
+-- of the log: clients behind it must resync.
+ALTER TABLE user_versions ADD COLUMN changes_floor BIGINT NOT NULL DEFAULT 0;
+
+-- Versions handed out before the log existed have no entries
+UPDATE user_versions SET changes_floor = version;
+
+CREATE TABLE IF NOT EXISTS task_changes (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    entity VARCHAR(10) NOT NULL,
+    entity_key VARCHAR(20) NOT NULL,
+    deleted BOOLEAN NOT NULL DEFAULT FALSE,
+    version BIGINT NOT NULL,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_task_changes_entity (user_id, entity, entity_key),
+    INDEX idx_task_changes_user_version (user_id, version),
+    INDEX idx_task_changes_changed_at (changed_at),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
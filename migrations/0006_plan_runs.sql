@@ -0,0 +1,25 @@
+-- Checkpoints for the batch planner (planner.py). One row per user: the
+-- version their plan was last built at and the range it covers, so a
+-- run skips users whose tasks have not changed and a re-run after a
+-- crash resumes where the last one stopped.
+CREATE TABLE IF NOT EXISTS plan_runs (
+    user_id INT PRIMARY KEY,
+    version BIGINT NOT NULL,
+    plan_start DATE NOT NULL,
+    days INT NOT NULL,
+    pending INT NOT NULL,
+    planned INT NOT NULL,
+    planned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- One row per scheduled nightly run; inserting it claims the night, so
+-- only one API worker runs the batch when several are up
+CREATE TABLE IF NOT EXISTS plan_batches (
+    run_date DATE PRIMARY KEY,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP NULL,
+    users_planned INT NOT NULL DEFAULT 0,
+    users_skipped INT NOT NULL DEFAULT 0,
+    users_failed INT NOT NULL DEFAULT 0
+);
@@ -0,0 +1,23 @@
+-- Working hours and fixed events for the slot allocator (slots.py).
+-- availability holds a user's weekly windows (weekday 0 = Monday); a
+-- user without rows gets one block a day from PLAN_DAY_START. Fixed
+-- events are one-off busy intervals that tasks are scheduled around.
+CREATE TABLE IF NOT EXISTS availability (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    weekday TINYINT NOT NULL,
+    start_time TIME NOT NULL,
+    end_time TIME NOT NULL,
+    INDEX idx_availability_user_weekday (user_id, weekday),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS fixed_events (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    start_at DATETIME NOT NULL,
+    end_at DATETIME NOT NULL,
+    INDEX idx_fixed_events_user_end (user_id, end_at),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
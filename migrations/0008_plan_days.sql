@@ -0,0 +1,10 @@
+-- The daily budget each planned day was built with (daily_minutes of
+-- POST /generate-plan or the batch planner), so incremental re-planning
+-- fills a day up to its own budget rather than PLAN_DAILY_MINUTES
+CREATE TABLE IF NOT EXISTS plan_days (
+    user_id INT NOT NULL,
+    plan_date DATE NOT NULL,
+    daily_minutes INT NOT NULL,
+    PRIMARY KEY (user_id, plan_date),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
@@ -0,0 +1,146 @@
+"""
+In-process pub/sub for pushing notifications to connected clients.
+
+Each open /notifications/stream holds a bounded asyncio queue registered
+under its user id. `publish` can be called from any thread (sync
+endpoints run in the threadpool) and fans the message out to every
+stream that user has open in this worker.
+
+Delivery across workers goes through a pluggable broker:
+
+- LocalBroker hands messages straight to this worker's subscribers
+  (single worker, the default)
+- TableBroker tails the notifications table with one indexed query per
+  worker every few seconds, so a notification created on any worker
+  reaches streams on all of them; it only polls while someone is
+  listening
+
+Pick one with NOTIFICATION_BROKER=local|table.
+"""
+
+import asyncio
+import os
+import threading
+from collections import defaultdict
+
+DEFAULT_QUEUE_SIZE = 100
+DEFAULT_POLL_SECONDS = 2.0
+
+
+class NotificationBus:
+    def __init__(self, broker=None, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.broker = broker or LocalBroker()
+        self._subscribers = defaultdict(set)  # user_id -> {(loop, queue)}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: int):
+        """Register a queue for the calling event loop; pair with unsubscribe()"""
+        subscription = (asyncio.get_running_loop(), asyncio.Queue(maxsize=self.queue_size))
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, user_id: int, subscription):
+        with self._lock:
+            streams = self._subscribers.get(user_id)
+            if streams is not None:
+                streams.discard(subscription)
+                if not streams:
+                    del self._subscribers[user_id]
+
+    @property
+    def listening(self) -> bool:
+        return bool(self._subscribers)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(streams) for streams in self._subscribers.values())
+
+    def publish(self, user_id: int, message: dict):
+        """Announce a stored notification; safe to call from any thread"""
+        self.broker.publish(self, user_id, message)
+
+    def deliver(self, user_id: int, message: dict):
+        """Fan a message out to this worker's streams for user_id"""
+        with self._lock:
+            streams = list(self._subscribers.get(user_id, ()))
+        for loop, queue in streams:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, message)
+            except RuntimeError:
+                pass  # that stream's event loop is already closed
+
+
+def _offer(queue, message):
+    # A stalled client loses its oldest events rather than growing memory
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(message)
+
+
+class LocalBroker:
+    """Single-worker delivery: publish goes straight to local subscribers"""
+
+    def publish(self, bus, user_id, message):
+        bus.deliver(user_id, message)
+
+    async def run(self, bus):
+        return
+
+
+class TableBroker:
+    """Cross-worker delivery by tailing notifications.id from every worker"""
+
+    def __init__(self, fetchall, poll_seconds: float = DEFAULT_POLL_SECONDS, batch_size: int = 500):
+        self.fetchall = fetchall  # async (sql, params) -> rows
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        self.last_id = None
+
+    def publish(self, bus, user_id, message):
+        # The stored row is the message; the tail picks it up on every worker
+        pass
+
+    async def run(self, bus):
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            if not bus.listening:
+                self.last_id = None
+                continue
+            try:
+                await self.poll(bus)
+            except Exception:
+                # Database hiccup: keep the tail and try again next tick
+                continue
+
+    async def poll(self, bus):
+        if self.last_id is None:
+            row = await self.fetchall("SELECT COALESCE(MAX(id), 0) FROM notifications")
+            self.last_id = row[0][0]
+            return
+        rows = await self.fetchall("""
+            SELECT id, user_id, message, type, read_status, created_at
+            FROM notifications
+            WHERE id > %s
+            ORDER BY id
+            LIMIT %s
+        """, (self.last_id, self.batch_size))
+        for row in rows:
+            self.last_id = row[0]
+            bus.deliver(row[1], {
+                "id": row[0],
+                "message": row[2],
+                "type": row[3],
+                "read_status": bool(row[4]),
+                "created_at": str(row[5])
+            })
+
+
+def create_broker(fetchall, kind: str = None):
+    kind = kind or os.getenv("NOTIFICATION_BROKER", "local")
+    if kind == "local":
+        return LocalBroker()
+    if kind == "table":
+        return TableBroker(fetchall, poll_seconds=float(os.getenv("NOTIFICATION_POLL_SECONDS", str(DEFAULT_POLL_SECONDS))))
+    raise ValueError(f"Unknown NOTIFICATION_BROKER: {kind}")
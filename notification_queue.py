@@ -0,0 +1,139 @@
+"""
+Write-behind queue for notifications.
+
+Endpoints enqueue notifications instead of inserting and committing them
+inline, so a mutation pays for a single commit. A background thread
+drains the queue every `flush_interval` seconds (or as soon as a full
+batch is waiting) and writes each batch with one multi-row INSERT.
+Once a batch is stored, it is handed to `on_flushed` (the push channel).
+
+The queue is bounded: when it is full, new notifications are dropped
+and counted, and the queue depth is reported in stats() for backpressure
+monitoring. On a failed write the batch goes back to the front of the
+queue and is retried on the next flush.
+"""
+
+import threading
+import time
+from collections import deque
+
+DEFAULT_MAX_SIZE = 10000
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_FLUSH_INTERVAL = 0.5
+
+INSERT_SQL = "INSERT INTO notifications (user_id, message, type) VALUES (%s, %s, %s)"
+
+
+class NotificationQueue:
+    def __init__(self, pool, max_size: int = DEFAULT_MAX_SIZE, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, on_flushed=None):
+        self.pool = pool
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_flushed = on_flushed
+
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+
+        self._enqueued = 0
+        self._dropped = 0
+        self._written = 0
+        self._flushes = 0
+        self._failures = 0
+        self._last_flush_ms = 0.0
+
+    def enqueue(self, user_id: int, message: str, notif_type: str = "info") -> bool:
+        """Queue a notification; returns False if it was dropped because the queue is full"""
+        with self._cond:
+            if len(self._items) >= self.max_size:
+                self._dropped += 1
+                return False
+            self._items.append((user_id, message, notif_type))
+            self._enqueued += 1
+            if len(self._items) >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    def start(self):
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="notification-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the writer and flush whatever is still queued"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        while self._items and self.flush():
+            pass
+
+    def flush(self) -> bool:
+        """Write up to one batch; returns False if the write failed"""
+        with self._flush_lock:
+            with self._cond:
+                batch = [self._items.popleft() for _ in range(min(self.batch_size, len(self._items)))]
+            if not batch:
+                return True
+
+            started = time.perf_counter()
+            try:
+                conn = self.pool.acquire()
+                try:
+                    # pymysql turns executemany on INSERT ... VALUES into multi-row INSERTs
+                    conn.cursor().executemany(INSERT_SQL, batch)
+                    conn.commit()
+                except BaseException:
+                    self.pool.release(conn, rollback=True)
+                    raise
+                self.pool.release(conn)
+            except Exception:
+                with self._cond:
+                    self._failures += 1
+                    # Retry first next time; anything past capacity is dropped
+                    room = self.max_size - len(self._items)
+                    self._dropped += max(len(batch) - room, 0)
+                    self._items.extendleft(reversed(batch[:max(room, 0)]))
+                return False
+
+            with self._cond:
+                self._written += len(batch)
+                self._flushes += 1
+                self._last_flush_ms = (time.perf_counter() - started) * 1000
+        if self.on_flushed is not None:
+            self.on_flushed(batch)
+        return True
+
+    def stats(self):
+        with self._cond:
+            return {
+                "depth": len(self._items),
+                "max_size": self.max_size,
+                "batch_size": self.batch_size,
+                "flush_interval_ms": round(self.flush_interval * 1000),
+                "enqueued": self._enqueued,
+                "written": self._written,
+                "dropped": self._dropped,
+                "flushes": self._flushes,
+                "failures": self._failures,
+                "last_flush_ms": round(self._last_flush_ms, 3),
+            }
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._items) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                if self._stopping:
+                    return
+            # Drain in batches; back off for an interval if the database is failing
+            while self._items and self.flush():
+                if len(self._items) < self.batch_size:
+                    break
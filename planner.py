@@ -1,38 +1,237 @@
-import pymysql
-from datetime import date
+#!/usr/bin/env python3
+"""
+Batch planning: precompute the next few days of plans for every user.
 
-conn = pymysql.connect(
-    host="localhost",
-    port=3306,
-    database="smartplanner",
-    user="root",
-    password=""
-)
+    python planner.py                     # today and the 6 days after it, for everyone
+    python planner.py --days 3 --workers 8
+    python planner.py --user-id 42        # one user
+    python planner.py --force             # ignore checkpoints
 
-cur = conn.cursor()
+Each user is planned in a transaction of its own, the same way POST
+/generate-plan does it (`rebuild_plan`): the range is cleared and rebuilt
+from the user's pending tasks, and their version is bumped so clients
+holding an ETag pick the new plan up. Users run in parallel on a thread
+pool whose workers share a connection pool of the same size, so a run
+never holds more than `workers` database connections.
 
-cur.execute("SELECT id, title, deadline, duration_minutes, priority FROM tasks WHERE status='pending'")
-tasks = list(cur.fetchall())
+Progress is checkpointed per user in plan_runs (the version the plan was
+built at and the range it covers). A user is skipped when their version
+has not moved since and either the checkpoint already covers the range
+(a re-run, or a run resumed after a crash) or they had nothing pending.
 
-# Sort tasks (smart logic)
-tasks.sort(key=lambda x: (x[2], -x[4], x[3]))
+The API runs the same batch nightly when PLAN_BATCH_TIME is set.
+"""
 
-available_minutes = 300
-today = date.today()
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 
-order = 1
+from change_log import bump_version
+from db_pool import ConnectionPool
+from planning_engine import DEFAULT_DAILY_MINUTES, DEFAULT_DAY_START, DEFAULT_TIME_LIMIT, plan_tasks
+from replanner import load_calendar
+from repositories import PlanRepository, TaskRepository
 
-for task in tasks:
-    if task[3] <= available_minutes:
-        cur.execute(
-            "INSERT INTO daily_plan (task_id, plan_date, task_order) VALUES (%s,%s,%s)",
-            (task[0], today, order)
-        )
-        available_minutes -= task[3]
-        order += 1
+DEFAULT_DAYS = 7
+DEFAULT_WORKERS = 4
+DEFAULT_PAGE_SIZE = 500
+MAX_REPORTED_FAILURES = 20
 
-conn.commit()
-print("Today's plan generated")
+USERS_PAGE_SQL = """
+    SELECT u.id, COALESCE(v.version, 0), r.version, r.plan_start, r.days, r.pending
+    FROM users u
+    LEFT JOIN user_versions v ON v.user_id = u.id
+    LEFT JOIN plan_runs r ON r.user_id = u.id
+    WHERE u.id > %s
+    ORDER BY u.id
+    LIMIT %s
+"""
 
-cur.close()
-conn.close()
+CHECKPOINT_SQL = """
+    INSERT INTO plan_runs (user_id, version, plan_start, days, pending, planned)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE version = VALUES(version), plan_start = VALUES(plan_start), days = VALUES(days),
+        pending = VALUES(pending), planned = VALUES(planned), planned_at = CURRENT_TIMESTAMP
+"""
+
+
+def rebuild_plan(cur, user_id: int, start: date, days: int, daily_minutes: int = DEFAULT_DAILY_MINUTES,
+                 day_start=DEFAULT_DAY_START, mode: str = "greedy", time_limit: float = DEFAULT_TIME_LIMIT,
+                 placement: str = "earliest"):
+    """
+    Replace a user's plan for `days` days from `start`, timed around their
+    working hours and fixed events; run inside the caller's transaction.
+    Returns (DayPlans, pending task count, new version).
+    """
+    last_day = start + timedelta(days=days - 1)
+    plans = PlanRepository(cur)
+    plans.clear(user_id, start, last_day)
+
+    # With the range cleared, no pending task is planned on any of these dates; those planned
+    # past the range (a longer plan made earlier) keep their day rather than being planned twice
+    pending_tasks = TaskRepository(cur).pending(user_id, unplanned_after=last_day)
+
+    # Spread the backlog across the whole horizon; each task lands on at most one day
+    calendar = load_calendar(cur, user_id, start, last_day, day_start, daily_minutes, placement)
+    day_plans = plan_tasks(pending_tasks, start, days, daily_minutes=daily_minutes, day_start=day_start,
+                           mode=mode, time_limit=time_limit, calendar=calendar)
+    plans.add_many([(item.task_id, day.date, item.order, user_id, item.scheduled_time)
+                    for day in day_plans for item in day.tasks])
+    # Incremental re-planning fills these days up to this budget, not the default one
+    plans.set_budgets(user_id, [day.date for day in day_plans], daily_minutes)
+    version = bump_version(cur, user_id, plan_dates=[start + timedelta(days=i) for i in range(days)])
+    return day_plans, len(pending_tasks), version
+
+
+def is_current(row, start: date, days: int) -> bool:
+    """Whether a USERS_PAGE_SQL row's checkpoint still holds"""
+    _, version, planned_version, plan_start, planned_days, pending = row
+    if planned_version is None or planned_version != version:
+        return False
+    if pending == 0:
+        return True
+    return plan_start == start and planned_days >= days
+
+
+def plan_user(pool, user_id: int, start: date, days: int, **options) -> int:
+    """Rebuild one user's plan and checkpoint it; returns how many tasks were planned"""
+    conn = pool.acquire()
+    try:
+        cur = conn.cursor()
+        conn.begin()
+        day_plans, pending, version = rebuild_plan(cur, user_id, start, days, **options)
+        planned = sum(len(day.tasks) for day in day_plans)
+        cur.execute(CHECKPOINT_SQL, (user_id, version, start, days, pending, planned))
+        conn.commit()
+    except BaseException:
+        pool.release(conn, rollback=True)
+        raise
+    pool.release(conn)
+    return planned
+
+
+def iter_user_pages(pool, page_size: int = DEFAULT_PAGE_SIZE, user_ids=None):
+    """Pages of USERS_PAGE_SQL rows in id order; user_ids restricts the run to those users"""
+    after = 0
+    while True:
+        conn = pool.acquire()
+        try:
+            cur = conn.cursor()
+            cur.execute(USERS_PAGE_SQL, (after, page_size))
+            rows = cur.fetchall()
+        finally:
+            pool.release(conn)
+        if not rows:
+            return
+        after = rows[-1][0]
+        if user_ids is not None:
+            rows = [row for row in rows if row[0] in user_ids]
+        yield rows
+
+
+def run_batch(pool, start: date = None, days: int = DEFAULT_DAYS, workers: int = DEFAULT_WORKERS,
+              force: bool = False, user_ids=None, page_size: int = DEFAULT_PAGE_SIZE, **options) -> dict:
+    """
+    Plan every user (or just user_ids) whose checkpoint is out of date.
+    `pool` should allow `workers` connections; options go to rebuild_plan.
+    """
+    start = start or date.today()
+    summary = {"start": str(start), "days": days, "users": 0, "planned": 0, "skipped": 0, "failed": 0,
+               "tasks_planned": 0, "failures": []}
+    started = time.perf_counter()
+
+    def one_user(user_id):
+        try:
+            return user_id, plan_user(pool, user_id, start, days, **options), None
+        except Exception as e:
+            return user_id, 0, e
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="planner") as executor:
+        for rows in iter_user_pages(pool, page_size, user_ids):
+            summary["users"] += len(rows)
+            due = [row[0] for row in rows if force or not is_current(row, start, days)]
+            summary["skipped"] += len(rows) - len(due)
+            # A page at a time keeps memory flat however many users there are
+            for user_id, planned, error in executor.map(one_user, due):
+                if error is None:
+                    summary["planned"] += 1
+                    summary["tasks_planned"] += planned
+                    continue
+                summary["failed"] += 1
+                if len(summary["failures"]) < MAX_REPORTED_FAILURES:
+                    summary["failures"].append({"user_id": user_id, "error": str(error)})
+
+    summary["elapsed_s"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def claim_night(pool, run_date: date) -> bool:
+    """Record a scheduled run for run_date; False if another worker (or an earlier run) already has it"""
+    conn = pool.acquire()
+    try:
+        cur = conn.cursor()
+        cur.execute("INSERT IGNORE INTO plan_batches (run_date) VALUES (%s)", (run_date,))
+        claimed = cur.rowcount == 1
+        conn.commit()
+    except BaseException:
+        pool.release(conn, rollback=True)
+        raise
+    pool.release(conn)
+    return claimed
+
+
+def finish_night(pool, run_date: date, summary: dict):
+    conn = pool.acquire()
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            UPDATE plan_batches
+            SET finished_at = NOW(), users_planned = %s, users_skipped = %s, users_failed = %s
+            WHERE run_date = %s
+        """, (summary["planned"], summary["skipped"], summary["failed"], run_date))
+        conn.commit()
+    except BaseException:
+        pool.release(conn, rollback=True)
+        raise
+    pool.release(conn)
+
+
+def main(argv=None):
+    # Same DB_* and PLAN_* environment variables as the API
+    from api import PLAN_DAILY_MINUTES, PLAN_DAY_START, PLAN_OPTIMAL_TIME_LIMIT_MS, PLAN_PLACEMENT, get_db_connection
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="days to plan, starting today")
+    parser.add_argument("--start", type=date.fromisoformat, default=None, help="first day (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="users planned in parallel, and database connections held")
+    parser.add_argument("--mode", choices=["greedy", "optimal"], default="greedy")
+    parser.add_argument("--placement", choices=["earliest", "best"], default=PLAN_PLACEMENT,
+                        help="how tasks are fitted into free time")
+    parser.add_argument("--daily-minutes", type=int, default=PLAN_DAILY_MINUTES)
+    parser.add_argument("--start-time", type=lambda value: datetime.strptime(value, "%H:%M").time(),
+                        default=PLAN_DAY_START, help="HH:MM the day starts")
+    parser.add_argument("--user-id", type=int, action="append", help="only these users (repeatable)")
+    parser.add_argument("--force", action="store_true", help="replan users whose checkpoint is current")
+    args = parser.parse_args(argv)
+    if args.days < 1 or args.workers < 1:
+        parser.error("--days and --workers must be at least 1")
+
+    pool = ConnectionPool(get_db_connection, min_size=0, max_size=args.workers)
+    try:
+        summary = run_batch(pool, start=args.start, days=args.days, workers=args.workers, force=args.force,
+                            user_ids=set(args.user_id) if args.user_id else None,
+                            daily_minutes=args.daily_minutes, day_start=args.start_time,
+                            mode=args.mode, time_limit=PLAN_OPTIMAL_TIME_LIMIT_MS / 1000,
+                            placement=args.placement)
+    finally:
+        pool.close()
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
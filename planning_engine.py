@@ -0,0 +1,260 @@
+"""
+Multi-day planning engine.
+
+Pure functions with no database access: the API loads a user's pending
+tasks once and hands them to `plan_tasks`, which spreads them across the
+whole horizon so that no task is ever placed twice.
+
+Tasks are ranked once by (urgency, -priority, duration). Urgency is the
+number of days until the deadline, and since that offset shifts by the
+same amount for every task from one day to the next, a single ranking is
+valid for the whole horizon. Ranking and scoring run on columns
+(scoring.py), vectorized with NumPy for large backlogs. Each day is then filled greedily in rank
+order, exactly like the original per-day scheduler, but "the most urgent
+task that still fits in the remaining minutes" is answered by a
+min-duration segment tree in O(log n) instead of rescanning the backlog.
+Total cost is O(n log n + days).
+
+mode="optimal" instead picks each day's tasks with a 0/1 knapsack that
+maximizes urgency- and priority-weighted minutes within the daily
+budget, falling back to the greedy fill once the time limit is spent.
+
+Chosen tasks get their times from a slots.WorkCalendar: the user's
+availability windows minus their fixed events. A day's budget is the
+smaller of daily_minutes and its free time, and the greedy fill only
+considers tasks no longer than the day's longest free interval, so every
+pick can be placed. Without a calendar each day is one block from
+day_start, daily_minutes long.
+"""
+
+import time as clock
+from collections import defaultdict, namedtuple
+from datetime import date, datetime, time, timedelta
+from math import gcd
+
+from scoring import TaskColumns, rank, scores
+from slots import WorkCalendar, place, to_time
+
+DEFAULT_DAILY_MINUTES = 300  # 5 hours
+DEFAULT_DAY_START = time(9, 0)
+DEFAULT_TIME_LIMIT = 0.2  # seconds of solver time per request in optimal mode
+
+MODES = ("greedy", "optimal")
+
+Task = namedtuple("Task", "id deadline duration priority title")
+PlannedTask = namedtuple("PlannedTask", "task_id title order duration scheduled_time")
+DayPlan = namedtuple("DayPlan", "date start_time remaining_minutes tasks mode")
+
+_NO_FIT = float("inf")
+
+
+def to_task(row) -> Task:
+    """Build a Task from a (id, deadline, duration_minutes, priority, title) row"""
+    return Task(row[0], as_date(row[1]), int(row[2]), int(row[3]), row[4])
+
+
+def rank_key(task: Task, plan_date: date):
+    """Most urgent first, then highest priority, then shortest duration"""
+    return ((task.deadline - plan_date).days, -task.priority, task.duration, task.id)
+
+
+def task_value(task: Task, plan_date: date) -> float:
+    """Priority-weighted minutes, doubled for tasks due today or overdue"""
+    days_until = (task.deadline - plan_date).days
+    urgency = 1 + 1 / max(days_until + 1, 1)
+    return task.priority * task.duration * urgency
+
+
+def plan_tasks(tasks, start_date: date, days: int, daily_minutes: int = DEFAULT_DAILY_MINUTES,
+               day_start: time = DEFAULT_DAY_START, mode: str = "greedy",
+               time_limit: float = DEFAULT_TIME_LIMIT, calendar: WorkCalendar = None):
+    """Assign tasks to days starting at start_date; returns one DayPlan per day"""
+    if mode not in MODES:
+        raise ValueError(f"Unknown planning mode: {mode}")
+    tasks = [to_task(t) if not isinstance(t, Task) else t for t in tasks]
+    columns = TaskColumns.from_tasks(tasks)
+    order = rank(columns, start_date)
+    ranked = [tasks[i] for i in order]
+    # Values for the knapsack are scored per day over the ranked columns
+    ranked_columns = columns.take(order) if mode == "optimal" else None
+    fits = _FitIndex([t.duration for t in ranked])
+    deadline = clock.perf_counter() + time_limit
+    calendar = calendar or WorkCalendar.default(day_start, daily_minutes)
+
+    plans = []
+    for day_offset in range(max(days, 0)):
+        plan_date = start_date + timedelta(days=day_offset)
+        slots = calendar.free(plan_date)
+        first_start = slots.first_start
+        budget = day_budget = min(daily_minutes, slots.free_minutes)
+        chosen = None
+        if mode == "optimal" and clock.perf_counter() < deadline:
+            chosen = _pack_optimal(ranked_columns, fits, plan_date, budget, deadline)
+        day_mode = "optimal" if chosen is not None else "greedy"
+        placed = []
+        if chosen is not None:
+            # In rank order; a pick that fits the budget but no free interval stays in the backlog
+            for idx in sorted(chosen):
+                start = slots.allocate(ranked[idx].duration, calendar.placement)
+                if start is not None:
+                    budget -= fits.remove(idx)
+                    placed.append((ranked[idx], start))
+        placed += [(ranked[idx], start) for idx, start in _pack_greedy(fits, slots, budget, calendar.placement)]
+        placed.sort(key=lambda pair: pair[1])
+        plans.append(_day_plan(plan_date, to_time(first_start) if first_start is not None else day_start,
+                               day_budget, placed, day_mode))
+    return plans
+
+
+def insert_by_rank(day_tasks, task: Task, plan_date: date, daily_minutes: int = DEFAULT_DAILY_MINUTES):
+    """Return day_tasks with task slotted in at its rank, or None if the day has no room"""
+    if sum(t.duration for t in day_tasks) + task.duration > daily_minutes:
+        return None
+    key = rank_key(task, plan_date)
+    pos = next((i for i, t in enumerate(day_tasks) if rank_key(t, plan_date) > key), len(day_tasks))
+    return day_tasks[:pos] + [task] + day_tasks[pos:]
+
+
+def reflow_day(plan_date: date, tasks, daily_minutes: int = DEFAULT_DAILY_MINUTES,
+               day_start: time = DEFAULT_DAY_START, mode: str = "greedy", calendar: WorkCalendar = None) -> DayPlan:
+    """
+    Re-time a day's tasks, booked in their current order. With a calendar,
+    tasks that no longer fit its free time are left out of the plan; a
+    calendar without availability windows starts the day at day_start.
+    """
+    # Without one, a block long enough for everything already on the day
+    calendar = calendar or WorkCalendar.default(day_start, max(daily_minutes, sum(t.duration for t in tasks)))
+    slots = calendar.free(plan_date, day_start)
+    first_start = slots.first_start
+    budget = min(daily_minutes, slots.free_minutes)
+    placed, _ = place(slots, tasks, calendar.placement)
+    return _day_plan(plan_date, to_time(first_start) if first_start is not None else day_start, budget, placed, mode)
+
+
+def solve_knapsack(items, capacity: int, deadline: float = None):
+    """
+    0/1 knapsack over (weight, value) pairs with integer weights.
+
+    Returns the indices of an optimal subset, or None if `deadline`
+    (a time.perf_counter() value) passes before the solve finishes.
+    """
+    usable = [(i, w, v) for i, (w, v) in enumerate(items) if w <= capacity]
+    if not usable:
+        return []
+
+    # Scale by the common divisor (durations are usually multiples of 5 or 15)
+    step = 0
+    for _, w, _ in usable:
+        step = gcd(step, w)
+    step = gcd(step, capacity) or 1
+    cap = capacity // step
+
+    # Only the best cap // w items of any given weight can ever be packed together
+    by_weight = defaultdict(list)
+    for i, w, v in usable:
+        by_weight[w // step].append((v, i))
+    candidates = []
+    for w, group in by_weight.items():
+        group.sort(reverse=True)
+        limit = cap // w if w else len(group)
+        candidates.extend((i, w, v) for v, i in group[:limit])
+
+    best = [0.0] * (cap + 1)
+    taken = []
+    for n, (_, w, v) in enumerate(candidates):
+        if deadline is not None and n % 32 == 0 and clock.perf_counter() > deadline:
+            return None
+        row = bytearray(cap + 1)
+        for c in range(cap, w - 1, -1):
+            value = best[c - w] + v
+            if value > best[c]:
+                best[c] = value
+                row[c] = 1
+        taken.append(row)
+
+    chosen = []
+    c = cap
+    for n in range(len(candidates) - 1, -1, -1):
+        if taken[n][c]:
+            i, w, _ = candidates[n]
+            chosen.append(i)
+            c -= w
+    return chosen
+
+
+def _pack_greedy(fits, slots, budget, placement):
+    """(rank, start minute) of each task placed, most urgent that still fits first"""
+    placed = []
+    while True:
+        idx = fits.first_fit(min(budget, slots.largest()))
+        if idx is None:
+            return placed
+        duration = fits.remove(idx)
+        placed.append((idx, slots.allocate(duration, placement)))
+        budget -= duration
+
+
+def _pack_optimal(ranked_columns, fits, plan_date, daily_minutes, deadline):
+    alive = fits.alive()
+    durations = ranked_columns.durations
+    items = list(zip((int(durations[i]) for i in alive), scores(ranked_columns, plan_date, alive)))
+    picked = solve_knapsack(items, daily_minutes, deadline)
+    if picked is None:
+        return None
+    return [alive[p] for p in picked]
+
+
+def _day_plan(plan_date, start_time, budget, placed, mode):
+    """placed: (task, start minute) pairs in time order; budget: minutes the day had to give"""
+    planned = [PlannedTask(task.id, task.title, order, task.duration, to_time(start))
+               for order, (task, start) in enumerate(placed, 1)]
+    return DayPlan(plan_date, start_time, budget - sum(task.duration for task, _ in placed), planned, mode)
+
+
+class _FitIndex:
+    """Min-duration segment tree over ranked tasks; removed slots hold infinity"""
+
+    def __init__(self, durations):
+        size = 1
+        while size < max(len(durations), 1):
+            size *= 2
+        self._size = size
+        self._tree = [_NO_FIT] * (2 * size)
+        self._tree[size:size + len(durations)] = durations
+        for i in range(size - 1, 0, -1):
+            self._tree[i] = min(self._tree[2 * i], self._tree[2 * i + 1])
+
+    def first_fit(self, limit):
+        """Lowest rank whose duration is <= limit, or None"""
+        tree = self._tree
+        if tree[1] > limit:
+            return None
+        i = 1
+        while i < self._size:
+            i = 2 * i if tree[2 * i] <= limit else 2 * i + 1
+        return i - self._size
+
+    def alive(self):
+        """Ranks that have not been removed yet"""
+        leaves = self._tree[self._size:]
+        return [i for i, duration in enumerate(leaves) if duration != _NO_FIT]
+
+    def remove(self, idx):
+        """Drop a rank from future queries and return its duration"""
+        tree = self._tree
+        i = idx + self._size
+        duration = tree[i]
+        tree[i] = _NO_FIT
+        i //= 2
+        while i:
+            tree[i] = min(tree[2 * i], tree[2 * i + 1])
+            i //= 2
+        return duration
+
+
+def as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value), "%Y-%m-%d").date()
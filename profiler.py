@@ -0,0 +1,197 @@
+"""
+Opt-in sampling profiler for single requests.
+
+An admin adds `?profile=1` (or an `X-Profile: 1` header) to any request.
+While it runs, a background thread samples the stacks working on it
+every PROFILE_INTERVAL_MS, and the result is kept in the collapsed-stack
+format ("frame;frame;frame count" per line) that flamegraph.pl,
+speedscope and inferno read as they are. The response carries an
+X-Profile-Id header; GET /debug/profiles/{id} returns the profile.
+
+Which samples belong to the request:
+
+- on the event loop thread, those whose stack runs through this
+  request's middleware call, so other requests sharing the loop are left
+  out and awaits (an aiomysql round trip) show up as gaps, not samples;
+- on other threads, those whose stack contains the matched endpoint
+  function, i.e. a sync endpoint running in the threadpool. Time spent
+  waiting on MySQL there is sampled inside the driver's socket read.
+
+Work an async endpoint hands to a thread of its own (asyncio.to_thread)
+is not attributed, and a concurrent request to the same sync endpoint
+would be mixed in, so profile on a quiet instance such as staging.
+
+The sampler needs the GIL to take a sample, so CPU-bound Python code is
+sampled about once per switch interval (5 ms) whatever the setting.
+Requests without the flag pay a scan of the query string and headers.
+"""
+
+import asyncio
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
+from urllib.parse import parse_qs
+
+DEFAULT_INTERVAL_MS = 5
+DEFAULT_KEEP = 20
+
+FOLDED_CONTENT_TYPE = "text/plain; charset=utf-8"
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+LOOP_ROOT = "[event loop]"
+THREAD_ROOT = "[threadpool]"
+
+
+def _label(code) -> str:
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _stack_above(frame, stop):
+    """Labels from `stop` (inclusive) up to `frame`, outermost first; None if `stop` is not on the stack"""
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame.f_code))
+        if stop(frame):
+            labels.reverse()
+            return labels
+        frame = frame.f_back
+    return None
+
+
+class Sampler:
+    """Samples the stacks of one request until stopped"""
+
+    def __init__(self, interval: float, loop_thread: int, anchor, endpoint_code):
+        self.interval = interval
+        self.loop_thread = loop_thread
+        self.anchor = anchor                # the request's middleware frame on the event loop
+        self.endpoint_code = endpoint_code  # () -> code object of the matched endpoint, once routed
+        self.stacks = Counter()
+        self.samples = 0
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._done.set()
+        self._thread.join()
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._done.wait(self.interval):
+            self.samples += 1
+            code = self.endpoint_code()
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if ident == self.loop_thread:
+                    labels = _stack_above(frame, lambda f: f is self.anchor)
+                    root = LOOP_ROOT
+                elif code is not None:
+                    labels = _stack_above(frame, lambda f: f.f_code is code)
+                    root = THREAD_ROOT
+                else:
+                    continue
+                if labels is not None:
+                    self.stacks[";".join([root] + labels)] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """The last `keep` profiles in memory, optionally also written to `directory` as <id>.folded"""
+
+    def __init__(self, keep: int = DEFAULT_KEEP, directory: str = None):
+        self.keep = keep
+        self.directory = directory
+        self._profiles = OrderedDict()  # id -> (info, folded text), oldest first
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def add(self, profile_id: str, info: dict, folded: str):
+        with self._lock:
+            self._profiles[profile_id] = (info, folded)
+            while len(self._profiles) > self.keep:
+                self._profiles.popitem(last=False)
+        if self.directory:
+            with open(os.path.join(self.directory, f"{profile_id}.folded"), "w") as f:
+                f.write(folded)
+
+    def get(self, profile_id: str):
+        """Folded stacks, or None"""
+        with self._lock:
+            entry = self._profiles.get(profile_id)
+        return entry[1] if entry else None
+
+    def list(self) -> list:
+        """Info of the kept profiles, newest first"""
+        with self._lock:
+            return [info for info, _ in reversed(self._profiles.values())]
+
+
+def wants_profile(scope) -> bool:
+    query = scope.get("query_string", b"")
+    if b"profile" in query and parse_qs(query.decode("latin-1")).get("profile") == ["1"]:
+        return True
+    return any(name == PROFILE_HEADER and value == b"1" for name, value in scope["headers"])
+
+
+class ProfilerMiddleware:
+    """Profiles flagged requests from callers that authorize(scope) accepts (called in a thread)"""
+
+    def __init__(self, app, store: ProfileStore, authorize, interval_ms: float = DEFAULT_INTERVAL_MS):
+        self.app = app
+        self.store = store
+        self.authorize = authorize
+        self.interval = interval_ms / 1000.0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not wants_profile(scope) or not await asyncio.to_thread(self.authorize, scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = secrets.token_hex(8)
+        status = 500
+
+        def endpoint_code():
+            endpoint = scope.get("endpoint")
+            return getattr(endpoint, "__code__", None)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(PROFILE_ID_HEADER, profile_id.encode())]
+            await send(message)
+
+        sampler = Sampler(self.interval, threading.get_ident(), sys._getframe(), endpoint_code)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            await asyncio.to_thread(sampler.stop)
+            route = scope.get("route")
+            self.store.add(profile_id, {
+                "id": profile_id,
+                "at": datetime.now().isoformat(timespec="seconds"),
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(route, "path", None),
+                "status": status,
+                "duration_ms": round(elapsed * 1000, 2),
+                "interval_ms": self.interval * 1000,
+                "samples": sampler.samples,
+                "stacks": sum(sampler.stacks.values()),
+            }, sampler.folded())
@@ -57,6 +57,42 @@ CREATE TABLE IF NOT EXISTS notifications (
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
+-- Create sessions table (used when SESSION_BACKEND=mysql)
+CREATE TABLE IF NOT EXISTS sessions (
+    token VARCHAR(64) PRIMARY KEY,
+    user_id INT NOT NULL,
+    username VARCHAR(50) NOT NULL,
+    role VARCHAR(20) NOT NULL,
+    expires_at DATETIME NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_sessions_expires (expires_at),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Create user_versions table (per-user change counter behind ETags)
+CREATE TABLE IF NOT EXISTS user_versions (
+    user_id INT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    changes_floor BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Create task_changes table (change feed for GET /tasks/changes)
+CREATE TABLE IF NOT EXISTS task_changes (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    entity VARCHAR(10) NOT NULL,
+    entity_key VARCHAR(20) NOT NULL,
+    deleted BOOLEAN NOT NULL DEFAULT FALSE,
+    version BIGINT NOT NULL,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_task_changes_entity (user_id, entity, entity_key),
+    INDEX idx_task_changes_user_version (user_id, version),
+    INDEX idx_task_changes_changed_at (changed_at),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
 -- Insert default categories
 INSERT IGNORE INTO categories (name, color, user_id) VALUES
 ('General', '#667eea', NULL),
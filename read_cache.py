@@ -0,0 +1,89 @@
+"""
+In-process cache for small, rarely changing reads.
+
+Categories are looked up on almost every page load but change only when
+someone creates one. `ReadCache` keeps them in memory with a per-key TTL
+and LRU eviction; writers call `invalidate` after they commit. With
+several workers, another worker's copy stays stale for at most its TTL,
+so keep TTLs short for anything a request can change, and never cache
+what decides access (passwords, roles).
+
+Hit, miss and eviction counters are reported by stats().
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = 300  # seconds
+DEFAULT_MAX_ENTRIES = 10000
+
+_MISSING = object()
+
+
+class ReadCache:
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value), least recently used first
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl: float = None):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+
+    async def get_or_load(self, key, load, ttl: float = None):
+        """Cached value for key, or await load() and cache its result"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = await load()
+            self.set(key, value, ttl)
+        return value
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 3) if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,215 @@
+"""
+Incremental re-planning for task mutations.
+
+Instead of rebuilding every day through /generate-plan, each mutation
+touches only the plan days it affects: a removed task's slot is dropped
+and the rest of that day is shifted up, and a new (or reopened) task is
+slotted into the first planned day that still has room. Every edit costs
+O(tasks on that day) plus one aggregate over the user's upcoming days.
+The *_batch variants handle many tasks with a fixed number of queries
+plus one load and one rewrite per affected day.
+Given `calendar_for` (see load_calendar), days are re-timed around the
+user's working hours and fixed events, and a task only goes to a day
+with a free interval long enough for it.
+A day holds at most the daily_minutes it was planned with (plan_days);
+the `daily_minutes` argument only applies to days without a recorded
+budget, i.e. planned before plan_days existed.
+All functions run on the caller's cursor, inside its transaction.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from planning_engine import (DEFAULT_DAILY_MINUTES, DEFAULT_DAY_START, as_date, insert_by_rank, rank_key,
+                             reflow_day, to_task)
+from repositories import AvailabilityRepository, EventRepository, PlanRepository
+from slots import WorkCalendar
+
+DAY_TASKS_SQL = """
+    SELECT t.id, t.deadline, t.duration_minutes, t.priority, t.title, d.scheduled_time
+    FROM daily_plan d
+    JOIN tasks t ON t.id = d.task_id
+    WHERE d.user_id = %s AND d.plan_date = %s
+    ORDER BY d.task_order
+"""
+
+
+def as_time(value, default: time = DEFAULT_DAY_START) -> time:
+    """pymysql returns TIME columns as timedelta; normalize to datetime.time"""
+    if value is None:
+        return default
+    if isinstance(value, timedelta):
+        return (datetime.min + value).time()
+    if isinstance(value, str):
+        return time.fromisoformat(value)
+    return value
+
+
+def load_calendar(cur, user_id: int, first_day: date, last_day: date, day_start: time = DEFAULT_DAY_START,
+                  daily_minutes: int = DEFAULT_DAILY_MINUTES, placement: str = "earliest"):
+    """The user's WorkCalendar for first_day..last_day, or None if they have no windows and no events then"""
+    windows = AvailabilityRepository(cur).for_user(user_id)
+    events = EventRepository(cur).between(user_id, datetime.combine(first_day, time()),
+                                          datetime.combine(last_day + timedelta(days=1), time()))
+    if not windows and not events:
+        return None
+    return WorkCalendar.from_rows(windows, [(start, end) for _, _, start, end in events], day_start, daily_minutes,
+                                  placement)
+
+
+def day_budgets(cur, user_id: int, first_day: date, daily_minutes: int):
+    """{plan_date: daily_minutes} recorded from first_day on; other days get `daily_minutes` (a defaultdict)"""
+    budgets = defaultdict(lambda: daily_minutes)
+    budgets.update((as_date(plan_date), int(minutes))
+                   for plan_date, minutes in PlanRepository(cur).budgets(user_id, first_day))
+    return budgets
+
+
+def load_day(cur, user_id: int, plan_date: date):
+    """Tasks planned for one day in order, plus the time the day starts"""
+    cur.execute(DAY_TASKS_SQL, (user_id, plan_date))
+    rows = cur.fetchall()
+    day_start = min((as_time(r[5]) for r in rows if r[5] is not None), default=DEFAULT_DAY_START)
+    return [to_task(r) for r in rows], day_start
+
+
+def write_day(cur, user_id: int, plan_date: date, tasks, daily_minutes: int, day_start: time,
+              calendar: WorkCalendar = None):
+    """Replace one day's plan rows with tasks in order, with shifted start times"""
+    day = reflow_day(plan_date, tasks, daily_minutes=daily_minutes, day_start=day_start, calendar=calendar)
+    cur.execute("DELETE FROM daily_plan WHERE user_id = %s AND plan_date = %s", (user_id, plan_date))
+    if day.tasks:
+        cur.executemany(
+            "INSERT INTO daily_plan (task_id, plan_date, task_order, user_id, scheduled_time) VALUES (%s, %s, %s, %s, %s)",
+            [(item.task_id, plan_date, item.order, user_id, item.scheduled_time) for item in day.tasks]
+        )
+    return day
+
+
+def unplan_task(cur, user_id: int, task_id: int, daily_minutes: int, today: date = None, calendar_for=None):
+    """Drop a task from today's and upcoming plans and close the gaps it leaves; returns touched dates"""
+    return unplan_task_batch(cur, user_id, [task_id], daily_minutes, today, calendar_for)
+
+
+def unplan_task_batch(cur, user_id: int, task_ids, daily_minutes: int, today: date = None, calendar_for=None):
+    """unplan_task for many tasks at once; each affected day is rewritten once"""
+    today = today or date.today()
+    task_ids = set(task_ids)
+    if not task_ids:
+        return []
+    cur.execute(
+        f"SELECT DISTINCT plan_date FROM daily_plan WHERE user_id = %s AND plan_date >= %s "
+        f"AND task_id IN ({', '.join(['%s'] * len(task_ids))})",
+        (user_id, today, *task_ids)
+    )
+    affected = sorted(as_date(row[0]) for row in cur.fetchall())
+    if not affected:
+        return []
+    calendar = calendar_for(cur, user_id, affected[0], affected[-1]) if calendar_for else None
+    budgets = day_budgets(cur, user_id, affected[0], daily_minutes)
+    for plan_date in affected:
+        tasks, day_start = load_day(cur, user_id, plan_date)
+        write_day(cur, user_id, plan_date, [t for t in tasks if t.id not in task_ids], budgets[plan_date],
+                  day_start, calendar)
+    return affected
+
+
+def plan_task(cur, user_id: int, task_id: int, daily_minutes: int, today: date = None, calendar_for=None):
+    """Slot a pending task into the first upcoming planned day with room; returns the date or None"""
+    return plan_task_batch(cur, user_id, [task_id], daily_minutes, today, calendar_for).get(task_id)
+
+
+def plan_task_batch(cur, user_id: int, task_ids, daily_minutes: int, today: date = None, calendar_for=None):
+    """plan_task for many tasks at once, most urgent first; returns {task_id: date} for those placed"""
+    today = today or date.today()
+    task_ids = set(task_ids)
+    if not task_ids:
+        return {}
+    marks = ", ".join(["%s"] * len(task_ids))
+    cur.execute(
+        f"SELECT id, deadline, duration_minutes, priority, title FROM tasks WHERE status = 'pending' AND id IN ({marks})",
+        tuple(task_ids)
+    )
+    tasks = sorted((to_task(row) for row in cur.fetchall()), key=lambda t: rank_key(t, today))
+    if not tasks:
+        return {}
+
+    # Only days the user already has a plan for; unplanned days wait for /generate-plan
+    cur.execute("""
+        SELECT d.plan_date, SUM(t.duration_minutes)
+        FROM daily_plan d
+        JOIN tasks t ON t.id = d.task_id
+        WHERE d.user_id = %s AND d.plan_date >= %s
+        GROUP BY d.plan_date
+        ORDER BY d.plan_date
+    """, (user_id, today))
+    used = {as_date(plan_date): int(minutes) for plan_date, minutes in cur.fetchall()}
+    if not used:
+        return {}
+    cur.execute(
+        f"SELECT DISTINCT task_id FROM daily_plan WHERE user_id = %s AND plan_date >= %s AND task_id IN ({marks})",
+        (user_id, today, *task_ids)
+    )
+    already = {row[0] for row in cur.fetchall()}
+    calendar = calendar_for(cur, user_id, min(used), max(used)) if calendar_for else None
+    budgets = day_budgets(cur, user_id, today, daily_minutes)
+
+    days = {}  # plan_date -> (tasks, day_start), loaded on first use
+    placed = {}
+    for task in tasks:
+        if task.id in already:
+            continue
+        for plan_date in used:
+            budget = budgets[plan_date]
+            if used[plan_date] + task.duration > budget:
+                continue
+            if plan_date not in days:
+                days[plan_date] = load_day(cur, user_id, plan_date)
+            day_tasks, day_start = days[plan_date]
+            updated = insert_by_rank(day_tasks, task, plan_date, budget)
+            if updated is not None and calendar is not None \
+                    and len(reflow_day(plan_date, updated, budget, day_start, calendar=calendar).tasks) < len(updated):
+                # Minutes to spare, but no free interval long enough once the day is re-timed
+                updated = None
+            if updated is not None:
+                days[plan_date] = (updated, day_start)
+                used[plan_date] += task.duration
+                placed[task.id] = plan_date
+                break
+
+    for plan_date in sorted(set(placed.values())):
+        day_tasks, day_start = days[plan_date]
+        write_day(cur, user_id, plan_date, day_tasks, budgets[plan_date], day_start, calendar)
+    return placed
+
+
+def retime_days(cur, user_id: int, daily_minutes: int, first_day: date, last_day: date = None, today: date = None,
+                calendar_for=None):
+    """
+    Re-time upcoming planned days in [first_day, last_day] after the user's
+    working hours or events changed. Tasks that no longer fit their day
+    move to the next one with room, or wait for /generate-plan. Returns
+    touched dates.
+    """
+    today = today or date.today()
+    first_day = max(first_day, today)
+    if last_day is not None and last_day < first_day:
+        return []
+    cur.execute(
+        "SELECT DISTINCT plan_date FROM daily_plan WHERE user_id = %s AND plan_date >= %s"
+        + (" AND plan_date <= %s" if last_day is not None else ""),
+        (user_id, first_day) + ((last_day,) if last_day is not None else ())
+    )
+    affected = sorted(as_date(row[0]) for row in cur.fetchall())
+    if not affected:
+        return []
+    calendar = calendar_for(cur, user_id, affected[0], affected[-1]) if calendar_for else None
+    budgets = day_budgets(cur, user_id, affected[0], daily_minutes)
+    bumped = []
+    for plan_date in affected:
+        tasks, day_start = load_day(cur, user_id, plan_date)
+        day = write_day(cur, user_id, plan_date, tasks, budgets[plan_date], day_start, calendar)
+        kept = {item.task_id for item in day.tasks}
+        bumped += [t.id for t in tasks if t.id not in kept]
+    placed = plan_task_batch(cur, user_id, bumped, daily_minutes, today, calendar_for)
+    return sorted(set(affected) | set(placed.values()))
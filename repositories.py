@@ -0,0 +1,344 @@
+"""
+Data access for the Smart Planner API, one repository per table.
+
+Repositories wrap the caller's cursor and run inside its transaction,
+like replanner and change_log; committing is up to the caller. The SQL
+is written once in the MySQL dialect and runs unchanged on either
+storage backend (see storage.py).
+
+The read queries that the async path sends through AsyncDatabase are
+module constants (or *_query functions returning SQL and parameters), so
+both paths share one copy of every statement.
+"""
+
+from datetime import date
+from typing import List
+
+# Read queries shared by the sync and async paths
+USER_BY_NAME_SQL = "SELECT id, username, password_hash, role FROM users WHERE username = %s"
+
+USER_VERSION_SQL = "SELECT version FROM user_versions WHERE user_id = %s"
+VERSION_AND_FLOOR_SQL = "SELECT version, changes_floor FROM user_versions WHERE user_id = %s"
+
+GLOBAL_CATEGORIES_SQL = "SELECT id, name, color FROM categories WHERE user_id IS NULL"
+USER_CATEGORIES_SQL = "SELECT id, name, color FROM categories WHERE user_id = %s"
+
+TASK_COLUMNS = "id, title, deadline, duration_minutes, priority, status, category, completed_at"
+
+CHANGES_SQL = """
+    SELECT entity, entity_key, deleted
+    FROM task_changes
+    WHERE user_id = %s AND version > %s
+    ORDER BY version
+    LIMIT %s
+"""
+
+PLAN_BY_DATE_SQL = """
+    SELECT t.title, d.task_order, t.duration_minutes, t.priority, t.deadline, d.scheduled_time, t.id
+    FROM daily_plan d
+    JOIN tasks t ON t.id = d.task_id
+    WHERE d.plan_date = %s AND d.user_id = %s
+    ORDER BY d.task_order
+"""
+
+CALENDAR_SQL = """
+    SELECT
+        d.plan_date,
+        t.id,
+        t.title,
+        t.duration_minutes,
+        t.priority,
+        t.deadline,
+        d.scheduled_time,
+        t.category,
+        t.status
+    FROM daily_plan d
+    JOIN tasks t ON t.id = d.task_id
+    WHERE d.plan_date BETWEEN %s AND %s AND d.user_id = %s
+    ORDER BY d.plan_date, d.task_order
+"""
+
+NOTIFICATIONS_SQL = """
+    SELECT id, message, type, read_status, created_at
+    FROM notifications
+    WHERE user_id = %s
+    ORDER BY created_at DESC
+    LIMIT 50
+"""
+
+UNREAD_NOTIFICATIONS_SQL = """
+    SELECT id, message, type, read_status, created_at
+    FROM notifications
+    WHERE user_id = %s AND read_status = FALSE
+    ORDER BY created_at DESC
+    LIMIT 50
+"""
+
+UNREAD_COUNT_SQL = "SELECT COUNT(*) FROM notifications WHERE user_id = %s AND read_status = FALSE"
+
+INSERT_TASK_SQL = """
+    INSERT INTO tasks (title, deadline, duration_minutes, priority, user_id, category)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+INSERT_PLAN_SQL = """
+    INSERT INTO daily_plan (task_id, plan_date, task_order, user_id, scheduled_time)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+AVAILABILITY_SQL = """
+    SELECT weekday, start_time, end_time
+    FROM availability
+    WHERE user_id = %s
+    ORDER BY weekday, start_time
+"""
+
+# Events overlapping [from, to)
+EVENTS_SQL = """
+    SELECT id, title, start_at, end_at
+    FROM fixed_events
+    WHERE user_id = %s AND end_at > %s AND start_at < %s
+    ORDER BY start_at
+"""
+
+
+def placeholders(values) -> str:
+    return ", ".join(["%s"] * len(values))
+
+
+def task_list_query(user_id: int = None, status: str = None, category: str = None, deadline_from: date = None,
+                    deadline_to: date = None, after=None, limit: int = None):
+    """
+    SELECT for GET /tasks, ordered by deadline then id; `after` is the
+    (deadline, id) of the last row already returned (keyset pagination)
+    """
+    conditions = []
+    params = []
+    if user_id is not None:
+        conditions.append("user_id = %s")
+        params.append(user_id)
+    if status:
+        conditions.append("status = %s")
+        params.append(status)
+    if category:
+        conditions.append("category = %s")
+        params.append(category)
+    if deadline_from:
+        conditions.append("deadline >= %s")
+        params.append(deadline_from)
+    if deadline_to:
+        conditions.append("deadline <= %s")
+        params.append(deadline_to)
+
+    # Continue strictly after the last row of the previous page (NULL deadlines sort first)
+    if after:
+        after_deadline, after_id = after
+        if after_deadline is None:
+            conditions.append("((deadline IS NULL AND id > %s) OR deadline IS NOT NULL)")
+            params.append(after_id)
+        else:
+            conditions.append("(deadline > %s OR (deadline = %s AND id > %s))")
+            params.extend([after_deadline, after_deadline, after_id])
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    sql = f"SELECT {TASK_COLUMNS} FROM tasks {where} ORDER BY deadline, id"
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    return sql, params
+
+
+def tasks_by_ids_query(user_id: int, task_ids: List[int]):
+    return f"SELECT {TASK_COLUMNS} FROM tasks WHERE user_id = %s AND id IN ({placeholders(task_ids)})", \
+        (user_id, *task_ids)
+
+
+def plans_by_dates_query(user_id: int, plan_dates: List[str]):
+    """Plan items for several days, each row led by its plan_date"""
+    return f"""
+        SELECT d.plan_date, t.title, d.task_order, t.duration_minutes, t.priority, t.deadline, d.scheduled_time, t.id
+        FROM daily_plan d
+        JOIN tasks t ON t.id = d.task_id
+        WHERE d.user_id = %s AND d.plan_date IN ({placeholders(plan_dates)})
+        ORDER BY d.plan_date, d.task_order
+    """, (user_id, *plan_dates)
+
+
+class Repository:
+    def __init__(self, cur):
+        self.cur = cur
+
+
+class UserRepository(Repository):
+    def by_username(self, username: str):
+        """(id, username, password_hash, role) or None"""
+        self.cur.execute(USER_BY_NAME_SQL, (username,))
+        return self.cur.fetchone()
+
+    def create(self, username: str, password_hash: str, role: str = "user") -> int:
+        self.cur.execute(
+            "INSERT INTO users (username, password_hash, role) VALUES (%s, %s, %s)",
+            (username, password_hash, role)
+        )
+        return self.cur.lastrowid
+
+    def delete_by_username(self, usernames: List[str]):
+        """Tasks, plans, categories and notifications go with them (FK cascade)"""
+        if usernames:
+            self.cur.execute(f"DELETE FROM users WHERE username IN ({placeholders(usernames)})", list(usernames))
+
+
+class TaskRepository(Repository):
+    def create(self, title: str, deadline, duration_minutes: int, priority: int, user_id: int,
+               category: str = "General") -> int:
+        self.cur.execute(INSERT_TASK_SQL, (title, deadline, duration_minutes, priority, user_id, category))
+        return self.cur.lastrowid
+
+    def create_many(self, rows):
+        """rows of (title, deadline, duration_minutes, priority, user_id, category)"""
+        # pymysql rewrites executemany on INSERT ... VALUES into multi-row INSERTs
+        self.cur.executemany(INSERT_TASK_SQL, rows)
+
+    def get(self, task_id: int):
+        """(id, title, user_id) or None"""
+        self.cur.execute("SELECT id, title, user_id FROM tasks WHERE id = %s", (task_id,))
+        return self.cur.fetchone()
+
+    def owners(self, task_ids: List[int]) -> dict:
+        """{owner user_id: [task ids]} for the ids that exist"""
+        self.cur.execute(f"SELECT id, user_id FROM tasks WHERE id IN ({placeholders(task_ids)})", list(task_ids))
+        owners = {}
+        for task_id, user_id in self.cur.fetchall():
+            owners.setdefault(user_id, []).append(task_id)
+        return owners
+
+    def complete(self, task_ids: List[int]):
+        self.cur.execute(
+            f"UPDATE tasks SET status = 'completed', completed_at = NOW() WHERE id IN ({placeholders(task_ids)})",
+            list(task_ids)
+        )
+
+    def reopen(self, task_ids: List[int]):
+        self.cur.execute(
+            f"UPDATE tasks SET status = 'pending', completed_at = NULL WHERE id IN ({placeholders(task_ids)})",
+            list(task_ids)
+        )
+
+    def delete(self, task_ids: List[int]):
+        """Their plan rows go with them (FK cascade)"""
+        self.cur.execute(f"DELETE FROM tasks WHERE id IN ({placeholders(task_ids)})", list(task_ids))
+
+    def pending(self, user_id: int, unplanned_after=None):
+        """
+        (id, deadline, duration_minutes, priority, title) for every pending
+        task, as the planner takes them; with unplanned_after, not those
+        already planned on a later date
+        """
+        if unplanned_after is None:
+            self.cur.execute("""
+                SELECT t.id, t.deadline, t.duration_minutes, t.priority, t.title
+                FROM tasks t
+                WHERE t.status='pending' AND t.user_id = %s
+            """, (user_id,))
+        else:
+            self.cur.execute("""
+                SELECT t.id, t.deadline, t.duration_minutes, t.priority, t.title
+                FROM tasks t
+                WHERE t.status='pending' AND t.user_id = %s
+                  AND NOT EXISTS (SELECT 1 FROM daily_plan d WHERE d.task_id = t.id AND d.plan_date > %s)
+            """, (user_id, unplanned_after))
+        return self.cur.fetchall()
+
+
+class PlanRepository(Repository):
+    def for_date(self, user_id: int, plan_date):
+        self.cur.execute(PLAN_BY_DATE_SQL, (plan_date, user_id))
+        return self.cur.fetchall()
+
+    def clear(self, user_id: int, first_day: date, last_day: date):
+        """Plan rows and day budgets in the range"""
+        self.cur.execute(
+            "DELETE FROM daily_plan WHERE user_id = %s AND plan_date BETWEEN %s AND %s",
+            (user_id, first_day, last_day)
+        )
+        self.cur.execute(
+            "DELETE FROM plan_days WHERE user_id = %s AND plan_date BETWEEN %s AND %s",
+            (user_id, first_day, last_day)
+        )
+
+    def set_budgets(self, user_id: int, plan_dates, daily_minutes: int):
+        """Record the daily_minutes these (cleared) days were planned with"""
+        rows = [(user_id, plan_date, daily_minutes) for plan_date in plan_dates]
+        if rows:
+            self.cur.executemany(
+                "INSERT INTO plan_days (user_id, plan_date, daily_minutes) VALUES (%s, %s, %s)", rows
+            )
+
+    def budgets(self, user_id: int, first_day: date):
+        """(plan_date, daily_minutes) of days from first_day that have a recorded budget"""
+        self.cur.execute(
+            "SELECT plan_date, daily_minutes FROM plan_days WHERE user_id = %s AND plan_date >= %s",
+            (user_id, first_day)
+        )
+        return self.cur.fetchall()
+
+    def add_many(self, rows):
+        """rows of (task_id, plan_date, task_order, user_id, scheduled_time)"""
+        if rows:
+            self.cur.executemany(INSERT_PLAN_SQL, rows)
+
+
+class CategoryRepository(Repository):
+    def create(self, name: str, color: str, user_id: int) -> int:
+        """Raises IntegrityError if the name is taken"""
+        self.cur.execute("INSERT INTO categories (name, color, user_id) VALUES (%s, %s, %s)", (name, color, user_id))
+        return self.cur.lastrowid
+
+
+class NotificationRepository(Repository):
+    def mark_read(self, notification_id: int, user_id: int):
+        self.cur.execute("""
+            UPDATE notifications
+            SET read_status = TRUE
+            WHERE id = %s AND user_id = %s
+        """, (notification_id, user_id))
+
+    def delete(self, notification_id: int, user_id: int):
+        self.cur.execute("""
+            DELETE FROM notifications
+            WHERE id = %s AND user_id = %s
+        """, (notification_id, user_id))
+
+
+class AvailabilityRepository(Repository):
+    def for_user(self, user_id: int):
+        """(weekday, start_time, end_time) windows"""
+        self.cur.execute(AVAILABILITY_SQL, (user_id,))
+        return self.cur.fetchall()
+
+    def replace(self, user_id: int, windows):
+        """windows of (weekday, start_time, end_time); empty goes back to the default day"""
+        self.cur.execute("DELETE FROM availability WHERE user_id = %s", (user_id,))
+        if windows:
+            self.cur.executemany(
+                "INSERT INTO availability (user_id, weekday, start_time, end_time) VALUES (%s, %s, %s, %s)",
+                [(user_id, *window) for window in windows]
+            )
+
+
+class EventRepository(Repository):
+    def between(self, user_id: int, start, end):
+        """(id, title, start_at, end_at) of the events overlapping [start, end)"""
+        self.cur.execute(EVENTS_SQL, (user_id, start, end))
+        return self.cur.fetchall()
+
+    def create(self, user_id: int, title: str, start_at, end_at) -> int:
+        self.cur.execute(
+            "INSERT INTO fixed_events (user_id, title, start_at, end_at) VALUES (%s, %s, %s, %s)",
+            (user_id, title, start_at, end_at)
+        )
+        return self.cur.lastrowid
+
+    def delete(self, event_id: int, user_id: int) -> bool:
+        self.cur.execute("DELETE FROM fixed_events WHERE id = %s AND user_id = %s", (event_id, user_id))
+        return self.cur.rowcount > 0
@@ -0,0 +1,92 @@
+"""
+Columnar urgency scoring and ranking for the planning engine.
+
+A backlog is held as parallel columns (ids, deadline ordinals, durations,
+priorities) rather than one tuple per task, so ranking and scoring are a
+few whole-column operations. With NumPy installed the columns are int64
+arrays: the ranking is one lexsort over (urgency, -priority, duration,
+id), and a day's knapsack values come out of a single vectorized
+expression. Without NumPy, or for backlogs too small to pay for building
+the arrays (VECTORIZE_MIN_ROWS), the same functions run on plain lists.
+Both paths give identical rankings and values.
+"""
+
+try:
+    import numpy
+except ImportError:  # optional: pure-Python columns
+    numpy = None
+
+VECTORIZE_MIN_ROWS = 256
+
+
+class TaskColumns:
+    """Parallel columns over a list of planning_engine.Task"""
+    __slots__ = ("ids", "deadlines", "durations", "priorities", "vectorized")
+
+    def __init__(self, ids, deadlines, durations, priorities, vectorized: bool):
+        self.ids = ids
+        self.deadlines = deadlines  # date.toordinal()
+        self.durations = durations
+        self.priorities = priorities
+        self.vectorized = vectorized
+
+    @classmethod
+    def from_tasks(cls, tasks, vectorized: bool = None):
+        """vectorized=None uses NumPy when it is installed and the backlog is large enough"""
+        if vectorized is None:
+            vectorized = numpy is not None and len(tasks) >= VECTORIZE_MIN_ROWS
+        if not vectorized:
+            return cls([t.id for t in tasks], [t.deadline.toordinal() for t in tasks],
+                       [t.duration for t in tasks], [t.priority for t in tasks], False)
+        count = len(tasks)
+
+        def column(values):
+            return numpy.fromiter(values, dtype=numpy.int64, count=count)
+
+        return cls(column(t.id for t in tasks), column(t.deadline.toordinal() for t in tasks),
+                   column(t.duration for t in tasks), column(t.priority for t in tasks), True)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def take(self, order) -> "TaskColumns":
+        """Columns reordered (or subset) by row positions"""
+        if self.vectorized:
+            order = numpy.asarray(order, dtype=numpy.intp)
+            return TaskColumns(self.ids[order], self.deadlines[order], self.durations[order],
+                               self.priorities[order], True)
+        return TaskColumns([self.ids[i] for i in order], [self.deadlines[i] for i in order],
+                           [self.durations[i] for i in order], [self.priorities[i] for i in order], False)
+
+
+def days_until(columns: TaskColumns, plan_date):
+    """Days from plan_date to each deadline (negative when overdue)"""
+    today = plan_date.toordinal()
+    if columns.vectorized:
+        return columns.deadlines - today
+    return [deadline - today for deadline in columns.deadlines]
+
+
+def rank(columns: TaskColumns, plan_date) -> list:
+    """Row positions ordered like planning_engine.rank_key: most urgent, highest priority, shortest, lowest id"""
+    if columns.vectorized:
+        # lexsort sorts by its last key first
+        return numpy.lexsort((columns.ids, columns.durations, -columns.priorities,
+                              days_until(columns, plan_date))).tolist()
+    days = days_until(columns, plan_date)
+    ids, durations, priorities = columns.ids, columns.durations, columns.priorities
+    return sorted(range(len(ids)), key=lambda i: (days[i], -priorities[i], durations[i], ids[i]))
+
+
+def scores(columns: TaskColumns, plan_date, rows=None) -> list:
+    """planning_engine.task_value for each row (or the given row positions), as floats"""
+    if columns.vectorized:
+        if rows is not None:
+            columns = columns.take(rows)
+        days = days_until(columns, plan_date)
+        urgency = 1 + 1 / numpy.maximum(days + 1, 1)
+        return (columns.priorities * columns.durations * urgency).tolist()
+    days = days_until(columns, plan_date)
+    rows = range(len(days)) if rows is None else rows
+    priorities, durations = columns.priorities, columns.durations
+    return [priorities[i] * durations[i] * (1 + 1 / max(days[i] + 1, 1)) for i in rows]
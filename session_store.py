@@ -0,0 +1,152 @@
+"""
+Session backends for the Smart Planner API.
+
+`MemorySessionStore` keeps sessions in-process with LRU eviction and a
+TTL, which is fine for a single uvicorn worker. `MySQLSessionStore`
+keeps them in a `sessions` table so several workers (or a restarted
+one) share logins, with a short per-process cache in front so auth does
+not cost a DB round trip on every request.
+
+Pick one with SESSION_BACKEND=memory|mysql.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+DEFAULT_TTL = 7 * 24 * 3600     # a login lasts a week
+DEFAULT_CACHE_TTL = 30          # seconds a worker trusts its local copy
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class SessionStore:
+    """Interface shared by all session backends"""
+
+    def get(self, token: str):
+        raise NotImplementedError
+
+    def set(self, token: str, session: dict):
+        raise NotImplementedError
+
+    def delete(self, token: str):
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # token -> (expires_at, session), least recently used first
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return entry[1]
+
+    def set(self, token, session, ttl: float = None):
+        with self._lock:
+            self._entries[token] = (time.monotonic() + (self.ttl if ttl is None else ttl), session)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, token):
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class MySQLSessionStore(SessionStore):
+    PURGE_INTERVAL = 600  # seconds between expired-row cleanups per worker
+
+    def __init__(self, pool, ttl: float = DEFAULT_TTL, cache_ttl: float = DEFAULT_CACHE_TTL,
+                 max_cached: int = DEFAULT_MAX_ENTRIES):
+        self.pool = pool
+        self.ttl = ttl
+        # Logouts on other workers reach this cache after at most cache_ttl seconds
+        self._cache = MemorySessionStore(ttl=cache_ttl, max_entries=max_cached)
+        self._table_ready = False
+        self._last_purge = 0.0
+
+    def get(self, token):
+        session = self._cache.get(token)
+        if session is not None:
+            return session
+        row = self._run(
+            "SELECT user_id, username, role FROM sessions WHERE token = %s AND expires_at > %s",
+            (token, datetime.now()),
+            fetch=True
+        )
+        if not row:
+            return None
+        session = {"user_id": row[0], "username": row[1], "role": row[2]}
+        self._cache.set(token, session)
+        return session
+
+    def set(self, token, session):
+        now = datetime.now()
+        self._run(
+            "INSERT INTO sessions (token, user_id, username, role, expires_at) VALUES (%s, %s, %s, %s, %s)",
+            (token, session["user_id"], session["username"], session["role"], now + timedelta(seconds=self.ttl))
+        )
+        self._cache.set(token, session)
+        if time.monotonic() - self._last_purge > self.PURGE_INTERVAL:
+            self._last_purge = time.monotonic()
+            self._run("DELETE FROM sessions WHERE expires_at <= %s", (now,))
+
+    def delete(self, token):
+        self._cache.delete(token)
+        self._run("DELETE FROM sessions WHERE token = %s", (token,))
+
+    def _run(self, sql, params, fetch=False):
+        conn = self.pool.acquire()
+        try:
+            cur = conn.cursor()
+            if not self._table_ready:
+                self._ensure_table(cur)
+            cur.execute(sql, params)
+            result = cur.fetchone() if fetch else None
+            conn.commit()
+        except BaseException:
+            self.pool.release(conn, rollback=True)
+            raise
+        self.pool.release(conn)
+        return result
+
+    def _ensure_table(self, cur):
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                token VARCHAR(64) PRIMARY KEY,
+                user_id INT NOT NULL,
+                username VARCHAR(50) NOT NULL,
+                role VARCHAR(20) NOT NULL,
+                expires_at DATETIME NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                INDEX idx_sessions_expires (expires_at),
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+            )
+        """)
+        self._table_ready = True
+
+
+def create_session_store(pool, backend: str = None) -> SessionStore:
+    """Build the backend selected by SESSION_BACKEND (memory by default)"""
+    backend = backend or os.getenv("SESSION_BACKEND", "memory")
+    ttl = float(os.getenv("SESSION_TTL_SECONDS", str(DEFAULT_TTL)))
+    if backend == "memory":
+        return MemorySessionStore(ttl=ttl, max_entries=int(os.getenv("SESSION_MAX_ENTRIES", str(DEFAULT_MAX_ENTRIES))))
+    if backend == "mysql":
+        return MySQLSessionStore(pool, ttl=ttl,
+                                 cache_ttl=float(os.getenv("SESSION_CACHE_SECONDS", str(DEFAULT_CACHE_TTL))))
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
@@ -1,14 +1,9 @@
-import pymysql
 import hashlib
 
-# Connect to database
-conn = pymysql.connect(
-    host="localhost",
-    port=3306,
-    database="smartplanner",
-    user="root",
-    password=""
-)
+from api import get_db_connection
+
+# Connect to database (DB_BACKEND and DB_* environment variables, as the API)
+conn = get_db_connection()
 
 cur = conn.cursor()
 
@@ -0,0 +1,291 @@
+"""
+Time-slot allocation within working hours and around fixed events.
+
+A user's week is a set of availability windows per weekday (09:00-12:00
+and 13:00-17:30, say), and fixed events (meetings, appointments) block
+time on particular dates. `WorkCalendar.free(plan_date)` subtracts the
+day's events from its windows and returns a `DaySlots`: the free
+intervals in order, with a max-length segment tree over them. A task is
+placed whole at the start of a free interval, chosen by
+
+- earliest-fit: the first interval long enough (a descent of the
+  segment tree, O(log n)), which packs the day from the morning;
+- best-fit: the shortest interval long enough (a descent of a count
+  tree over lengths in minutes, O(log L) for L the day's longest
+  interval), which keeps long gaps for long tasks.
+
+Placing at the start of an interval only ever shrinks it, so a day never
+has more intervals than it started with. Busy time for the whole horizon
+is merged into disjoint sorted intervals once, so finding a day's events
+is a bisect however many there are.
+
+A user without availability rows gets one window a day starting at
+day_start and daily_minutes long, which schedules exactly like the old
+single contiguous block. All times are integer minutes; a day's are
+minutes since its midnight.
+"""
+
+import heapq
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta
+
+MINUTES_PER_DAY = 24 * 60
+
+PLACEMENTS = ("earliest", "best")
+
+_PADDING = -1  # segment tree leaves past the last interval
+
+
+def to_minutes(value) -> int:
+    """time or timedelta (how pymysql returns TIME) -> minutes since midnight"""
+    if isinstance(value, timedelta):
+        return int(value.total_seconds()) // 60
+    return value.hour * 60 + value.minute
+
+
+def to_time(minutes: int) -> time:
+    minutes %= MINUTES_PER_DAY
+    return time(minutes // 60, minutes % 60)
+
+
+def _absolute(moment: datetime) -> int:
+    return moment.date().toordinal() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def merge_intervals(intervals):
+    """Sorted, disjoint union of (start, end) pairs; empty ones are dropped"""
+    merged = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(windows, busy):
+    """Parts of sorted disjoint `windows` not covered by sorted disjoint `busy`"""
+    free = []
+    b = 0
+    for start, end in windows:
+        while b < len(busy) and busy[b][1] <= start:
+            b += 1
+        cursor = start
+        i = b
+        while i < len(busy) and busy[i][0] < end:
+            if busy[i][0] > cursor:
+                free.append((cursor, busy[i][0]))
+            cursor = max(cursor, busy[i][1])
+            i += 1
+        if cursor < end:
+            free.append((cursor, end))
+    return free
+
+
+class DaySlots:
+    """Free intervals of one day; allocate() books time at the start of one of them"""
+
+    def __init__(self, intervals):
+        # intervals: sorted, disjoint (start, end) minutes
+        self._starts = [start for start, _ in intervals]
+        self._ends = [end for _, end in intervals]
+        size = 1
+        while size < max(len(intervals), 1):
+            size *= 2
+        self._size = size
+        self._tree = [_PADDING] * (2 * size)
+        for i, (start, end) in enumerate(intervals):
+            self._tree[size + i] = end - start
+        for i in range(size - 1, 0, -1):
+            self._tree[i] = max(self._tree[2 * i], self._tree[2 * i + 1])
+        self._by_length = None  # _LengthIndex, built on the first best-fit
+        self.free_minutes = sum(end - start for start, end in intervals)
+
+    @property
+    def first_start(self):
+        """Start of the day's first free interval, or None"""
+        return self._starts[0] if self._starts else None
+
+    def largest(self) -> int:
+        """Length of the longest free interval (-1 when there are none, so even a 0-minute task does not fit)"""
+        return self._tree[1]
+
+    def allocate(self, duration: int, placement: str = "earliest"):
+        """Book `duration` minutes; returns the start minute, or None if no interval is long enough"""
+        if duration < 0:
+            raise ValueError(f"duration must not be negative: {duration}")
+        idx = self._earliest(duration) if placement == "earliest" else self._best(duration)
+        if idx is None:
+            return None
+        start = self._starts[idx]
+        self._shrink(idx, duration)
+        return start
+
+    def intervals(self):
+        """Free (start, end) intervals left"""
+        return [(s, e) for s, e in zip(self._starts, self._ends) if e > s]
+
+    def _earliest(self, duration):
+        tree = self._tree
+        if tree[1] < duration:
+            return None
+        i = 1
+        while i < self._size:
+            i = 2 * i if tree[2 * i] >= duration else 2 * i + 1
+        return i - self._size
+
+    def _best(self, duration):
+        if self._by_length is None:
+            self._by_length = _LengthIndex([end - start for start, end in zip(self._starts, self._ends)])
+        return self._by_length.shortest(duration)
+
+    def _shrink(self, idx, duration):
+        if duration <= 0:
+            return
+        length = self._ends[idx] - self._starts[idx]
+        self._starts[idx] += duration
+        self.free_minutes -= duration
+        if self._by_length is not None:
+            self._by_length.move(idx, length, length - duration)
+        i = idx + self._size
+        self._tree[i] = length - duration
+        i //= 2
+        while i:
+            self._tree[i] = max(self._tree[2 * i], self._tree[2 * i + 1])
+            i //= 2
+
+
+class _LengthIndex:
+    """
+    Free intervals by length: a count per length in minutes, summed up a
+    segment tree, plus a heap of interval indices per length. Lengths only
+    shrink, so an index left in an old length's heap is stale for good and
+    is dropped when it reaches the top.
+    """
+
+    def __init__(self, lengths):
+        size = 1
+        while size <= max(lengths, default=0):
+            size *= 2
+        self._size = size
+        self._counts = [0] * (2 * size)
+        self._lengths = list(lengths)
+        self._heaps = {}
+        # Indices go in ascending, so each heap starts out sorted
+        for idx, length in enumerate(lengths):
+            if length > 0:
+                self._heaps.setdefault(length, []).append(idx)
+                self._add(length, 1)
+
+    def shortest(self, duration):
+        """Lowest index among the shortest intervals at least `duration` long, or None"""
+        length = self._first_at_least(max(duration, 1))
+        if length is None:
+            return None
+        heap = self._heaps[length]
+        while self._lengths[heap[0]] != length:
+            heapq.heappop(heap)
+        return heap[0]
+
+    def move(self, idx, old, new):
+        self._lengths[idx] = new
+        if old > 0:
+            self._add(old, -1)
+        if new > 0:
+            heapq.heappush(self._heaps.setdefault(new, []), idx)
+            self._add(new, 1)
+
+    def _add(self, length, delta):
+        i = self._size + length
+        while i:
+            self._counts[i] += delta
+            i //= 2
+
+    def _first_at_least(self, length):
+        counts = self._counts
+        if length >= self._size:
+            return None
+        i = self._size + length
+        if counts[i]:
+            return length
+        # Right siblings along the path up cover the longer lengths, shortest first
+        while i > 1:
+            if i % 2 == 0 and counts[i + 1]:
+                i += 1
+                while i < self._size:
+                    i = 2 * i if counts[2 * i] else 2 * i + 1
+                return i - self._size
+            i //= 2
+        return None
+
+
+class WorkCalendar:
+    """Weekly availability windows and fixed events for one user"""
+
+    def __init__(self, windows=None, busy=(), default_window=(9 * 60, 9 * 60 + 300), placement: str = "earliest"):
+        """
+        windows: {weekday (0 = Monday): [(start_minute, end_minute), ...]};
+        None or empty means `default_window` every day. busy: (start, end)
+        datetimes of fixed events.
+        """
+        if placement not in PLACEMENTS:
+            raise ValueError(f"Unknown placement: {placement}")
+        self.windows = {day: merge_intervals(spans) for day, spans in windows.items()} if windows else None
+        self.default_window = default_window
+        self.placement = placement
+        busy = merge_intervals((_absolute(start), _absolute(end)) for start, end in busy)
+        self._busy_starts = [start for start, _ in busy]
+        self._busy_ends = [end for _, end in busy]
+
+    @classmethod
+    def default(cls, day_start: time, daily_minutes: int, placement: str = "earliest"):
+        """One window a day from day_start, daily_minutes long, and nothing booked"""
+        start = to_minutes(day_start)
+        return cls(default_window=(start, start + daily_minutes), placement=placement)
+
+    @classmethod
+    def from_rows(cls, availability, events, day_start: time, daily_minutes: int, placement: str = "earliest"):
+        """availability: (weekday, start_time, end_time) rows; events: (start_at, end_at) rows"""
+        windows = {}
+        for weekday, start, end in availability:
+            windows.setdefault(int(weekday), []).append((to_minutes(start), to_minutes(end)))
+        start = to_minutes(day_start)
+        return cls(windows, events, default_window=(start, start + daily_minutes), placement=placement)
+
+    def windows_for(self, plan_date: date, day_start: time = None):
+        """day_start moves the default window (same length) for a day planned to start elsewhere"""
+        if self.windows is None:
+            if day_start is None:
+                return [self.default_window]
+            start = to_minutes(day_start)
+            return [(start, start + self.default_window[1] - self.default_window[0])]
+        return self.windows.get(plan_date.weekday(), [])
+
+    def busy_for(self, plan_date: date):
+        """The day's booked intervals in minutes since its midnight, clipped to the day"""
+        base = plan_date.toordinal() * MINUTES_PER_DAY
+        busy = []
+        i = bisect_right(self._busy_ends, base)
+        while i < len(self._busy_starts) and self._busy_starts[i] < base + MINUTES_PER_DAY:
+            busy.append((max(self._busy_starts[i], base) - base, self._busy_ends[i] - base))
+            i += 1
+        return busy
+
+    def free(self, plan_date: date, day_start: time = None) -> DaySlots:
+        return DaySlots(subtract_intervals(self.windows_for(plan_date, day_start), self.busy_for(plan_date)))
+
+
+def place(slots: DaySlots, tasks, placement: str = "earliest"):
+    """Book tasks in order; returns (placed [(task, start_minute)] by start, tasks that did not fit)"""
+    placed, unplaced = [], []
+    for task in tasks:
+        start = slots.allocate(task.duration, placement)
+        if start is None:
+            unplaced.append(task)
+        else:
+            placed.append((task, start))
+    placed.sort(key=lambda pair: pair[1])
+    return placed, unplaced
@@ -0,0 +1,86 @@
+"""
+Slow-query log.
+
+Statements that run longer than a threshold (SLOW_QUERY_MS) are logged
+with their SQL, duration and the endpoint that ran them, and the most
+recent ones are kept in memory for GET /debug/slow-queries. Parameter
+values never reach the log: each one is replaced by its type (and length,
+for strings), which still tells a 3-id IN list from a 3000-id one without
+leaking titles or password hashes.
+
+Queries below the threshold cost one comparison.
+"""
+
+import logging
+import re
+import threading
+from collections import deque
+from datetime import datetime
+
+DEFAULT_THRESHOLD_MS = 200
+DEFAULT_KEEP = 100
+
+logger = logging.getLogger("smartplanner.slow_queries")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _redact_value(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return f"<str:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact(params):
+    """Parameter values replaced by their types; executemany batches by their row count"""
+    if params is None:
+        return []
+    if isinstance(params, dict):
+        return {key: _redact_value(value) for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        if params and isinstance(params[0], (list, tuple, dict)):
+            return f"<{len(params)} rows>"
+        return [_redact_value(value) for value in params]
+    if hasattr(params, "__iter__"):
+        return "<rows>"
+    return [_redact_value(params)]
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float = DEFAULT_THRESHOLD_MS, keep: int = DEFAULT_KEEP, endpoint=None):
+        # threshold_ms <= 0 turns the log off
+        self.threshold_ms = threshold_ms
+        self.enabled = threshold_ms > 0
+        self._threshold = threshold_ms / 1000.0
+        # endpoint() -> "METHOD /route" of the request running the query, or None outside one
+        self._endpoint = endpoint or (lambda: None)
+        self._recent = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self._logged = 0
+
+    def observe(self, sql, params, seconds: float):
+        if not self.enabled or seconds < self._threshold:
+            return
+        entry = {
+            "at": datetime.now().isoformat(timespec="milliseconds"),
+            "duration_ms": round(seconds * 1000, 2),
+            "endpoint": self._endpoint() or "background",
+            "sql": _WHITESPACE.sub(" ", sql).strip(),
+            "params": redact(params),
+        }
+        with self._lock:
+            self._recent.append(entry)
+            self._logged += 1
+        logger.warning("slow query %.1f ms [%s] %s params=%s", entry["duration_ms"], entry["endpoint"],
+                       entry["sql"], entry["params"])
+
+    def recent(self) -> list:
+        """Most recent first"""
+        with self._lock:
+            return list(reversed(self._recent))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"threshold_ms": self.threshold_ms, "logged": self._logged, "kept": len(self._recent)}
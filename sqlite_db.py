@@ -0,0 +1,378 @@
+"""
+Embedded SQLite backend for single-node installs, tests and benchmarks.
+
+`connect(path)` returns a connection shaped like pymysql's (cursor(),
+commit(), rollback(), begin(), server_status, lastrowid, %s placeholders),
+so the pool, the repositories and every module that runs SQL on a cursor
+work unchanged. The file is opened in WAL mode: readers never block the
+writer, and queries are in-process calls instead of network round trips.
+
+Statements are written once, in the MySQL dialect, and the few MySQL
+idioms the code base uses are rewritten on the way through: NOW(),
+GREATEST(), INSERT IGNORE, START TRANSACTION, and INSERT ... ON DUPLICATE
+KEY UPDATE (including the LAST_INSERT_ID(expr) counter idiom in
+change_log). DATE, TIME and TIMESTAMP columns come back as date,
+timedelta and datetime, like pymysql, and SQLite errors are raised as
+the matching pymysql exceptions so existing handlers keep working.
+
+The schema is created when a database is first opened. DDL for tables
+it already defines (e.g. the sessions table MySQLSessionStore creates on
+demand) is skipped.
+"""
+
+import re
+import sqlite3
+import threading
+from datetime import date, datetime, time, timedelta
+
+import pymysql
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL,
+    role TEXT DEFAULT 'user',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT,
+    deadline DATE,
+    duration_minutes INTEGER,
+    priority INTEGER,
+    status TEXT DEFAULT 'pending',
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    category TEXT DEFAULT 'General',
+    completed_at TIMESTAMP NULL
+);
+
+CREATE TABLE IF NOT EXISTS daily_plan (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id INTEGER REFERENCES tasks(id) ON DELETE CASCADE,
+    plan_date DATE,
+    task_order INTEGER,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    scheduled_time TIME
+);
+
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT UNIQUE NOT NULL,
+    color TEXT DEFAULT '#667eea',
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS notifications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    message TEXT NOT NULL,
+    type TEXT DEFAULT 'info',
+    read_status BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    token TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    username TEXT NOT NULL,
+    role TEXT NOT NULL,
+    expires_at TIMESTAMP NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS user_versions (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    version INTEGER NOT NULL DEFAULT 0,
+    changes_floor INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS task_changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    entity TEXT NOT NULL,
+    entity_key TEXT NOT NULL,
+    deleted BOOLEAN NOT NULL DEFAULT FALSE,
+    version INTEGER NOT NULL,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (user_id, entity, entity_key)
+);
+
+CREATE TABLE IF NOT EXISTS plan_runs (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    version INTEGER NOT NULL,
+    plan_start DATE NOT NULL,
+    days INTEGER NOT NULL,
+    pending INTEGER NOT NULL,
+    planned INTEGER NOT NULL,
+    planned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS plan_batches (
+    run_date DATE PRIMARY KEY,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP NULL,
+    users_planned INTEGER NOT NULL DEFAULT 0,
+    users_skipped INTEGER NOT NULL DEFAULT 0,
+    users_failed INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS plan_days (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    plan_date DATE NOT NULL,
+    daily_minutes INTEGER NOT NULL,
+    PRIMARY KEY (user_id, plan_date)
+);
+
+CREATE TABLE IF NOT EXISTS availability (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    weekday INTEGER NOT NULL,
+    start_time TIME NOT NULL,
+    end_time TIME NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS fixed_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    title TEXT NOT NULL,
+    start_at TIMESTAMP NOT NULL,
+    end_at TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_status ON tasks (user_id, status);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_deadline ON tasks (user_id, deadline);
+CREATE INDEX IF NOT EXISTS idx_tasks_deadline ON tasks (deadline);
+CREATE INDEX IF NOT EXISTS idx_daily_plan_user_date_order ON daily_plan (user_id, plan_date, task_order);
+CREATE INDEX IF NOT EXISTS idx_daily_plan_task_date ON daily_plan (task_id, plan_date);
+CREATE INDEX IF NOT EXISTS idx_notifications_user_read_created ON notifications (user_id, read_status, created_at);
+CREATE INDEX IF NOT EXISTS idx_task_changes_user_version ON task_changes (user_id, version);
+CREATE INDEX IF NOT EXISTS idx_task_changes_changed_at ON task_changes (changed_at);
+CREATE INDEX IF NOT EXISTS idx_availability_user_weekday ON availability (user_id, weekday);
+CREATE INDEX IF NOT EXISTS idx_fixed_events_user_end ON fixed_events (user_id, end_at);
+
+INSERT OR IGNORE INTO categories (name, color, user_id) VALUES
+('General', '#667eea', NULL),
+('School', '#4CAF50', NULL),
+('Work', '#2196F3', NULL),
+('Personal', '#FF9800', NULL),
+('Health', '#E91E63', NULL),
+('Shopping', '#9C27B0', NULL);
+"""
+
+SCHEMA_TABLES = set(re.findall(r"CREATE TABLE IF NOT EXISTS (\w+)", SCHEMA))
+
+DEFAULT_BUSY_TIMEOUT_MS = 10000
+
+# Conflict target for each table written with ON DUPLICATE KEY UPDATE
+UPSERT_KEYS = {
+    "user_versions": "user_id",
+    "task_changes": "user_id, entity, entity_key",
+    "sessions": "token",
+    "plan_runs": "user_id",
+}
+
+_REWRITES = [
+    (re.compile(r"%s"), "?"),
+    (re.compile(r"\bNOW\(\)", re.IGNORECASE), "CURRENT_TIMESTAMP"),
+    (re.compile(r"\bGREATEST\(", re.IGNORECASE), "MAX("),
+    (re.compile(r"\bINSERT IGNORE\b", re.IGNORECASE), "INSERT OR IGNORE"),
+    (re.compile(r"\bVALUES\((\w+)\)"), r"excluded.\1"),
+]
+_START_TRANSACTION = re.compile(r"^\s*START TRANSACTION\b", re.IGNORECASE)
+_CREATE_TABLE = re.compile(r"^\s*CREATE TABLE IF NOT EXISTS\s+(\w+)", re.IGNORECASE)
+_ON_DUPLICATE = re.compile(r"\bON DUPLICATE KEY UPDATE\b", re.IGNORECASE)
+_INSERT_TABLE = re.compile(r"^\s*INSERT\s+(?:OR IGNORE\s+)?INTO\s+(\w+)", re.IGNORECASE)
+_COUNTER_COLUMN = re.compile(r"(\w+)\s*=\s*LAST_INSERT_ID\(", re.IGNORECASE)
+_LAST_INSERT_ID = re.compile(r"\bLAST_INSERT_ID\(([^()]*(?:\([^()]*\))?[^()]*)\)", re.IGNORECASE)
+
+# Statements are few but IN (...) lists vary in length; cap the cache all the same
+_TRANSLATED_MAX = 2000
+_translated = {}
+
+BEGIN = "BEGIN"
+SKIP = "SELECT 1"
+
+
+def translate(sql: str):
+    """MySQL statement -> (SQLite statement, column whose new value stands in for lastrowid)"""
+    cached = _translated.get(sql)
+    if cached is not None:
+        return cached
+    out = sql
+    counter = None
+    created = _CREATE_TABLE.match(out)
+    if _START_TRANSACTION.match(out):
+        out = BEGIN
+    elif created and created.group(1) in SCHEMA_TABLES:
+        out = SKIP
+    for pattern, replacement in _REWRITES:
+        out = pattern.sub(replacement, out)
+    if _ON_DUPLICATE.search(out):
+        table = _INSERT_TABLE.match(out).group(1)
+        out = _ON_DUPLICATE.sub(f"ON CONFLICT ({UPSERT_KEYS[table]}) DO UPDATE SET", out)
+        match = _COUNTER_COLUMN.search(out)
+        if match:
+            counter = match.group(1)
+            out = _LAST_INSERT_ID.sub(r"\1", out) + f" RETURNING {counter}"
+    if len(_translated) >= _TRANSLATED_MAX:
+        _translated.clear()
+    _translated[sql] = (out, counter)
+    return out, counter
+
+
+def _param(value):
+    if isinstance(value, datetime):
+        return value.isoformat(" ")
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return str((datetime.min + value).time())
+    return value
+
+
+def _params(params):
+    if params is None:
+        return ()
+    if isinstance(params, dict):
+        return {k: _param(v) for k, v in params.items()}
+    return tuple(_param(v) for v in params)
+
+
+def _to_timedelta(raw: bytes) -> timedelta:
+    hours, minutes, seconds = raw.decode().split(":")
+    return timedelta(hours=int(hours), minutes=int(minutes), seconds=float(seconds))
+
+
+sqlite3.register_converter("DATE", lambda raw: date.fromisoformat(raw.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda raw: datetime.fromisoformat(raw.decode()))
+sqlite3.register_converter("TIME", _to_timedelta)
+
+
+def _mysql_error(e: sqlite3.Error):
+    """The pymysql exception callers already handle for this kind of failure"""
+    if isinstance(e, sqlite3.IntegrityError):
+        return pymysql.err.IntegrityError(0, str(e))
+    if isinstance(e, sqlite3.OperationalError):
+        # "database is locked" and friends: the API answers these with a 503
+        return pymysql.err.OperationalError(0, str(e))
+    if isinstance(e, sqlite3.ProgrammingError):
+        return pymysql.err.ProgrammingError(0, str(e))
+    return pymysql.err.DatabaseError(0, str(e))
+
+
+class Cursor:
+    def __init__(self, conn):
+        self.connection = conn
+        self._cur = conn._db.cursor()
+        self.lastrowid = None
+        self.rowcount = -1
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    def execute(self, sql, params=None):
+        statement, counter = translate(sql)
+        try:
+            if statement == BEGIN:
+                self.connection.begin(immediate=False)
+                return 0
+            self._cur.execute(statement, _params(params))
+            self.lastrowid = self._cur.fetchone()[0] if counter is not None else self._cur.lastrowid
+        except sqlite3.Error as e:
+            raise _mysql_error(e) from e
+        self.rowcount = self._cur.rowcount
+        return self.rowcount
+
+    def executemany(self, sql, seq_of_params):
+        statement, _ = translate(sql)
+        try:
+            self._cur.executemany(statement, [_params(p) for p in seq_of_params])
+        except sqlite3.Error as e:
+            raise _mysql_error(e) from e
+        self.rowcount = self._cur.rowcount
+        return self.rowcount
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._cur.fetchmany(size)
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    def close(self):
+        self._cur.close()
+
+    def __iter__(self):
+        return iter(self._cur)
+
+
+class Connection:
+    cursor_class = Cursor
+
+    def __init__(self, path: str, busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS):
+        # check_same_thread=False: the pool hands a connection to one thread at a time
+        self._db = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False,
+                                   timeout=busy_timeout_ms / 1000)
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.execute("PRAGMA synchronous = NORMAL")  # durable in WAL mode except on power loss
+        self.open = True
+
+    @property
+    def server_status(self):
+        # db_pool rolls back on release when this transaction bit is set
+        return 1 if self._db.in_transaction else 0
+
+    def cursor(self, cursor_class=None):
+        # pymysql cursor classes (SSCursor, DictCursor) are ignored: rows are always tuples, fetched lazily
+        return self.cursor_class(self)
+
+    def begin(self, immediate: bool = True):
+        # IMMEDIATE takes the write lock up front, so a read-then-write transaction cannot deadlock
+        if not self._db.in_transaction:
+            self._db.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+
+    def commit(self):
+        self._db.commit()
+
+    def rollback(self):
+        self._db.rollback()
+
+    def ping(self, reconnect=True):
+        return True
+
+    def close(self):
+        if self.open:
+            self.open = False
+            self._db.close()
+
+
+_created = set()
+_created_lock = threading.Lock()
+
+
+def create_database(path: str):
+    """Create the schema in a database file (once per path per process)"""
+    with _created_lock:
+        if path in _created:
+            return
+        db = sqlite3.connect(path)
+        try:
+            db.execute("PRAGMA journal_mode = WAL")
+            db.executescript(SCHEMA)
+            db.commit()
+        finally:
+            db.close()
+        _created.add(path)
+
+
+def connect(path: str, busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS, connection_class=Connection) -> Connection:
+    create_database(path)
+    return connection_class(path, busy_timeout_ms)
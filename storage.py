@@ -0,0 +1,86 @@
+"""
+Storage backends for the Smart Planner API.
+
+`MySQLStorage` talks to a MySQL server over pymysql (the DB_* variables),
+with aiomysql for the async read path when it is installed.
+`SQLiteStorage` keeps everything in one local file through the embedded
+sqlite_db backend: no server to run, and queries are in-process calls,
+which suits single-node installs, tests and benchmarks.
+
+Either way the rest of the API sees pymysql-shaped connections, so the
+repositories and the modules that run SQL on a cursor (replanner,
+change_log, session_store, ...) work on both.
+
+Pick one with DB_BACKEND=mysql|sqlite (SQLITE_PATH names the file).
+"""
+
+import os
+
+import pymysql
+
+import sqlite_db
+
+DEFAULT_SQLITE_PATH = "smartplanner.db"
+
+
+class Storage:
+    """Interface shared by all storage backends"""
+
+    name = None
+
+    def connect(self):
+        """A new pymysql-shaped connection"""
+        raise NotImplementedError
+
+    @property
+    def async_driver(self):
+        """AsyncDatabase driver to use (None lets it pick)"""
+        return None
+
+    def describe(self) -> dict:
+        return {"backend": self.name}
+
+
+class MySQLStorage(Storage):
+    name = "mysql"
+
+    def __init__(self, settings: dict):
+        self.settings = settings
+
+    def connect(self):
+        return pymysql.connect(**self.settings)
+
+    def describe(self):
+        return {"backend": self.name, "host": self.settings["host"], "database": self.settings["database"]}
+
+
+class SQLiteStorage(Storage):
+    name = "sqlite"
+
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH, busy_timeout_ms: int = sqlite_db.DEFAULT_BUSY_TIMEOUT_MS):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+
+    def connect(self):
+        return sqlite_db.connect(self.path, self.busy_timeout_ms)
+
+    @property
+    def async_driver(self):
+        # aiomysql cannot open a SQLite file; async reads go through the pooled threads
+        return "thread"
+
+    def describe(self):
+        return {"backend": self.name, "path": self.path}
+
+
+def create_storage(settings: dict, backend: str = None) -> Storage:
+    """Build the backend selected by DB_BACKEND (mysql by default)"""
+    backend = backend or os.getenv("DB_BACKEND", "mysql")
+    if backend == "mysql":
+        return MySQLStorage(settings)
+    if backend == "sqlite":
+        return SQLiteStorage(
+            os.getenv("SQLITE_PATH", DEFAULT_SQLITE_PATH),
+            busy_timeout_ms=int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", str(sqlite_db.DEFAULT_BUSY_TIMEOUT_MS)))
+        )
+    raise ValueError(f"Unknown DB_BACKEND: {backend}")
@@ -0,0 +1,70 @@
+"""
+Shared fixtures: the API running on a throwaway embedded SQLite database
+(DB_BACKEND=sqlite), so the tests need no MySQL server.
+
+Every test gets users of its own (`make_user`), so tests share one
+database and one app without seeing each other's rows.
+"""
+
+import itertools
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Before api is imported: it reads its configuration at import time
+os.environ["DB_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="smartplanner-tests-"), "api.db")
+os.environ["PLAN_BATCH_TIME"] = ""
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+_user_ids = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def api():
+    import api as api_module
+    # Entering the client runs the lifespan (notification queue, bus) once for the session
+    with TestClient(api_module.app):
+        yield api_module
+
+
+@pytest.fixture
+def db(api):
+    """A pooled connection with a cursor, committed after the test"""
+    conn = api.pool.acquire()
+    try:
+        yield conn, conn.cursor()
+        conn.commit()
+    finally:
+        api.pool.release(conn, rollback=True)
+
+
+@pytest.fixture
+def make_user(api):
+    """make_user(role="user") -> (TestClient logged in as a new user, user_id)"""
+    from repositories import UserRepository
+
+    def make(role: str = "user"):
+        username = f"test-user-{next(_user_ids)}"
+        conn = api.pool.acquire()
+        try:
+            user_id = UserRepository(conn.cursor()).create(username, api.hash_password("secret"), role)
+            conn.commit()
+        finally:
+            api.pool.release(conn, rollback=True)
+        client = TestClient(api.app)
+        response = client.post("/login", json={"username": username, "password": "secret"})
+        assert response.status_code == 200, response.text
+        return client, user_id
+
+    return make
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user()
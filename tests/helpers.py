@@ -0,0 +1,31 @@
+"""Helpers shared by the API tests."""
+
+from collections import Counter
+from datetime import date, timedelta
+
+
+def add_tasks(client, count, duration=60, priority=3, due_in=5):
+    deadline = str(date.today() + timedelta(days=due_in))
+    ids = []
+    for i in range(count):
+        response = client.post("/tasks", json={"title": f"t{i}", "deadline": deadline, "duration": duration,
+                                               "priority": priority})
+        assert response.status_code == 200, response.text
+        ids.append(response.json()["id"])
+    return ids
+
+
+def plan_rows(api, user_id):
+    """(task_id, plan_date) of every plan row the user has"""
+    conn = api.pool.acquire()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT task_id, plan_date FROM daily_plan WHERE user_id = %s", (user_id,))
+        return [(task_id, str(plan_date)) for task_id, plan_date in cur.fetchall()]
+    finally:
+        api.pool.release(conn)
+
+
+def assert_planned_once(rows):
+    twice = [task_id for task_id, count in Counter(task_id for task_id, _ in rows).items() if count > 1]
+    assert not twice, f"planned more than once: {twice}"
@@ -0,0 +1,69 @@
+"""POST /tasks/bulk (streamed CSV/NDJSON import) and the task field ranges it shares with POST /tasks."""
+
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from slots import DaySlots
+
+DEADLINE = str(date.today() + timedelta(days=3))
+
+
+def titles(client):
+    return sorted(task["title"] for task in client.get("/tasks").json()["tasks"])
+
+
+def test_csv_import_skips_bad_rows_and_reports_them(user):
+    client, _ = user
+    body = (
+        "title,deadline,duration,priority,category\n"
+        f"read,{DEADLINE},30,3,Study\n"
+        f'"write, then revise",{DEADLINE},45,5,\n'
+        "no deadline,,30,3,Study\n"
+        f"too long,{DEADLINE},1441,3,Study\n"
+        f"bad priority,{DEADLINE},30,6,Study\n"
+        f"short,{DEADLINE},30\n"
+    )
+    response = client.post("/tasks/bulk", content=body, headers={"Content-Type": "text/csv"})
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["imported"], result["failed"]) == (2, 4)
+    assert [error["row"] for error in result["errors"]] == [3, 4, 5, 6]
+    assert titles(client) == ["read", "write, then revise"]
+
+
+def test_ndjson_import_accepts_export_column_names(user):
+    client, _ = user
+    lines = [
+        {"title": "a", "deadline": DEADLINE, "duration": 20, "priority": 1},
+        {"title": "b", "deadline": DEADLINE, "duration_minutes": 25, "priority": 2, "category": "Work"},
+        "not an object",
+    ]
+    body = "\n".join(json.dumps(line) for line in lines) + "\n{broken\n"
+    response = client.post("/tasks/bulk", params={"format": "ndjson"}, content=body)
+    result = response.json()
+    assert (result["imported"], result["failed"]) == (2, 2)
+    assert titles(client) == ["a", "b"]
+
+
+def test_unknown_body_format_is_rejected(user):
+    client, _ = user
+    response = client.post("/tasks/bulk", content="x", headers={"Content-Type": "text/plain"})
+    assert response.status_code == 415
+
+
+@pytest.mark.parametrize("field, value", [("duration", 0), ("duration", -30), ("duration", 1441),
+                                          ("priority", 0), ("priority", 6), ("category", "x" * 51)])
+def test_post_tasks_rejects_what_bulk_rows_reject(user, field, value):
+    client, _ = user
+    task = {"title": "t", "deadline": DEADLINE, "duration": 30, "priority": 3, field: value}
+    assert client.post("/tasks", json=task).status_code == 422
+    response = client.post("/tasks/bulk", params={"format": "ndjson"}, content=json.dumps(task))
+    assert response.json()["failed"] == 1
+    assert titles(client) == []
+
+
+def test_negative_durations_are_not_allocated():
+    with pytest.raises(ValueError):
+        DaySlots([(540, 600)]).allocate(-1)
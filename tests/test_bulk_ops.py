@@ -0,0 +1,79 @@
+"""Bulk complete, uncomplete and delete: one ownership check, plan gaps closed per affected day."""
+
+from helpers import add_tasks, assert_planned_once, plan_rows
+
+
+def plan(client, days=2):
+    response = client.post("/generate-plan", params={"days": days, "daily_minutes": 120})
+    assert response.status_code == 200, response.text
+
+
+def status_of(client, task_id):
+    return {t["id"]: t["status"] for t in client.get("/tasks").json()["tasks"]}.get(task_id)
+
+
+def test_complete_and_uncomplete(api, user):
+    client, user_id = user
+    task_ids = add_tasks(client, 4)
+    plan(client)
+    planned_on = dict(plan_rows(api, user_id))
+    done = task_ids[:1] + task_ids[-1:]
+
+    response = client.patch("/tasks/bulk/complete", json={"task_ids": done + done})
+    assert response.status_code == 200, response.text
+    assert response.json()["task_ids"] == sorted(done)
+    assert response.json()["replanned_dates"] == sorted({planned_on[t] for t in done})
+    assert all(status_of(client, t) == "completed" for t in done)
+    assert {t for t, _ in plan_rows(api, user_id)} == set(task_ids) - set(done)
+
+    response = client.patch("/tasks/bulk/uncomplete", json={"task_ids": done})
+    assert response.status_code == 200, response.text
+    assert sorted(response.json()["planned_for"]) == sorted(str(t) for t in done)
+    assert all(status_of(client, t) == "pending" for t in done)
+    rows = plan_rows(api, user_id)
+    assert_planned_once(rows)
+    assert {t for t, _ in rows} == set(task_ids)
+
+
+def test_delete_closes_gaps(api, user):
+    client, user_id = user
+    task_ids = add_tasks(client, 4)
+    plan(client)
+    planned_on = dict(plan_rows(api, user_id))
+
+    response = client.post("/tasks/bulk/delete", json={"task_ids": task_ids[1:3]})
+    assert response.status_code == 200, response.text
+    assert response.json()["replanned_dates"] == sorted({planned_on[t] for t in task_ids[1:3]})
+    assert [t["id"] for t in client.get("/tasks").json()["tasks"]] == [task_ids[0], task_ids[3]]
+
+    # What is left of each day starts at the top of the day again
+    for plan_date in response.json()["replanned_dates"]:
+        times = [item["scheduled_time"] for item in client.get(f"/plan/{plan_date}").json()]
+        assert times == ["9:00:00"]
+
+
+def test_rejected_batches_change_nothing(make_user):
+    owner, _ = make_user()
+    other, _ = make_user()
+    mine = add_tasks(owner, 2)
+    theirs = add_tasks(other, 1)
+
+    assert owner.patch("/tasks/bulk/complete", json={"task_ids": []}).status_code == 400
+    assert owner.patch("/tasks/bulk/complete", json={"task_ids": mine + theirs}).status_code == 403
+    missing = owner.post("/tasks/bulk/delete", json={"task_ids": mine + [10 ** 9]})
+    assert missing.status_code == 404
+    assert str(10 ** 9) in missing.json()["detail"]
+    assert all(status_of(owner, t) == "pending" for t in mine)
+    assert len(owner.get("/tasks").json()["tasks"]) == 2
+
+
+def test_admin_acts_across_users(make_user):
+    first, _ = make_user()
+    second, _ = make_user()
+    admin, _ = make_user("admin")
+    task_ids = add_tasks(first, 1) + add_tasks(second, 1)
+
+    response = admin.patch("/tasks/bulk/complete", json={"task_ids": task_ids})
+    assert response.status_code == 200, response.text
+    assert status_of(first, task_ids[0]) == "completed"
+    assert status_of(second, task_ids[1]) == "completed"
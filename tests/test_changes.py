@@ -0,0 +1,79 @@
+"""GET /tasks/changes: what changed after a version, and resets below the compaction floor."""
+
+from datetime import date, datetime, timedelta
+
+import change_log
+from helpers import add_tasks
+
+
+def changes(client, since=None):
+    response = client.get("/tasks/changes", params={} if since is None else {"since": since})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_unknown_versions_reset(user):
+    client, _ = user
+    add_tasks(client, 1)
+    version = changes(client)["version"]
+    assert version > 0
+    assert changes(client)["reset"] is True
+    assert changes(client, version + 1)["reset"] is True
+
+    current = changes(client, version)
+    assert current == {"version": version, "reset": False, "tasks": [], "deleted": [], "plans": {}}
+
+
+def test_changes_since_a_version(user):
+    client, _ = user
+    kept, edited, removed = add_tasks(client, 3)
+    since = changes(client)["version"]
+
+    assert client.patch(f"/tasks/{edited}/complete").status_code == 200
+    assert client.patch(f"/tasks/{edited}/uncomplete").status_code == 200
+    assert client.delete(f"/tasks/{removed}").status_code == 200
+
+    body = changes(client, since)
+    assert body["reset"] is False
+    assert body["version"] == since + 3
+    # Two edits of one task leave one entry with its current state
+    assert [(t["id"], t["status"]) for t in body["tasks"]] == [(edited, "pending")]
+    assert body["deleted"] == [removed]
+    assert kept not in body["deleted"]
+
+
+def test_plan_days_come_with_their_items(user):
+    client, _ = user
+    task_ids = add_tasks(client, 2)
+    since = changes(client)["version"]
+    assert client.post("/generate-plan", params={"days": 1}).status_code == 200
+
+    plans = changes(client, since)["plans"]
+    assert list(plans) == [str(date.today())]
+    assert sorted(item["task_id"] for item in plans[str(date.today())]) == sorted(task_ids)
+
+
+def test_compaction_raises_the_floor(api, user):
+    client, user_id = user
+    add_tasks(client, 2)
+    old = changes(client)["version"]
+    add_tasks(client, 1)
+    current = changes(client)["version"]
+
+    conn = api.pool.acquire()
+    try:
+        conn.cursor().execute(
+            "UPDATE task_changes SET changed_at = %s WHERE user_id = %s",
+            (datetime.now() - timedelta(days=change_log.DEFAULT_RETENTION_DAYS + 1), user_id)
+        )
+        conn.commit()
+    finally:
+        api.pool.release(conn, rollback=True)
+    assert change_log.compact(api.pool) >= 3
+
+    # Entries after `old` are gone, so a client holding it has to reload
+    assert changes(client, old)["reset"] is True
+    assert changes(client, current) == {"version": current, "reset": False, "tasks": [], "deleted": [], "plans": {}}
+
+    add_tasks(client, 1)
+    assert len(changes(client, current)["tasks"]) == 1
@@ -0,0 +1,76 @@
+"""Conditional GETs: per-user ETags from the version, 304 until a write bumps it."""
+
+from datetime import date, timedelta
+
+import pytest
+
+from helpers import add_tasks
+
+TODAY = date.today()
+
+READS = [
+    ("/tasks", {}),
+    ("/plan/today", {}),
+    ("/categories", {}),
+    ("/calendar", {"start_date": str(TODAY), "end_date": str(TODAY + timedelta(days=7))}),
+]
+
+
+def revalidate(client, path, params, etag):
+    return client.get(path, params=params, headers={"If-None-Match": etag})
+
+
+@pytest.mark.parametrize("path,params", READS)
+def test_unchanged_read_is_not_modified(user, path, params):
+    client, _ = user
+    add_tasks(client, 1)
+    first = client.get(path, params=params)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    again = revalidate(client, path, params, etag)
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert again.content == b""
+    assert revalidate(client, path, params, f'"other", {etag}').status_code == 304
+    assert revalidate(client, path, params, "*").status_code == 304
+
+
+@pytest.mark.parametrize("path,params", READS)
+def test_write_changes_the_etag(user, path, params):
+    client, _ = user
+    etag = client.get(path, params=params).headers["ETag"]
+    add_tasks(client, 1)
+
+    changed = revalidate(client, path, params, etag)
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_etag_depends_on_the_query(user):
+    client, _ = user
+    add_tasks(client, 2)
+    etag = client.get("/tasks").headers["ETag"]
+    filtered = revalidate(client, "/tasks", {"status": "completed"}, etag)
+    assert filtered.status_code == 200
+    assert filtered.headers["ETag"] != etag
+
+
+def test_etags_are_not_shared_between_users(make_user):
+    first, _ = make_user()
+    second, _ = make_user()
+    etag = first.get("/tasks").headers["ETag"]
+    # Both users are at version 0, yet the tags differ
+    assert revalidate(second, "/tasks", {}, etag).status_code == 200
+
+
+def test_new_category_is_not_served_stale(user):
+    client, _ = user
+    etag = client.get("/categories").headers["ETag"]
+    assert client.post("/categories", params={"name": "Errands"}).status_code == 200
+
+    response = revalidate(client, "/categories", {}, etag)
+    assert response.status_code == 200
+    assert "Errands" in [c["name"] for c in response.json()]
@@ -0,0 +1,50 @@
+"""POST /login reads credentials and roles from the database every time."""
+
+from fastapi.testclient import TestClient
+
+
+def login(api, username, password):
+    return TestClient(api.app).post("/login", json={"username": username, "password": password})
+
+
+def update_user(api, sql, params):
+    conn = api.pool.acquire()
+    try:
+        conn.cursor().execute(sql, params)
+        conn.commit()
+    finally:
+        api.pool.release(conn, rollback=True)
+
+
+def username_of(client):
+    return client.get("/me").json()["username"]
+
+
+def test_old_password_stops_working_after_a_change(api, user):
+    client, user_id = user
+    username = username_of(client)
+    assert login(api, username, "secret").status_code == 200
+
+    update_user(api, "UPDATE users SET password_hash = %s WHERE id = %s", (api.hash_password("changed"), user_id))
+    assert login(api, username, "secret").status_code == 401
+    assert login(api, username, "changed").status_code == 200
+
+
+def test_deleted_user_cannot_log_in(api, user):
+    client, user_id = user
+    username = username_of(client)
+    assert login(api, username, "secret").status_code == 200
+
+    update_user(api, "DELETE FROM users WHERE id = %s", (user_id,))
+    assert login(api, username, "secret").status_code == 401
+
+
+def test_role_comes_from_the_database(api, make_user):
+    client, user_id = make_user("admin")
+    username = username_of(client)
+    assert login(api, username, "secret").json()["user"]["role"] == "admin"
+
+    update_user(api, "UPDATE users SET role = 'user' WHERE id = %s", (user_id,))
+    response = login(api, username, "secret")
+    assert response.json()["user"]["role"] == "user"
+    assert TestClient(api.app, cookies=response.cookies).get("/me").json()["role"] == "user"
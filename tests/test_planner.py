@@ -0,0 +1,70 @@
+"""Batch planner (planner.py): checkpoints, nightly claims, and its plans next to ones made by hand."""
+
+from datetime import date, timedelta
+
+import planner
+from helpers import add_tasks, assert_planned_once, plan_rows
+
+
+def run(api, user_id, **options):
+    return planner.run_batch(api.pool, days=options.pop("days", 1), workers=2, user_ids={user_id},
+                             daily_minutes=120, **options)
+
+
+def test_batch_after_a_longer_manual_plan_plans_nothing_twice(api, user):
+    client, user_id = user
+    add_tasks(client, 5)
+    assert client.post("/generate-plan", params={"days": 3, "daily_minutes": 120}).status_code == 200
+    first = plan_rows(api, user_id)
+    today = str(date.today())
+    for task_id, plan_date in first:
+        if plan_date == today:
+            assert client.patch(f"/tasks/{task_id}/complete").status_code == 200
+
+    # Nightly runs with a shorter horizon than the manual plan, twice over
+    for _ in range(2):
+        summary = run(api, user_id, force=True)
+        assert summary["failed"] == 0, summary["failures"]
+        rows = plan_rows(api, user_id)
+        assert_planned_once(rows)
+        assert sorted(r for r in rows if r[1] != today) == sorted(r for r in first if r[1] != today)
+
+
+def test_checkpoint_skips_unchanged_users_until_their_version_moves(api, user):
+    client, user_id = user
+    add_tasks(client, 2)
+
+    summary = run(api, user_id, days=2)
+    assert (summary["users"], summary["planned"], summary["skipped"], summary["tasks_planned"]) == (1, 1, 0, 2)
+    assert run(api, user_id, days=2)["skipped"] == 1
+    # A longer range than the checkpoint covers is planned again
+    assert run(api, user_id, days=3)["planned"] == 1
+
+    add_tasks(client, 1)
+    summary = run(api, user_id, days=3)
+    assert (summary["planned"], summary["skipped"]) == (1, 0)
+    assert run(api, user_id, days=3, force=True)["planned"] == 1
+
+
+def test_checkpoint_with_nothing_pending_holds_for_any_range(api, user):
+    _, user_id = user
+    assert run(api, user_id, days=2)["planned"] == 1
+    assert run(api, user_id, days=7, start=date.today() + timedelta(days=1))["skipped"] == 1
+
+
+def test_a_night_is_claimed_once(api):
+    night = date(2099, 1, 1)
+    assert planner.claim_night(api.pool, night) is True
+    assert planner.claim_night(api.pool, night) is False
+
+    planner.finish_night(api.pool, night, {"planned": 3, "skipped": 2, "failed": 1})
+    conn = api.pool.acquire()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT users_planned, users_skipped, users_failed, finished_at FROM plan_batches "
+                    "WHERE run_date = %s", (night,))
+        planned, skipped, failed, finished_at = cur.fetchone()
+    finally:
+        api.pool.release(conn)
+    assert (planned, skipped, failed) == (3, 2, 1)
+    assert finished_at is not None
@@ -0,0 +1,174 @@
+"""
+Unit tests for the pure planning modules: planning_engine, scoring and slots.
+
+    python -m pytest tests
+"""
+
+import random
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+import scoring
+from planning_engine import Task, plan_tasks, rank_key, reflow_day, task_value
+from slots import DaySlots, WorkCalendar
+
+MONDAY = date(2026, 10, 19)
+
+
+def at(hour, minute=0, day=MONDAY):
+    return datetime.combine(day, time(hour, minute))
+
+
+def scheduled(day_plan):
+    return [(item.task_id, item.scheduled_time.strftime("%H:%M")) for item in day_plan.tasks]
+
+
+# planning_engine.plan_tasks
+
+def test_greedy_takes_most_urgent_first_optimal_takes_most_value():
+    # 60 minutes: greedy takes the task due today (40 min), leaving room for nothing else;
+    # the knapsack prefers both priority-5 tasks due tomorrow (225 each against 80)
+    tasks = [
+        Task(1, MONDAY, 40, 1, "due today"),
+        Task(2, MONDAY + timedelta(days=1), 30, 5, "b"),
+        Task(3, MONDAY + timedelta(days=1), 30, 5, "c"),
+    ]
+    assert task_value(tasks[0], MONDAY) == 80
+    assert task_value(tasks[1], MONDAY) == 225
+
+    greedy, = plan_tasks(tasks, MONDAY, 1, daily_minutes=60)
+    assert greedy.mode == "greedy"
+    assert scheduled(greedy) == [(1, "09:00")]
+    assert greedy.remaining_minutes == 20
+
+    optimal, = plan_tasks(tasks, MONDAY, 1, daily_minutes=60, mode="optimal")
+    assert optimal.mode == "optimal"
+    assert scheduled(optimal) == [(2, "09:00"), (3, "09:30")]
+    assert optimal.remaining_minutes == 0
+
+
+def test_each_task_is_planned_at_most_once_across_days():
+    tasks = [Task(i, MONDAY + timedelta(days=i % 3), 45, 1 + i % 5, f"t{i}") for i in range(20)]
+    plans = plan_tasks(tasks, MONDAY, 5, daily_minutes=120, mode="optimal")
+    planned = [item.task_id for day in plans for item in day.tasks]
+    assert len(planned) == len(set(planned))
+    assert all(sum(item.duration for item in day.tasks) <= 120 for day in plans)
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        plan_tasks([], MONDAY, 1, mode="fastest")
+
+
+def test_remaining_minutes_counts_only_free_time():
+    # Two hours of availability with a five-hour daily budget, filled
+    calendar = WorkCalendar({MONDAY.weekday(): [(9 * 60, 11 * 60)]})
+    tasks = [Task(i, MONDAY, 60, 3, f"t{i}") for i in range(3)]
+    day, = plan_tasks(tasks, MONDAY, 1, daily_minutes=300, calendar=calendar)
+    assert len(day.tasks) == 2
+    assert day.remaining_minutes == 0
+
+
+def test_reflow_keeps_the_days_start_without_working_hours():
+    calendar = WorkCalendar(busy=[(at(19), at(20))])
+    tasks = [Task(1, MONDAY, 60, 3, "a"), Task(2, MONDAY, 30, 3, "b")]
+    day = reflow_day(MONDAY, tasks, daily_minutes=300, day_start=time(7, 0), calendar=calendar)
+    assert scheduled(day) == [(1, "07:00"), (2, "08:00")]
+
+
+# scoring.rank: NumPy and pure-Python paths
+
+def random_tasks(count, seed):
+    rng = random.Random(seed)
+    # Narrow ranges so deadlines, priorities and durations tie often
+    return [Task(i, MONDAY + timedelta(days=rng.randrange(-3, 10)), rng.choice([15, 30, 60]),
+                 rng.randrange(1, 6), f"t{i}") for i in rng.sample(range(1, 10 * count), count)]
+
+
+@pytest.mark.parametrize("count", [1, 50, 1000])
+def test_rank_matches_rank_key_on_both_paths(count):
+    tasks = random_tasks(count, seed=count)
+    expected = sorted(range(count), key=lambda i: rank_key(tasks[i], MONDAY))
+    assert scoring.rank(scoring.TaskColumns.from_tasks(tasks, vectorized=False), MONDAY) == expected
+    if scoring.numpy is None:
+        pytest.skip("NumPy is not installed")
+    assert scoring.rank(scoring.TaskColumns.from_tasks(tasks, vectorized=True), MONDAY) == expected
+
+
+def test_scores_match_task_value_on_both_paths():
+    tasks = random_tasks(300, seed=7)
+    expected = [task_value(t, MONDAY) for t in tasks]
+    assert scoring.scores(scoring.TaskColumns.from_tasks(tasks, vectorized=False), MONDAY) == pytest.approx(expected)
+    if scoring.numpy is None:
+        pytest.skip("NumPy is not installed")
+    columns = scoring.TaskColumns.from_tasks(tasks, vectorized=True)
+    assert scoring.scores(columns, MONDAY) == pytest.approx(expected)
+    assert scoring.scores(columns, MONDAY, rows=[5, 2]) == pytest.approx([expected[5], expected[2]])
+
+
+# slots: free time around events that straddle window edges
+
+@pytest.fixture
+def monday_slots():
+    # 09:00-12:00 and 13:00-17:00, minus 08:30-09:30, 11:45-13:15 and 16:50-18:00
+    calendar = WorkCalendar({0: [(9 * 60, 12 * 60), (13 * 60, 17 * 60)]},
+                            busy=[(at(8, 30), at(9, 30)), (at(11, 45), at(13, 15)), (at(16, 50), at(18))])
+    return calendar.free(MONDAY)
+
+
+def test_events_are_cut_out_of_windows(monday_slots):
+    assert monday_slots.intervals() == [(9 * 60 + 30, 11 * 60 + 45), (13 * 60 + 15, 16 * 60 + 50)]
+    assert monday_slots.free_minutes == 135 + 215
+    assert monday_slots.largest() == 215
+
+
+def test_earliest_fit_takes_the_first_interval_long_enough(monday_slots):
+    assert monday_slots.allocate(120, "earliest") == 9 * 60 + 30
+    assert monday_slots.allocate(30, "earliest") == 13 * 60 + 15
+    assert monday_slots.allocate(200, "earliest") is None
+
+
+def test_best_fit_takes_the_shortest_interval_long_enough(monday_slots):
+    assert monday_slots.allocate(30, "best") == 9 * 60 + 30
+    assert monday_slots.allocate(200, "best") == 13 * 60 + 15
+    # 105 and 15 minutes left: the shorter one wins
+    assert monday_slots.allocate(10, "best") == 16 * 60 + 35
+    assert monday_slots.allocate(110, "best") is None
+    assert monday_slots.free_minutes == 135 + 215 - 240
+
+
+def test_day_without_windows_fits_nothing():
+    slots = WorkCalendar({0: [(9 * 60, 17 * 60)]}).free(MONDAY + timedelta(days=5))
+    assert slots.largest() == -1
+    assert slots.allocate(0) is None
+    assert slots.allocate(0, "best") is None
+
+
+def test_events_on_other_days_are_ignored():
+    calendar = WorkCalendar(busy=[(at(9, day=MONDAY - timedelta(days=1)), at(10, day=MONDAY - timedelta(days=1))),
+                                  (at(23, day=MONDAY), at(1, day=MONDAY + timedelta(days=1)))])
+    assert calendar.free(MONDAY).intervals() == [(9 * 60, 14 * 60)]
+    assert calendar.busy_for(MONDAY + timedelta(days=1)) == [(0, 60)]
+
+
+@pytest.mark.parametrize("placement", ["earliest", "best"])
+def test_allocation_matches_brute_force(placement):
+    rng = random.Random(placement)
+    for _ in range(300):
+        starts = sorted(rng.sample(range(0, 1300, 10), rng.randrange(1, 10)))
+        intervals = [(s, min(s + rng.randrange(5, 120), nxt)) for s, nxt in zip(starts, starts[1:] + [1440])]
+        slots = DaySlots(intervals)
+        free = [list(interval) for interval in intervals]
+        for _ in range(15):
+            duration = rng.randrange(1, 130)
+            fitting = [i for i, (s, e) in enumerate(free) if e - s >= duration]
+            if placement == "best":
+                fitting.sort(key=lambda i: free[i][1] - free[i][0])
+            start = slots.allocate(duration, placement)
+            if not fitting:
+                assert start is None
+                continue
+            assert start == free[fitting[0]][0]
+            free[fitting[0]][0] += duration
+        assert slots.intervals() == [tuple(f) for f in free if f[1] > f[0]]
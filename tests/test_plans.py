@@ -0,0 +1,39 @@
+"""Plan generation against the database: POST /generate-plan and planner.rebuild_plan."""
+
+from datetime import date
+
+import pytest
+
+from helpers import add_tasks, assert_planned_once, plan_rows
+
+
+def test_shorter_replan_keeps_later_days_without_duplicates(api, user):
+    client, user_id = user
+    add_tasks(client, 5)
+    assert client.post("/generate-plan", params={"days": 3, "daily_minutes": 120}).status_code == 200
+    first = plan_rows(api, user_id)
+    assert len(first) == 5
+
+    # Today's tasks are done, so today has room for the ones planned later
+    today = str(date.today())
+    for task_id, plan_date in first:
+        if plan_date == today:
+            assert client.patch(f"/tasks/{task_id}/complete").status_code == 200
+
+    assert client.post("/generate-plan", params={"days": 1, "daily_minutes": 120}).status_code == 200
+    rows = plan_rows(api, user_id)
+    assert_planned_once(rows)
+    # Tasks planned after today stay on their day
+    later = sorted(r for r in first if r[1] != today)
+    assert sorted(r for r in rows if r[1] != today) == later
+    assert {task_id for task_id, _ in rows} == {task_id for task_id, _ in later}
+
+
+@pytest.mark.parametrize("days", [0, -1, 367])
+def test_days_out_of_range_are_rejected_without_a_version_bump(api, user, days):
+    client, _ = user
+    add_tasks(client, 1)
+    version = client.get("/tasks/changes").json()["version"]
+    response = client.post("/generate-plan", params={"days": days})
+    assert response.status_code == 400
+    assert client.get("/tasks/changes").json()["version"] == version
@@ -0,0 +1,58 @@
+"""Incremental re-planning (replanner.py) as task mutations drive it through the API."""
+
+from datetime import date, timedelta
+
+from helpers import add_tasks
+
+TODAY = str(date.today())
+
+
+def today_plan(client):
+    return [(item["task_id"], item["scheduled_time"]) for item in client.get("/plan/today").json()]
+
+
+def test_new_task_goes_into_a_planned_day_with_room(user):
+    client, _ = user
+    first, = add_tasks(client, 1)
+    assert client.post("/generate-plan", params={"days": 1, "daily_minutes": 120}).status_code == 200
+
+    response = client.post("/tasks", json={"title": "new", "deadline": TODAY, "duration": 30, "priority": 5})
+    assert response.json()["planned_for"] == TODAY
+    # Most urgent first, and the day is re-timed from its start
+    assert today_plan(client) == [(response.json()["id"], "9:00:00"), (first, "9:30:00")]
+
+
+def test_completing_or_deleting_closes_the_gap(user):
+    client, _ = user
+    a, b, c = add_tasks(client, 3, duration=30)
+    assert client.post("/generate-plan", params={"days": 1}).status_code == 200
+    assert today_plan(client) == [(a, "9:00:00"), (b, "9:30:00"), (c, "10:00:00")]
+
+    assert client.patch(f"/tasks/{a}/complete").json()["replanned_dates"] == [TODAY]
+    assert today_plan(client) == [(b, "9:00:00"), (c, "9:30:00")]
+    client.delete(f"/tasks/{b}")
+    assert today_plan(client) == [(c, "9:00:00")]
+
+    # Reopened, it is slotted back in by rank
+    assert client.patch(f"/tasks/{a}/uncomplete").json()["planned_for"] == TODAY
+    assert today_plan(client) == [(a, "9:00:00"), (c, "9:30:00")]
+
+
+def test_days_are_filled_to_the_budget_they_were_planned_with(user):
+    client, _ = user
+    add_tasks(client, 2)
+    assert client.post("/generate-plan", params={"days": 1, "daily_minutes": 120}).status_code == 200
+    # 120 of 120 minutes used, though PLAN_DAILY_MINUTES is 300
+    response = client.post("/tasks", json={"title": "extra", "deadline": TODAY, "duration": 30, "priority": 5})
+    assert response.json()["planned_for"] is None
+    assert len(today_plan(client)) == 2
+
+
+def test_a_larger_budget_is_filled_past_the_default(user):
+    client, _ = user
+    add_tasks(client, 1)
+    assert client.post("/generate-plan", params={"days": 1, "daily_minutes": 600}).status_code == 200
+    planned = [client.post("/tasks", json={"title": f"x{i}", "deadline": TODAY, "duration": 60,
+                                           "priority": 3}).json()["planned_for"] for i in range(5)]
+    assert planned == [TODAY] * 5
+    assert len(today_plan(client)) == 6
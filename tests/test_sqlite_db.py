@@ -0,0 +1,95 @@
+"""sqlite_db: MySQL statements rewritten for SQLite, and pymysql-shaped results and errors."""
+
+from datetime import date, datetime, time, timedelta
+
+import pymysql
+import pytest
+
+import change_log
+import sqlite_db
+from sqlite_db import translate
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite_db.connect(str(tmp_path / "test.db"))
+    yield conn
+    conn.close()
+
+
+def add_user(conn, username="someone"):
+    cur = conn.cursor()
+    cur.execute("INSERT INTO users (username, password_hash) VALUES (%s, %s)", (username, "x"))
+    return cur.lastrowid
+
+
+def test_dialect_rewrites():
+    assert translate("SELECT * FROM tasks WHERE id = %s AND user_id = %s") == \
+        ("SELECT * FROM tasks WHERE id = ? AND user_id = ?", None)
+    assert translate("UPDATE tasks SET completed_at = NOW()")[0] == "UPDATE tasks SET completed_at = CURRENT_TIMESTAMP"
+    assert translate("SELECT GREATEST(a, b) FROM t")[0] == "SELECT MAX(a, b) FROM t"
+    assert translate("INSERT IGNORE INTO plan_runs (user_id) VALUES (%s)")[0] == \
+        "INSERT OR IGNORE INTO plan_runs (user_id) VALUES (?)"
+    assert translate("START TRANSACTION")[0] == sqlite_db.BEGIN
+    assert translate("CREATE TABLE IF NOT EXISTS sessions (token VARCHAR(64))")[0] == sqlite_db.SKIP
+
+
+def test_upserts_use_the_table_conflict_key():
+    statement, counter = translate(change_log.RECORD_SQL)
+    assert "ON CONFLICT (user_id, entity, entity_key) DO UPDATE SET" in statement
+    assert "deleted = excluded.deleted, version = excluded.version" in statement
+    assert counter is None
+
+
+def test_last_insert_id_counter_returns_the_column():
+    statement, counter = translate(
+        "INSERT INTO user_versions (user_id, version) VALUES (%s, LAST_INSERT_ID(1)) "
+        "ON DUPLICATE KEY UPDATE version = LAST_INSERT_ID(version + 1)"
+    )
+    assert counter == "version"
+    assert statement == ("INSERT INTO user_versions (user_id, version) VALUES (?, 1) "
+                         "ON CONFLICT (user_id) DO UPDATE SET version = version + 1 RETURNING version")
+
+
+def test_version_counter_round_trip(conn):
+    user_id = add_user(conn)
+    cur = conn.cursor()
+    assert [change_log.bump_version(cur, user_id, tasks=[7]) for _ in range(3)] == [1, 2, 3]
+    cur.execute("SELECT entity, entity_key, version FROM task_changes WHERE user_id = %s", (user_id,))
+    assert cur.fetchall() == [("task", "7", 3)]
+
+
+def test_column_types_match_pymysql(conn):
+    user_id = add_user(conn)
+    cur = conn.cursor()
+    cur.execute("INSERT INTO tasks (title, deadline, duration_minutes, priority, user_id) VALUES (%s, %s, 30, 3, %s)",
+                ("t", date(2026, 10, 18), user_id))
+    task_id = cur.lastrowid
+    cur.execute("INSERT INTO daily_plan (task_id, plan_date, task_order, user_id, scheduled_time) "
+                "VALUES (%s, %s, 1, %s, %s)", (task_id, date(2026, 10, 18), user_id, time(9, 30)))
+    cur.execute("UPDATE tasks SET completed_at = NOW() WHERE id = %s", (task_id,))
+    cur.execute("SELECT d.plan_date, d.scheduled_time, t.completed_at FROM daily_plan d "
+                "JOIN tasks t ON t.id = d.task_id")
+    plan_date, scheduled_time, completed_at = cur.fetchone()
+    assert plan_date == date(2026, 10, 18)
+    assert scheduled_time == timedelta(hours=9, minutes=30)
+    assert isinstance(completed_at, datetime)
+
+
+def test_errors_are_raised_as_pymysql_ones(conn):
+    add_user(conn)
+    with pytest.raises(pymysql.IntegrityError):
+        add_user(conn)
+    with pytest.raises(pymysql.err.OperationalError):
+        conn.cursor().execute("SELECT * FROM no_such_table")
+
+
+def test_transaction_state(conn):
+    assert conn.server_status == 0
+    conn.cursor().execute("START TRANSACTION")
+    add_user(conn)
+    assert conn.server_status == 1
+    conn.rollback()
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM users")
+    assert cur.fetchone() == (0,)
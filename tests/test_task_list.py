@@ -0,0 +1,88 @@
+"""GET /tasks: keyset pages ordered by (deadline, id), and its filters."""
+
+from datetime import date, timedelta
+
+
+def add_task(client, title, due_in, category="General"):
+    response = client.post("/tasks", json={"title": title, "deadline": str(date.today() + timedelta(days=due_in)),
+                                           "duration": 30, "priority": 3, "category": category})
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def add_undated_task(api, user_id, title):
+    conn = api.pool.acquire()
+    try:
+        cur = conn.cursor()
+        cur.execute("INSERT INTO tasks (title, deadline, duration_minutes, priority, user_id) "
+                    "VALUES (%s, NULL, 30, 3, %s)", (title, user_id))
+        conn.commit()
+        return cur.lastrowid
+    finally:
+        api.pool.release(conn, rollback=True)
+
+
+def all_pages(client, **params):
+    ids, pages, cursor = [], 0, None
+    while True:
+        response = client.get("/tasks", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        body = response.json()
+        ids += [t["id"] for t in body["tasks"]]
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return ids, pages
+
+
+def test_pages_cover_every_task_once_in_deadline_order(api, user):
+    client, user_id = user
+    # Equal deadlines on either side of a page boundary, and undated tasks first
+    later = add_task(client, "later", 9)
+    soon = [add_task(client, f"soon{i}", 2) for i in range(3)]
+    middle = add_task(client, "middle", 5)
+    undated = [add_undated_task(api, user_id, f"undated{i}") for i in range(2)]
+
+    ids, pages = all_pages(client, limit=2)
+    assert ids == undated + soon + [middle, later]
+    assert pages == 4
+
+
+def test_last_full_page_has_no_cursor_after_it(user):
+    client, _ = user
+    for i in range(4):
+        add_task(client, f"t{i}", i)
+    first = client.get("/tasks", params={"limit": 2}).json()
+    second = client.get("/tasks", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    assert len(second["tasks"]) == 2
+    assert second["next_cursor"] is None
+
+
+def test_filters_apply_to_every_page(user):
+    client, _ = user
+    work = [add_task(client, f"work{i}", i, category="Work") for i in range(3)]
+    add_task(client, "home", 1, category="Personal")
+    assert client.patch(f"/tasks/{work[0]}/complete").status_code == 200
+
+    assert all_pages(client, limit=1, category="Work")[0] == work
+    assert all_pages(client, limit=1, category="Work", status="pending")[0] == work[1:]
+    assert all_pages(client, limit=1, status="completed")[0] == [work[0]]
+    today = date.today()
+    assert all_pages(client, limit=1, category="Work", deadline_from=str(today + timedelta(days=1)),
+                     deadline_to=str(today + timedelta(days=1)))[0] == [work[1]]
+
+
+def test_invalid_cursor_is_rejected(user):
+    client, _ = user
+    assert client.get("/tasks", params={"cursor": "not a cursor"}).status_code == 400
+
+
+def test_users_only_list_their_own_tasks(make_user):
+    owner, owner_id = make_user()
+    other, _ = make_user()
+    admin, _ = make_user("admin")
+    task_id = add_task(owner, "mine", 1)
+
+    assert all_pages(other)[0] == []
+    assert other.get("/tasks", params={"user_id": owner_id}).status_code == 403
+    assert all_pages(admin, user_id=owner_id)[0] == [task_id]